@@ -0,0 +1,88 @@
+"""
+Linha de comando dos analisadores de gabaritos.
+
+Uso:
+    python analisar.py report   [banco]                      testes de hipótese (só texto, sem gráficos)
+    python analisar.py plot     [banco] [pasta_saida] [csv]  todas as figuras em PNG/SVG + index.html
+    python analisar.py simulate [banco] [csv_saida]          simulação do chute (chute.py) -> CSV + tabela
+    python analisar.py lab      [banco] [metodo]             laboratório de probabilidade (preditivo.py)
+
+Cada subcomando importa só o que usa: report não carrega matplotlib/seaborn, simulate não carrega
+scipy/statsmodels/matplotlib, e este arquivo sozinho não importa nem o pandas.
+Tempo de inicialização: python benchmark.py inicializacao
+"""
+import sys
+
+# ==========================================
+# SUBCOMANDOS
+# ==========================================
+def report(db_path, parquet_path=None, caminho_cache=None, modo_agregado=True):
+    from cache_resultados import CacheResultados
+    from main import imprimir_relatorios, obter_contagens
+
+    cache = CacheResultados(caminho_cache) if caminho_cache else None
+    df_counts, chave = obter_contagens(db_path, parquet_path, modo_agregado, cache)
+    if df_counts.empty:
+        print("Nenhum dado encontrado.")
+        return
+    imprimir_relatorios(df_counts, cache, chave)
+
+
+def plot(db_path, pasta, csv_path=None, caminho_cache=None, n_workers=None):
+    import time
+    from relatorio_lote import gerar_relatorio
+
+    inicio = time.perf_counter()
+    index = gerar_relatorio(db_path, pasta, csv_path, caminho_cache, n_workers)
+    if index:
+        print(f"Relatório em {index} ({time.perf_counter() - inicio:.1f} s)")
+
+
+def simulate(db_path, csv_path, cache_path=None, parquet_path=None, n_workers=None, seed=None, tolerancia=None):
+    from chute import AnalisadorEstatistico, GeradorDeDados
+
+    gerador = GeradorDeDados(db_path, cache_path=cache_path, parquet_path=parquet_path)
+    df = gerador.gerar_dataset_completo([0.5, 0.6, 0.7, 0.8, 0.9], [0.05, 0.1, 0.2], 1000,
+                                        n_workers=n_workers, seed=seed, tolerancia=tolerancia)
+    df.to_csv(csv_path, index=False)
+    print(f"Dados salvos em {csv_path}")
+    AnalisadorEstatistico(csv_path).imprimir_tabela_definitiva(erro_alvo=0.10)
+
+
+def lab(db_path, metodo="monte_carlo", cache_path=None, parquet_path=None, n_workers=None, seed=None):
+    from preditivo import LaboratorioProbabilidade
+
+    laboratorio = LaboratorioProbabilidade(db_path, n_workers=n_workers, seed=seed, metodo=metodo,
+                                           cache_path=cache_path, parquet_path=parquet_path)
+    laboratorio.teste_1_comparacao_rigorosa()
+    laboratorio.teste_3_quantas_provas_rigoroso()
+
+
+if __name__ == "__main__":
+    # Mesmos padrões dos __main__ de main.py, chute.py, preditivo.py e relatorio_lote.py
+    CAMINHO_DB = "../dada-scrapping/concursos_data.db"
+    CAMINHO_PARQUET = "gabaritos_parquet"
+    CAMINHO_CACHE = "cache_analises"
+    CACHE_GABARITOS = "gabaritos_cache.npz"
+    CSV_SIMULACAO = "dados_simulacao_v7_completa.csv"
+    PASTA_RELATORIO = "relatorio"
+    # None = usa todos os núcleos. A SEED fixa o resultado, qualquer que seja o nº de workers.
+    N_WORKERS = None
+    SEED = 2025
+    # None = 1000 simulações fixas por cenário, como o CSV publicado; ex.: 0.02 = modo adaptativo
+    TOLERANCIA = None
+
+    COMANDOS = {
+        'report': lambda db=CAMINHO_DB: report(db, CAMINHO_PARQUET, CAMINHO_CACHE),
+        'plot': lambda db=CAMINHO_DB, pasta=PASTA_RELATORIO, csv=CSV_SIMULACAO:
+            plot(db, pasta, csv, CAMINHO_CACHE, N_WORKERS),
+        'simulate': lambda db=CAMINHO_DB, csv=CSV_SIMULACAO:
+            simulate(db, csv, CACHE_GABARITOS, CAMINHO_PARQUET, N_WORKERS, SEED, TOLERANCIA),
+        'lab': lambda db=CAMINHO_DB, metodo="monte_carlo":
+            lab(db, metodo, CACHE_GABARITOS, CAMINHO_PARQUET, N_WORKERS, SEED),
+    }
+
+    if len(sys.argv) < 2 or sys.argv[1] not in COMANDOS:
+        print(__doc__)
+        sys.exit(1)
+    COMANDOS[sys.argv[1]](*sys.argv[2:])
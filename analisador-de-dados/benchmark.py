@@ -0,0 +1,198 @@
+"""
+Benchmarks do analisador de gabaritos.
+
+Uso:
+    python benchmark.py distribuicoes [n_linhas] [amostra_legado]
+    python benchmark.py inicializacao [repeticoes] [limite_s]
+
+distribuicoes: classificar_alternativas + contagens + porcentagens por prova, versão original
+               (apply por linha e dois groupby/value_counts) x atual, num dataset sintético de
+               n_linhas respostas (padrão 10 milhões) no formato de carregar_dados. O legado roda só
+               nas primeiras amostra_legado respostas (padrão 200 mil; 0 = todas) e o tempo é extrapolado.
+inicializacao: tempo de import de cada script num interpretador novo (python -X importtime,
+               melhor de 'repeticoes', padrão 5). Sai com erro se algum importar no topo uma
+               biblioteca pesada que só deveria carregar sob demanda, ou passar de limite_s segundos.
+"""
+import os
+import subprocess
+import sys
+import time
+import warnings
+import numpy as np
+import pandas as pd
+
+warnings.filterwarnings("ignore")
+
+from main import calcular_contagens_absolutas, classificar_alternativas, percentuais_por_prova
+
+
+def _cronometrar(funcao, repeticoes):
+    """Melhor tempo (s) entre as repetições e o resultado da última."""
+    melhor, resultado = float('inf'), None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+# ==========================================
+# 1. DISTRIBUIÇÕES POR PROVA (main.py)
+# ==========================================
+def _classificar_legado(df):
+    df_me = df[df['tipo_prova'] == 'MULTIPLA_ESCOLHA'].copy()
+    if df_me.empty:
+        df['qtd_alternativas'] = 0
+        return df
+
+    provas_com_e = df_me[df_me['resposta'] == 'E'][['concurso', 'cargo']].drop_duplicates()
+    provas_com_e['chave'] = provas_com_e['concurso'] + "_" + provas_com_e['cargo']
+    chaves_5_itens = set(provas_com_e['chave'])
+
+    def verificar_qtd(row):
+        if row['tipo_prova'] != 'MULTIPLA_ESCOLHA': return 0
+        chave = row['concurso'] + "_" + row['cargo']
+        return 5 if chave in chaves_5_itens else 4
+
+    df['qtd_alternativas'] = df.apply(verificar_qtd, axis=1)
+    return df
+
+
+def _legado(df):
+    df = _classificar_legado(df)
+    chaves = ['concurso', 'cargo', 'tipo_prova', 'qtd_alternativas']
+    dist = (df.groupby(chaves)['resposta'].value_counts(normalize=True).unstack(fill_value=0) * 100).reset_index()
+    counts = df.groupby(chaves)['resposta'].value_counts(normalize=False).unstack(fill_value=0).reset_index()
+    return dist, counts
+
+
+def _atual(df):
+    counts = calcular_contagens_absolutas(classificar_alternativas(df))
+    return percentuais_por_prova(counts), counts
+
+
+def _dataset_sintetico(n_linhas, seed=7):
+    """Provas de 120 itens C/E e de 50-70 itens A-D/A-E, com strings repetidas como as do read_sql_query."""
+    rng = np.random.default_rng(seed)
+    tamanhos, tipos, letras = [], [], []
+    total = 0
+    while total < n_linhas:
+        sorteio = rng.random()
+        if sorteio < 0.6:
+            tipo, opcoes, n = 'CERTO_ERRADO', 'CE', 120
+        else:
+            tipo, opcoes, n = 'MULTIPLA_ESCOLHA', ('ABCDE' if sorteio < 0.85 else 'ABCD'), int(rng.choice([50, 60, 70]))
+        n = min(n, n_linhas - total)
+        tamanhos.append(n)
+        tipos.append(tipo)
+        letras.append(rng.choice(list(opcoes), n))
+        total += n
+
+    n_provas = len(tamanhos)
+    prova = np.repeat(np.arange(n_provas), tamanhos)
+    concursos = np.array([f"CONCURSO_{i // 7:05d}" for i in range(n_provas)], dtype=object)
+    cargos = np.array([f"Cargo {i % 7}" for i in range(n_provas)], dtype=object)
+    # Mesmos objetos str repetidos (como no pandas lendo do SQLite), sem estourar a memória
+    return pd.DataFrame({
+        'concurso': concursos[prova],
+        'cargo': cargos[prova],
+        'tipo_prova': np.array(tipos, dtype=object)[prova],
+        'resposta': np.concatenate(letras).astype(object),
+    })
+
+
+def _normalizar(df):
+    df = df.copy()
+    for coluna in ('concurso', 'cargo', 'tipo_prova'):
+        df[coluna] = df[coluna].astype(str)
+    df.columns = [str(c) for c in df.columns]
+    return df.sort_values(['concurso', 'cargo']).reset_index(drop=True)
+
+
+def bench_distribuicoes(n_linhas=10_000_000, amostra_legado=200_000):
+    """
+    O legado (apply por linha) leva minutos em 10 milhões de linhas: ele roda só nas primeiras
+    'amostra_legado' respostas e o tempo é extrapolado linearmente (0 = legado no dataset inteiro).
+    A equivalência é conferida nessa amostra, contra o atual rodando nela também.
+    """
+    n_linhas, amostra_legado = int(n_linhas), int(amostra_legado)
+    base = _dataset_sintetico(n_linhas)
+    amostra = base.iloc[:amostra_legado] if 0 < amostra_legado < len(base) else base
+    print(f"Respostas: {len(base)} | Provas: {base.groupby(['concurso', 'cargo']).ngroups} | "
+          f"Amostra do legado: {len(amostra)}\n")
+
+    t_legado, (dist_l, counts_l) = _cronometrar(lambda: _legado(amostra.copy()), 1)
+    dist_a, counts_a = _atual(amostra.copy())
+    for antigo, novo in ((dist_l, dist_a), (counts_l, counts_a)):
+        pd.testing.assert_frame_equal(_normalizar(antigo), _normalizar(novo), check_dtype=False, check_categorical=False)
+    print("Resultados idênticos ao legado.")
+
+    t_atual, _ = _cronometrar(lambda: _atual(base.copy()), 3)
+    if len(amostra) < len(base):
+        t_legado *= len(base) / len(amostra)
+        print(f"Legado : {t_legado:8.2f} s  (extrapolado de {len(amostra)} respostas)")
+    else:
+        print(f"Legado : {t_legado:8.2f} s")
+    print(f"Atual  : {t_atual:8.2f} s  ({t_legado / t_atual:.0f}x)")
+
+# ==========================================
+# 2. TEMPO DE INICIALIZAÇÃO (python -X importtime)
+# ==========================================
+# Bibliotecas que custam de meio a dois segundos de import: só dentro das funções que as usam
+_PESADAS = ('matplotlib', 'seaborn', 'scipy', 'statsmodels')
+IMPORTS_PROIBIDOS = {
+    'analisar': _PESADAS + ('pandas', 'pyarrow'),  # a CLI só importa o subcomando escolhido
+    'main': _PESADAS,
+    'chute': _PESADAS,
+    'preditivo': _PESADAS,
+    'figuras': _PESADAS,
+}
+
+
+def _importtime(modulo):
+    """(segundos do 'import modulo' num interpretador novo, nomes de todos os módulos importados)."""
+    saida = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+                           cwd=os.path.dirname(os.path.abspath(__file__)),
+                           capture_output=True, text=True, check=True).stderr
+    total, importados = 0.0, set()
+    for linha in saida.splitlines():
+        # "import time: <self us> | <cumulativo us> | <módulo, indentado pela profundidade>"
+        partes = linha.removeprefix("import time:").split("|")
+        if len(partes) != 3 or not partes[1].strip().isdigit(): continue
+        nome = partes[2].strip()
+        importados.add(nome)
+        if nome == modulo:
+            total = int(partes[1]) / 1e6
+    return total, importados
+
+
+def bench_inicializacao(repeticoes=5, limite_s=None):
+    falhas = []
+    print(f"{'Módulo':<12} {'Import (s)':>10}  Pesadas importadas")
+    for modulo, proibidas in IMPORTS_PROIBIDOS.items():
+        medicoes = [_importtime(modulo) for _ in range(int(repeticoes))]
+        melhor = min(t for t, _ in medicoes)
+        raizes = {nome.split('.')[0] for _, importados in medicoes for nome in importados}
+        indevidas = sorted(raizes & set(proibidas))
+        print(f"{modulo:<12} {melhor:>10.3f}  {', '.join(indevidas) or '-'}")
+
+        if indevidas:
+            falhas.append(f"{modulo} importa {', '.join(indevidas)} no topo")
+        if limite_s is not None and melhor > float(limite_s):
+            falhas.append(f"{modulo} leva {melhor:.2f} s para importar (limite {float(limite_s):.2f} s)")
+
+    if falhas:
+        print("\nREGRESSÃO:")
+        for falha in falhas:
+            print(f"  - {falha}")
+        sys.exit(1)
+    print("\nNenhum import pesado no topo.")
+
+
+if __name__ == "__main__":
+    BENCHMARKS = {'distribuicoes': bench_distribuicoes, 'inicializacao': bench_inicializacao}
+
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print(__doc__)
+        sys.exit(1)
+    BENCHMARKS[sys.argv[1]](*sys.argv[2:])
@@ -0,0 +1,112 @@
+import os
+import io
+import json
+import pickle
+import sqlite3
+import hashlib
+import contextlib
+from urllib.parse import quote
+
+# ==========================================
+# CACHE DOS RESULTADOS DAS ANÁLISES
+# ==========================================
+class CacheResultados:
+    """
+    Guarda tabelas intermediárias (pickle) e o texto dos relatórios em 'pasta', com nomes
+    '<nome>-<chave>.pkl' / '.txt'. A chave junta a impressão digital do banco com os
+    parâmetros da análise, então o cache só é invalidado quando entram gabaritos novos
+    (ou quando os parâmetros / VERSAO mudam). Só a versão mais recente de cada nome é mantida.
+    """
+    VERSAO = 1  # suba quando mudar o cálculo de algo que é guardado aqui
+
+    def __init__(self, pasta="cache_analises"):
+        self.pasta = pasta
+        os.makedirs(pasta, exist_ok=True)
+
+    # --- Chave ---
+    @staticmethod
+    def impressao_digital(db_path):
+        """
+        Hash da tabela resumo_cargos (uma linha por prova, mantida pelo robô a cada cargo gravado):
+        só muda quando os gabaritos mudam. Em bancos sem ela, mtime + tamanho do arquivo (e do -wal).
+        Banco inexistente ou ilegível também cai no mtime + tamanho (vazio): quem for ler o banco
+        é que reporta o erro.
+        """
+        try:
+            conn = sqlite3.connect(f"file:{quote(db_path)}?mode=ro", uri=True)
+            try:
+                tem_resumo = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'resumo_cargos'").fetchone()
+                if tem_resumo:
+                    sha = hashlib.sha256()
+                    for linha in conn.execute("SELECT * FROM resumo_cargos ORDER BY cargo_id"):
+                        sha.update(repr(linha).encode("utf-8"))
+                    return f"resumo:{sha.hexdigest()}"
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            pass
+
+        partes = []
+        for caminho in (db_path, f"{db_path}-wal"):
+            if os.path.exists(caminho):
+                estado = os.stat(caminho)
+                partes.append(f"{estado.st_mtime_ns}:{estado.st_size}")
+        return "arquivo:" + "|".join(partes)
+
+    def chave(self, db_path, **parametros):
+        dados = json.dumps({'banco': self.impressao_digital(db_path), 'versao': self.VERSAO, **parametros},
+                           sort_keys=True, default=str)
+        return hashlib.sha256(dados.encode("utf-8")).hexdigest()[:16]
+
+    # --- Tabelas ---
+    def obter_ou_calcular(self, nome, chave, calcular):
+        """
+        Objeto guardado para (nome, chave) ou o resultado de calcular(), que passa a ser guardado.
+        Resultados vazios (None ou DataFrame vazio) não são guardados: os carregadores devolvem
+        DataFrame vazio quando falham, e isso não pode ficar preso no cache até o banco mudar.
+        """
+        caminho = self._caminho(nome, chave, "pkl")
+        if os.path.exists(caminho):
+            with open(caminho, "rb") as f:
+                return pickle.load(f)
+        valor = calcular()
+        if valor is None or getattr(valor, "empty", False):
+            return valor
+        self._gravar(nome, caminho, pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL))
+        return valor
+
+    # --- Texto dos relatórios ---
+    def texto_ou_gerar(self, nome, chave, gerar):
+        """Imprime o texto guardado ou roda gerar() capturando (e repetindo) o que ele imprime."""
+        caminho = self._caminho(nome, chave, "txt")
+        if os.path.exists(caminho):
+            with open(caminho, encoding="utf-8") as f:
+                print(f.read(), end="")
+            return True
+
+        saida = io.StringIO()
+        with contextlib.redirect_stdout(saida):
+            gerar()
+        print(saida.getvalue(), end="")
+        self._gravar(nome, caminho, saida.getvalue().encode("utf-8"))
+        return False
+
+    # --- Internos ---
+    def _caminho(self, nome, chave, extensao):
+        return os.path.join(self.pasta, f"{nome}-{chave}.{extensao}")
+
+    def _gravar(self, nome, caminho, dados):
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, "wb") as f:
+            f.write(dados)
+        os.replace(temporario, caminho)
+
+        # Versões antigas do mesmo resultado não servem mais
+        for arquivo in os.listdir(self.pasta):
+            antigo = os.path.join(self.pasta, arquivo)
+            if arquivo.startswith(f"{nome}-") and antigo != caminho and not arquivo.endswith(".tmp"):
+                try:
+                    os.remove(antigo)
+                except FileNotFoundError:
+                    pass
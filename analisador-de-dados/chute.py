@@ -2,18 +2,17 @@ import sqlite3
 import pandas as pd
 import numpy as np
 import random
-from scipy import stats
 import time
 import warnings
-import matplotlib.pyplot as plt
-import seaborn as sns
-import matplotlib.ticker as mtick
 import os
 import math
+from concurrent.futures import ProcessPoolExecutor
+
+from gabarito_store import GabaritoStore
+from figuras import backend_graficos, curva_kde, finalizar_figura, nome_arquivo
 
 # Configurações
 warnings.filterwarnings("ignore")
-sns.set_theme(style="whitegrid")
 
 # ==========================================
 # 1. LÓGICA DE NEGÓCIO (REGRA DE CHUTE)
@@ -32,14 +31,106 @@ class EstrategiaChute:
         gabarito_final = [x if x is not None else letra_escolhida for x in gabarito_parcial]
         return gabarito_final, letra_escolhida
 
+class MotorVetorizado:
+    """
+    Versão em lote da simulação: o gabarito vira um array de inteiros (0..n_opcoes-1)
+    e as n_simulacoes de um cenário (prova, conhecimento, erro) rodam de uma vez
+    como uma matriz (n_simulacoes x n_questoes).
+    """
+    def __init__(self, gabarito_real, opcoes, grupo):
+        self.opcoes = list(opcoes)
+        self.grupo = grupo
+        self.n_opcoes = len(self.opcoes)
+        # Letras fora das opções (ex.: 'A' numa prova C/E) viram n_opcoes: nunca são chutadas
+        mapa = {op: i for i, op in enumerate(self.opcoes)}
+        self.gabarito = np.array([mapa.get(x, self.n_opcoes) for x in gabarito_real], dtype=np.int64)
+        self.total = len(self.gabarito)
+
+    def simular(self, conhecimento, erro, n_simulacoes, rng=None):
+        """Retorna (eficiencias, ganhos_pct), um valor por simulação."""
+        rng = rng if rng is not None else np.random.default_rng()
+        total, n_op, gab = self.total, self.n_opcoes, self.gabarito
+        n_tentativas = int(total * conhecimento)
+        n_erros = int(n_tentativas * erro)
+        n_chutes = total - n_tentativas
+
+        if n_chutes == 0:
+            zeros = np.zeros(n_simulacoes)
+            return zeros, zeros.copy()
+
+        # Ordem aleatória por linha: as n_tentativas primeiras são as que o candidato sabe,
+        # e as n_erros primeiras dessas são as que ele erra (amostras sem reposição)
+        ordem = rng.random((n_simulacoes, total)).argsort(axis=1)
+        posto = np.empty_like(ordem)
+        np.put_along_axis(posto, ordem, np.arange(total), axis=1)
+        mask_tentativa = posto < n_tentativas
+        mask_erro = posto < n_erros
+
+        if n_tentativas == 0:
+            # Folha em branco: cada questão recebe uma letra aleatória independente
+            letras = rng.integers(0, n_op, size=(n_simulacoes, total))
+            acertos_chute = (letras == gab).sum(axis=1)
+        else:
+            # Erro: soma um deslocamento 1..n_op-1 (uniforme entre as letras erradas)
+            folha = np.broadcast_to(gab, (n_simulacoes, total))
+            fora = gab == n_op
+            desvio = np.where(fora, rng.integers(0, n_op, size=folha.shape), (folha + rng.integers(1, n_op, size=folha.shape)) % n_op)
+            folha = np.where(mask_erro, desvio, folha)
+
+            # Contagem por linha via bincount com deslocamento (linha * (n_op + 1) + letra);
+            # a coluna extra acumula as letras fora das opções e é descartada
+            largura = n_op + 1
+            linhas = np.broadcast_to(np.arange(n_simulacoes)[:, None], folha.shape)
+            chaves = (linhas * largura + folha)[mask_tentativa]
+            contagem = np.bincount(chaves, minlength=n_simulacoes * largura).reshape(n_simulacoes, largura)[:, :n_op]
+
+            # Menos marcada com desempate aleatório uniforme (ruído < 1 não altera a ordem)
+            letra = (contagem + rng.random(contagem.shape)).argmin(axis=1)
+            acertos_chute = ((gab == letra[:, None]) & ~mask_tentativa).sum(axis=1)
+
+        eficiencias = acertos_chute / n_chutes
+        if self.grupo == "CERTO_ERRADO":
+            ganhos = (2 * acertos_chute - n_chutes) / n_chutes
+        else:
+            ganhos = eficiencias.copy()
+        return eficiencias, ganhos
+
+class EstatisticaWelford:
+    """Média e variância acumuladas (Welford, com junção de lotes de Chan et al.)."""
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+
+    def adicionar_lote(self, valores):
+        n_b = len(valores)
+        if n_b == 0: return
+        media_b = float(np.mean(valores))
+        m2_b = float(np.sum((valores - media_b) ** 2))
+        delta = media_b - self.media
+        total = self.n + n_b
+        self.media += delta * n_b / total
+        self.m2 += m2_b + delta ** 2 * self.n * n_b / total
+        self.n = total
+
+    def meia_largura_ic(self, z=1.96):
+        if self.n < 2: return math.inf
+        return z * math.sqrt(self.m2 / (self.n - 1) / self.n)
+
 # ==========================================
 # 2. GERADOR DE DADOS (ETL & BASE)
 # ==========================================
 class GeradorDeDados:
-    def __init__(self, db_path):
+    def __init__(self, db_path, cache_path=None, parquet_path=None):
         self.db_path = db_path
+        self.cache_path = cache_path
+        self.parquet_path = parquet_path
         self.conn = sqlite3.connect(db_path)
 
+    def _carregar_store(self):
+        # Uma consulta só para todos os gabaritos (ou o cache .npz, se estiver em dia)
+        return GabaritoStore.carregar_ou_criar(self.db_path, self.cache_path, self.parquet_path)
+
     def _obter_todas_provas(self):
         query = "SELECT DISTINCT c.nome, cg.nome_cargo, cg.id, cg.tipo_prova FROM cargos cg JOIN concursos c ON cg.concurso_id = c.id"
         return pd.read_sql_query(query, self.conn)
@@ -84,75 +175,149 @@ class GeradorDeDados:
             else: erros += 1
         return (acertos - erros) if tipo_grupo == "CERTO_ERRADO" else acertos
 
-    def gerar_dataset_completo(self, lista_conhecimento, lista_erro, n_simulacoes=1000):
-        df_provas = self._obter_todas_provas()
-        resultados = []
-        total_provas = len(df_provas)
-        print(f"=== INICIANDO SIMULAÇÃO MASSIVA (COMPLETA) ===")
-        print(f"Provas: {total_provas} | Simulações/Cenário: {n_simulacoes}")
-
-        for idx, row in df_provas.iterrows():
-            gabarito_real = self._carregar_gabarito(row['id'])
-            if not gabarito_real: continue
-            opcoes, grupo = self._determinar_opcoes(row['tipo_prova'], gabarito_real)
+    def _simular_cenario_legado(self, gabarito_real, opcoes, grupo, k, e, n_simulacoes):
+        lista_eficiencias = [] 
+        lista_ganho_pct = []
+        
+        for _ in range(n_simulacoes):
+            parcial, acertos_ini, erros_ini = self._gerar_cenario(gabarito_real, opcoes, k, e)
+            indices_chute = [i for i, x in enumerate(parcial) if x is None]
+            
+            nota_base = self._calcular_nota_base(acertos_ini, erros_ini, grupo)
             
-            for k in lista_conhecimento:
-                for e in lista_erro:
-                    lista_eficiencias = [] 
-                    lista_ganho_pct = []
-                    acima_50 = 0
-                    
-                    for _ in range(n_simulacoes):
-                        parcial, acertos_ini, erros_ini = self._gerar_cenario(gabarito_real, opcoes, k, e)
-                        indices_chute = [i for i, x in enumerate(parcial) if x is None]
-                        
-                        nota_base = self._calcular_nota_base(acertos_ini, erros_ini, grupo)
-                        
-                        final, _ = EstrategiaChute.menos_marcada(parcial, opcoes)
-                        nota_tec = self._calcular_nota(final, gabarito_real, grupo)
-                        
-                        # Cálculo de Eficiência (Acertos / Chutes)
-                        if indices_chute:
-                            acertos_chute = sum(1 for i in indices_chute if final[i] == gabarito_real[i])
-                            eficiencia = acertos_chute / len(indices_chute)
-                            
-                            # Cálculo de Ganho Percentual (Pontos Extras / Chutes)
-                            # C/E: (Acertos - Erros) / Chutes
-                            erros_chute = len(indices_chute) - acertos_chute
-                            saldo_chute = (acertos_chute - erros_chute) if grupo == "CERTO_ERRADO" else acertos_chute
-                            ganho_p = saldo_chute / len(indices_chute)
-                        else:
-                            eficiencia = 0.0
-                            ganho_p = 0.0
-                        
-                        lista_eficiencias.append(eficiencia)
-                        lista_ganho_pct.append(ganho_p)
-                        if eficiencia >= 0.50: acima_50 += 1
-
-                    # Estatísticas REAIS da Amostra
-                    arr_efi = np.array(lista_eficiencias)
-                    arr_ganho = np.array(lista_ganho_pct)
-                    
-                    resultados.append({
-                        'Grupo': grupo,
-                        'Conhecimento': k,
-                        'Erro': e,
-                        # Métricas de Eficiência (% Acerto)
-                        'Eficiencia_Media': np.mean(arr_efi),
-                        'Eficiencia_Mediana': np.median(arr_efi),
-                        'Eficiencia_Min': np.min(arr_efi),
-                        'Eficiencia_Max': np.max(arr_efi),
-                        'Eficiencia_Q1': np.percentile(arr_efi, 25),
-                        'Eficiencia_Q3': np.percentile(arr_efi, 75),
-                        # Métricas de Ganho Relativo (% Pontos/Chute)
-                        'GanhoPct_Media': np.mean(arr_ganho),
-                        'Prob_Acima_50': acima_50 / n_simulacoes
-                    })
+            final, _ = EstrategiaChute.menos_marcada(parcial, opcoes)
+            nota_tec = self._calcular_nota(final, gabarito_real, grupo)
             
-            if (idx + 1) % 10 == 0: print(f"   Processado {idx + 1}/{total_provas}...")
+            # Cálculo de Eficiência (Acertos / Chutes)
+            if indices_chute:
+                acertos_chute = sum(1 for i in indices_chute if final[i] == gabarito_real[i])
+                eficiencia = acertos_chute / len(indices_chute)
+                
+                # Cálculo de Ganho Percentual (Pontos Extras / Chutes)
+                # C/E: (Acertos - Erros) / Chutes
+                erros_chute = len(indices_chute) - acertos_chute
+                saldo_chute = (acertos_chute - erros_chute) if grupo == "CERTO_ERRADO" else acertos_chute
+                ganho_p = saldo_chute / len(indices_chute)
+            else:
+                eficiencia = 0.0
+                ganho_p = 0.0
+            
+            lista_eficiencias.append(eficiencia)
+            lista_ganho_pct.append(ganho_p)
+
+        return np.array(lista_eficiencias), np.array(lista_ganho_pct)
+
+    @staticmethod
+    def _resumir_cenario(grupo, k, e, arr_efi, arr_ganho):
+        # Estatísticas REAIS da Amostra
+        return {
+            'Grupo': grupo,
+            'Conhecimento': k,
+            'Erro': e,
+            # Métricas de Eficiência (% Acerto)
+            'Eficiencia_Media': np.mean(arr_efi),
+            'Eficiencia_Mediana': np.median(arr_efi),
+            'Eficiencia_Min': np.min(arr_efi),
+            'Eficiencia_Max': np.max(arr_efi),
+            'Eficiencia_Q1': np.percentile(arr_efi, 25),
+            'Eficiencia_Q3': np.percentile(arr_efi, 75),
+            # Métricas de Ganho Relativo (% Pontos/Chute)
+            'GanhoPct_Media': np.mean(arr_ganho),
+            'Prob_Acima_50': np.mean(arr_efi >= 0.50),
+            # Tamanho da amostra e meia-largura do IC 95% das médias
+            'N_Simulacoes': len(arr_efi),
+            'Eficiencia_IC95': 1.96 * np.std(arr_efi, ddof=1) / np.sqrt(len(arr_efi)) if len(arr_efi) > 1 else np.nan,
+            'GanhoPct_IC95': 1.96 * np.std(arr_ganho, ddof=1) / np.sqrt(len(arr_ganho)) if len(arr_ganho) > 1 else np.nan
+        }
+
+    def gerar_dataset_completo(self, lista_conhecimento, lista_erro, n_simulacoes=1000, motor="vetorizado", n_workers=1, seed=None, tolerancia=None, lote=100):
+        """
+        motor="vetorizado": simula as n_simulacoes de cada cenário em lote (NumPy).
+        motor="legado": loop original em Python puro, simulação por simulação.
+
+        n_workers > 1 (ou None = todos os núcleos) distribui as provas num ProcessPoolExecutor.
+        Cada prova recebe um gerador próprio derivado de SeedSequence(seed).spawn, então o
+        resultado com a mesma seed é idêntico para qualquer número de workers.
+
+        tolerancia (modo adaptativo): simula em lotes de 'lote' e para o cenário quando a meia-largura
+        do IC 95% da Eficiência e do GanhoPct cai abaixo da tolerância; n_simulacoes vira o teto.
+        O n usado e os ICs saem nas colunas N_Simulacoes, Eficiencia_IC95 e GanhoPct_IC95.
+        """
+        if motor == "legado" and (n_workers != 1 or tolerancia is not None):
+            raise ValueError("O motor legado usa o estado global de random/np.random e só roda com n_workers=1, sem tolerância.")
+
+        store = self._carregar_store()
+        total_provas = len(store)
+        semente = np.random.SeedSequence(seed)
+        print(f"=== INICIANDO SIMULAÇÃO MASSIVA (COMPLETA) ===")
+        print(f"Provas: {total_provas} | Simulações/Cenário: {n_simulacoes} | Motor: {motor} | Workers: {n_workers or os.cpu_count()}")
+        if tolerancia is not None:
+            print(f"Modo adaptativo: lotes de {lote}, para com IC95 ±{tolerancia} (teto de {n_simulacoes})")
+        print(f"Seed: {semente.entropy}")
+
+        tarefas = [(store.gabarito(i), store.opcoes(i), store.grupo(i)) for i in range(total_provas)]
+
+        if motor == "legado":
+            resultados = []
+            for idx, (gabarito_real, opcoes, grupo) in enumerate(tarefas):
+                for k in lista_conhecimento:
+                    for e in lista_erro:
+                        arr_efi, arr_ganho = self._simular_cenario_legado(gabarito_real, opcoes, grupo, k, e, n_simulacoes)
+                        resultados.append(self._resumir_cenario(grupo, k, e, arr_efi, arr_ganho))
+                if (idx + 1) % 10 == 0: print(f"   Processado {idx + 1}/{len(tarefas)}...")
+            return pd.DataFrame(resultados)
+
+        # Uma seed filha por prova (e não por worker): o sorteio não depende da divisão do trabalho
+        tarefas = [(*t, lista_conhecimento, lista_erro, n_simulacoes, tolerancia, lote, filha) for t, filha in zip(tarefas, semente.spawn(len(tarefas)))]
+
+        if n_workers == 1:
+            blocos = map(_simular_prova_vetorizada, tarefas)
+            resultados = self._coletar_blocos(blocos, len(tarefas))
+        else:
+            workers = n_workers or os.cpu_count()
+            chunksize = max(1, len(tarefas) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                blocos = executor.map(_simular_prova_vetorizada, tarefas, chunksize=chunksize)
+                resultados = self._coletar_blocos(blocos, len(tarefas))
 
         return pd.DataFrame(resultados)
 
+    @staticmethod
+    def _coletar_blocos(blocos, total):
+        # executor.map devolve na ordem das tarefas, então a junção é sempre a mesma
+        resultados = []
+        for idx, bloco in enumerate(blocos):
+            resultados.extend(bloco)
+            if (idx + 1) % 10 == 0: print(f"   Processado {idx + 1}/{total}...")
+        return resultados
+
+def _simular_prova_vetorizada(tarefa):
+    """Unidade de trabalho do pool: todos os cenários (k, e) de uma prova, com gerador próprio."""
+    gabarito_real, opcoes, grupo, lista_conhecimento, lista_erro, n_simulacoes, tolerancia, lote, semente = tarefa
+    rng = np.random.default_rng(semente)
+    simulador = MotorVetorizado(gabarito_real, opcoes, grupo)
+    bloco = []
+    for k in lista_conhecimento:
+        for e in lista_erro:
+            if tolerancia is None:
+                arr_efi, arr_ganho = simulador.simular(k, e, n_simulacoes, rng)
+            else:
+                arr_efi, arr_ganho = _simular_adaptativo(simulador, k, e, n_simulacoes, tolerancia, lote, rng)
+            bloco.append(GeradorDeDados._resumir_cenario(grupo, k, e, arr_efi, arr_ganho))
+    return bloco
+
+def _simular_adaptativo(simulador, k, e, max_simulacoes, tolerancia, lote, rng):
+    """Roda lotes até os ICs de Eficiência e GanhoPct ficarem dentro da tolerância (ou bater o teto)."""
+    est_efi, est_ganho = EstatisticaWelford(), EstatisticaWelford()
+    lotes_efi, lotes_ganho = [], []
+    while est_efi.n < max_simulacoes:
+        efi, ganho = simulador.simular(k, e, min(lote, max_simulacoes - est_efi.n), rng)
+        est_efi.adicionar_lote(efi); est_ganho.adicionar_lote(ganho)
+        lotes_efi.append(efi); lotes_ganho.append(ganho)
+        if max(est_efi.meia_largura_ic(), est_ganho.meia_largura_ic()) <= tolerancia:
+            break
+    return np.concatenate(lotes_efi), np.concatenate(lotes_ganho)
+
 # ==========================================
 # 3. ANALISADOR (GRÁFICOS E TABELAS)
 # ==========================================
@@ -161,6 +326,7 @@ class AnalisadorEstatistico:
         self.df = pd.read_csv(csv_path)
 
     def _config_grafico(self, tit, xl, yl):
+        plt, _, mtick = backend_graficos()
         plt.title(tit, fontsize=14)
         plt.xlabel(xl)
         plt.ylabel(yl)
@@ -171,8 +337,11 @@ class AnalisadorEstatistico:
         plt.tight_layout()
 
     # --- 1. Gráfico de Linha: Eficiência Média (% Acerto) ---
-    def plotar_curvas_eficiencia_media(self):
+    # arquivo (todos os gráficos): prefixo sem extensão para salvar um arquivo por grupo em vez de abrir janelas
+    def plotar_curvas_eficiencia_media(self, arquivo=None):
+        plt, sns, mtick = backend_graficos()
         print("\n[GRÁFICOS] Gerando curvas de Eficiência Média (Linha)...")
+        gerados = []
         grupos = self.df['Grupo'].unique()
         for g in grupos:
             df_g = self.df[self.df['Grupo'] == g]
@@ -183,11 +352,14 @@ class AnalisadorEstatistico:
             base = 0.5 if g == 'CERTO_ERRADO' else (0.2 if '5' in g else 0.25)
             plt.axhline(base, color='blue', linestyle='--', label=f'Aleatório ({base:.0%})')
             self._config_grafico(f'Evolução da Eficiência do Chute - {g}', 'Nível de Conhecimento', 'Taxa Média de Acerto (%)')
-            plt.show()
+            gerados += finalizar_figura(nome_arquivo(arquivo, g))
+        return gerados
 
     # --- 2. Gráfico de Linha: Ganho Percentual (% Pontos) ---
-    def plotar_curvas_ganho_percentual(self):
+    def plotar_curvas_ganho_percentual(self, arquivo=None):
+        plt, sns, mtick = backend_graficos()
         print("\n[GRÁFICOS] Gerando curvas de Ganho Percentual (Linha)...")
+        gerados = []
         grupos = self.df['Grupo'].unique()
         for g in grupos:
             df_g = self.df[self.df['Grupo'] == g]
@@ -197,11 +369,14 @@ class AnalisadorEstatistico:
             
             plt.axhline(0, color='red', linestyle='--', label='Zero (Neutro)')
             self._config_grafico(f'Rendimento Líquido do Chute - {g}', 'Nível de Conhecimento', 'Ganho (% Pontos sobre Chutes)')
-            plt.show()
+            gerados += finalizar_figura(nome_arquivo(arquivo, g))
+        return gerados
 
     # --- 3. Gráfico de Dispersão: Correlação ---
-    def plotar_correlacao(self):
+    def plotar_correlacao(self, arquivo=None):
+        plt, sns, mtick = backend_graficos()
         print("\n[GRÁFICOS] Gerando Correlação (Scatter)...")
+        gerados = []
         grupos = self.df['Grupo'].unique()
         for g in grupos:
             df_g = self.df[self.df['Grupo'] == g]
@@ -209,17 +384,27 @@ class AnalisadorEstatistico:
             plt.figure(figsize=(10, 6))
             sns.regplot(data=df_g, x='Conhecimento', y='Eficiencia_Media', scatter_kws={'alpha':0.3}, line_kws={'color':'red'})
             self._config_grafico(f'Correlação: Conhecimento vs Eficiência - {g}', 'Conhecimento', 'Eficiência Média')
-            plt.show()
+            gerados += finalizar_figura(nome_arquivo(arquivo, g))
+        return gerados
 
     # --- 4. Gráfico de Sino: Distribuição da Eficiência ---
-    def plotar_distribuicao_sino_eficiencia(self, erro_alvo=0.10):
+    def plotar_distribuicao_sino_eficiencia(self, erro_alvo=0.10, arquivo=None):
+        plt, sns, mtick = backend_graficos()
         print(f"\n[GRÁFICOS] Gerando Curvas de Sino (Eficiência) para Erro {erro_alvo*100:.0f}%...")
+        gerados = []
         df_f = self.df[np.isclose(self.df['Erro'], erro_alvo)]
         for g in df_f['Grupo'].unique():
             df_g = df_f[df_f['Grupo'] == g]
             plt.figure(figsize=(12, 6))
             # Usa Eficiencia_Media de cada prova como ponto de dados
-            sns.histplot(data=df_g, x='Eficiencia_Media', hue='Conhecimento', kde=True, element="step", palette="viridis", stat="density", common_norm=False)
+            sns.histplot(data=df_g, x='Eficiencia_Media', hue='Conhecimento', element="step", palette="viridis", stat="density", common_norm=False)
+            # Curva de densidade de cada nível (em cache), na mesma cor que o seaborn dá ao hue numérico
+            niveis = sorted(df_g['Conhecimento'].unique())
+            cores = plt.get_cmap("viridis")(plt.Normalize(min(niveis), max(niveis))(niveis))
+            for nivel, cor in zip(niveis, cores):
+                curva = curva_kde(df_g.loc[df_g['Conhecimento'] == nivel, 'Eficiencia_Media'])
+                if curva is not None:
+                    plt.plot(*curva, color=cor)
             
             plt.title(f'Distribuição da Eficiência Média - {g} (Erro {erro_alvo:.0%})', fontsize=14)
             plt.xlabel('Taxa de Acerto no Chute (%)')
@@ -228,7 +413,8 @@ class AnalisadorEstatistico:
             base = 0.5 if g == 'CERTO_ERRADO' else (0.2 if '5' in g else 0.25)
             plt.axvline(base, color='red', linestyle='--', label=f'Aleatório ({base:.0%})')
             plt.legend()
-            plt.show()
+            gerados += finalizar_figura(nome_arquivo(arquivo, g))
+        return gerados
 
     # --- 5. Tabela Rica ---
     def imprimir_tabela_definitiva(self, erro_alvo=0.10):
@@ -276,11 +462,21 @@ if __name__ == "__main__":
     
     # ATENÇÃO: Deixe True na primeira vez para criar o CSV novo com as colunas Min/Max/Q
     RODAR_NOVA_SIMULACAO = True 
+    # None = usa todos os núcleos. A SEED fixa o resultado, qualquer que seja o nº de workers.
+    N_WORKERS = None
+    SEED = 2025
+    # Cache dos gabaritos (recriado sozinho quando o banco for mais novo)
+    CACHE_PATH = "gabaritos_cache.npz"
+    # Dataset Parquet de parquet_store.py, usado para recriar o cache (None = lê direto do SQLite)
+    PARQUET_PATH = "gabaritos_parquet"
+    # Meia-largura máxima do IC 95% por cenário. None = sempre 1000 simulações (o dataset publicado);
+    # um valor (ex.: 0.02) liga o modo adaptativo, que para cada cenário mais cedo
+    TOLERANCIA = None
     
     if RODAR_NOVA_SIMULACAO:
-        gerador = GeradorDeDados(DB_PATH)
-        # Roda 1000 simulações para cada cenário e salva as estatísticas detalhadas
-        df = gerador.gerar_dataset_completo([0.5, 0.6, 0.7, 0.8, 0.9], [0.05, 0.1, 0.2], 1000)
+        gerador = GeradorDeDados(DB_PATH, cache_path=CACHE_PATH, parquet_path=PARQUET_PATH)
+        # 1000 simulações por cenário (até 1000, com TOLERANCIA) e salva as estatísticas detalhadas
+        df = gerador.gerar_dataset_completo([0.5, 0.6, 0.7, 0.8, 0.9], [0.05, 0.1, 0.2], 1000, n_workers=N_WORKERS, seed=SEED, tolerancia=TOLERANCIA)
         df.to_csv(CSV_PATH, index=False)
         print(f"Dados salvos em {CSV_PATH}")
     
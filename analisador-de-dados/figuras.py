@@ -0,0 +1,111 @@
+import os
+import hashlib
+import numpy as np
+
+# ==========================================
+# BACKEND DE GRÁFICOS (IMPORTADO SÓ NA PRIMEIRA FIGURA)
+# ==========================================
+_backend = None
+
+
+def backend_graficos():
+    """
+    (pyplot, seaborn, ticker), importados na primeira chamada com o tema do projeto aplicado uma vez.
+    matplotlib + seaborn custam mais de um segundo de import: quem só imprime relatórios ou simula não paga.
+    """
+    global _backend
+    if _backend is None:
+        import matplotlib.pyplot as plt
+        import matplotlib.ticker as mtick
+        import seaborn as sns
+        sns.set_theme(style="whitegrid")
+        plt.rcParams['figure.figsize'] = (16, 7)
+        _backend = (plt, sns, mtick)
+    return _backend
+
+# ==========================================
+# SAÍDA DAS FIGURAS (JANELA OU ARQUIVO)
+# ==========================================
+FORMATOS = ("png", "svg")
+# Coleções com mais pontos que isto (scatter de milhares de provas) vão como imagem dentro do SVG:
+# o resultado é o mesmo na tela e o arquivo não vira um <path> por marcador
+LIMITE_VETORIAL = 2000
+
+
+def _rasterizar_colecoes_densas(figura):
+    for ax in figura.axes:
+        for colecao in ax.collections:
+            if len(colecao.get_offsets()) > LIMITE_VETORIAL:
+                colecao.set_rasterized(True)
+
+
+def finalizar_figura(arquivo=None, formatos=FORMATOS):
+    """
+    Sem 'arquivo': plt.show(), como sempre foi (uso interativo).
+    Com 'arquivo' (caminho sem extensão): salva a figura atual em cada formato, fecha e devolve os caminhos.
+    """
+    plt, _, _ = backend_graficos()
+    if arquivo is None:
+        plt.show()
+        return []
+    os.makedirs(os.path.dirname(arquivo) or ".", exist_ok=True)
+    caminhos = [f"{arquivo}.{formato}" for formato in formatos]
+    _rasterizar_colecoes_densas(plt.gcf())
+    for caminho in caminhos:
+        plt.savefig(caminho, dpi=110, bbox_inches="tight")
+    plt.close()
+    return caminhos
+
+
+def nome_arquivo(arquivo, sufixo):
+    """Um arquivo por figura quando a mesma função desenha várias ('<arquivo>_<sufixo>')."""
+    return None if arquivo is None else f"{arquivo}_{sufixo}"
+
+# ==========================================
+# CURVAS DE DENSIDADE (KDE) EM CACHE
+# ==========================================
+# Mesma curva do histplot(kde=True) do seaborn: gaussian_kde (Scott), 200 pontos entre o mínimo e o máximo.
+PONTOS_KDE = 200
+_pasta_kde = None
+_memoria_kde = {}
+
+
+def configurar_cache_kde(pasta):
+    """Guarda as curvas também em disco (.npy), para não recalcular entre execuções. None = só em memória."""
+    global _pasta_kde
+    _pasta_kde = pasta
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+
+
+def curva_kde(valores):
+    """(x, densidade) dos valores, ou None se não der para estimar (menos de 2 pontos ou variância zero)."""
+    valores = np.asarray(valores, dtype=np.float64)
+    valores = valores[np.isfinite(valores)]
+    if len(valores) < 2 or np.ptp(valores) == 0:
+        return None
+
+    chave = hashlib.sha256(valores.tobytes() + str(PONTOS_KDE).encode()).hexdigest()[:24]
+    if chave in _memoria_kde:
+        return _memoria_kde[chave]
+    caminho = os.path.join(_pasta_kde, f"{chave}.npy") if _pasta_kde else None
+    if caminho and os.path.exists(caminho):
+        curva = np.load(caminho)
+    else:
+        from scipy.stats import gaussian_kde
+        x = np.linspace(valores.min(), valores.max(), PONTOS_KDE)
+        curva = np.vstack([x, gaussian_kde(valores)(x)])
+        if caminho:
+            np.save(caminho, curva)
+    _memoria_kde[chave] = (curva[0], curva[1])
+    return _memoria_kde[chave]
+
+
+def histograma_com_kde(valores, cor, ax=None, **kwargs_hist):
+    """histplot(stat='density') + curva KDE do cache (no lugar de kde=True, que recalcula a cada figura)."""
+    _, sns, _ = backend_graficos()
+    ax = sns.histplot(valores, color=cor, stat="density", ax=ax, **kwargs_hist)
+    curva = curva_kde(valores)
+    if curva is not None:
+        ax.plot(*curva, color=cor)
+    return ax
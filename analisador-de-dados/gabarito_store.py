@@ -0,0 +1,158 @@
+import os
+import sqlite3
+import numpy as np
+
+from cache_resultados import CacheResultados
+from parquet_store import codigos_ascii, ler_tabela, parquet_disponivel, sincronizar
+
+# ==========================================
+# ARMAZENAMENTO COMPACTO DOS GABARITOS
+# ==========================================
+class GabaritoStore:
+    """
+    Todos os gabaritos num único buffer contíguo (estilo CSR):
+      respostas[offsets[i]:offsets[i+1]] = letras da prova i (uint8, código ASCII)
+    com arrays paralelos de cargo_id, grupo (índice em GRUPOS) e nome do concurso.
+    Carrega do SQLite com UMA consulta ordenada e pode ser salvo/lido em .npz ou numa
+    pasta de .npy (lida com memory-map).
+    """
+    GRUPOS = ("CERTO_ERRADO", "MULTIPLA_4", "MULTIPLA_5")
+    OPCOES = (['C', 'E'], ['A', 'B', 'C', 'D'], ['A', 'B', 'C', 'D', 'E'])
+    _CAMPOS = ("respostas", "offsets", "cargo_ids", "grupos", "nomes")
+
+    def __init__(self, respostas, offsets, cargo_ids, grupos, nomes):
+        self.respostas = respostas
+        self.offsets = offsets
+        self.cargo_ids = cargo_ids
+        self.grupos = grupos
+        self.nomes = nomes
+
+    # --- Construção ---
+    @classmethod
+    def do_banco(cls, db_path):
+        query = """
+        SELECT cg.id, c.nome, cg.tipo_prova, g.resposta
+        FROM gabaritos g
+        JOIN cargos cg ON g.cargo_id = cg.id
+        JOIN concursos c ON cg.concurso_id = c.id
+        WHERE g.resposta != 'X'
+        ORDER BY cg.id, g.numero_questao
+        """
+        conn = sqlite3.connect(db_path)
+        try:
+            linhas = conn.execute(query).fetchall()
+        finally:
+            conn.close()
+
+        if not linhas:
+            return cls._vazio()
+
+        ids, nomes, tipos, letras = zip(*linhas)
+        respostas = np.frombuffer(''.join(letras).encode('ascii', errors='replace'), dtype=np.uint8).copy()
+        return cls._montar(np.array(ids, dtype=np.int64), respostas,
+                           lambda inicios: [nomes[i] for i in inicios],
+                           lambda inicios: [tipos[i] for i in inicios])
+
+    @classmethod
+    def do_parquet(cls, pasta):
+        """Mesmo store a partir do dataset de parquet_store (só as 4 colunas necessárias, sem strings por linha)."""
+        tabela = ler_tabela(pasta, ["cargo_id", "concurso", "tipo_prova", "resposta"], ordenar=True)
+        if tabela.num_rows == 0:
+            return cls._vazio()
+
+        ids = tabela.column("cargo_id").to_numpy().astype(np.int64)
+        return cls._montar(ids, codigos_ascii(tabela.column("resposta")),
+                           lambda inicios: tabela.column("concurso").take(inicios).to_pylist(),
+                           lambda inicios: tabela.column("tipo_prova").take(inicios).to_pylist())
+
+    @classmethod
+    def _vazio(cls):
+        vazio = np.zeros(0, dtype=np.int64)
+        return cls(np.zeros(0, dtype=np.uint8), np.zeros(1, dtype=np.int64), vazio, np.zeros(0, dtype=np.uint8), np.array([], dtype=str))
+
+    @classmethod
+    def _montar(cls, ids, respostas, nomes_das_provas, tipos_das_provas):
+        """ids/respostas: uma posição por questão, já em ordem de prova. *_das_provas(inicios) -> um valor por prova."""
+        # Início de cada prova = onde o cargo_id muda
+        inicios = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        offsets = np.append(inicios, len(ids)).astype(np.int64)
+
+        # Mesma regra de _determinar_opcoes: C/E pelo tipo; múltipla com 'E' no gabarito = 5 opções
+        tem_e = np.add.reduceat((respostas == ord('E')).astype(np.int64), inicios) > 0
+        certo_errado = np.array([tipo == 'CERTO_ERRADO' for tipo in tipos_das_provas(inicios)])
+        grupos = np.where(certo_errado, 0, np.where(tem_e, 2, 1)).astype(np.uint8)
+
+        return cls(respostas, offsets, ids[inicios], grupos, np.array(nomes_das_provas(inicios)))
+
+    @classmethod
+    def carregar_ou_criar(cls, db_path, cache_path=None, parquet_path=None):
+        """
+        Usa o cache se ele foi gerado com a mesma impressão digital do banco; senão recria e salva.
+        (Não compara mtimes: em WAL o arquivo principal só muda no checkpoint.)
+        Com parquet_path (e pyarrow instalado), recria a partir do dataset Parquet, exportado antes se estiver velho.
+        """
+        # Tirada antes de ler: o que for gravado durante a carga deixa o cache velho na próxima vez
+        impressao = CacheResultados.impressao_digital(db_path)
+        if cache_path and os.path.exists(cache_path) and cls.impressao_salva(cache_path) == impressao:
+            return cls.carregar(cache_path)
+        if parquet_path and parquet_disponivel():
+            sincronizar(db_path, parquet_path)
+            store = cls.do_parquet(parquet_path)
+        else:
+            store = cls.do_banco(db_path)
+        if cache_path:
+            store.salvar(cache_path, impressao)
+        return store
+
+    # --- Persistência ---
+    def salvar(self, caminho, impressao=None):
+        """
+        '.npz' = arquivo único; qualquer outro caminho = pasta com um .npy por campo.
+        impressao: impressão digital do banco de origem, guardada junto (ver impressao_salva).
+        """
+        campos = {c: getattr(self, c) for c in self._CAMPOS}
+        if impressao is not None:
+            campos["impressao"] = np.array(impressao)
+        if caminho.endswith('.npz'):
+            np.savez(caminho, **campos)
+            return
+        os.makedirs(caminho, exist_ok=True)
+        for campo, valor in campos.items():
+            np.save(os.path.join(caminho, f"{campo}.npy"), valor)
+
+    @staticmethod
+    def impressao_salva(caminho):
+        """Impressão digital do banco guardada por salvar (None em caches antigos, que então são recriados)."""
+        if caminho.endswith('.npz'):
+            with np.load(caminho) as dados:
+                return str(dados["impressao"]) if "impressao" in dados.files else None
+        arquivo = os.path.join(caminho, "impressao.npy")
+        return str(np.load(arquivo)) if os.path.exists(arquivo) else None
+
+    @classmethod
+    def carregar(cls, caminho):
+        if caminho.endswith('.npz'):
+            with np.load(caminho) as dados:
+                return cls(*(dados[c] for c in cls._CAMPOS))
+        return cls(*(np.load(os.path.join(caminho, f"{c}.npy"), mmap_mode='r') for c in cls._CAMPOS))
+
+    # --- Acesso ---
+    def __len__(self):
+        return len(self.cargo_ids)
+
+    def codigos(self, i):
+        """Letras da prova i como view uint8 (sem cópia)."""
+        return self.respostas[self.offsets[i]:self.offsets[i + 1]]
+
+    def gabarito(self, i):
+        """Gabarito como str ('CEEC...'): indexável e iterável como a lista antiga, bem mais leve."""
+        return self.codigos(i).tobytes().decode('ascii')
+
+    def grupo(self, i):
+        return self.GRUPOS[self.grupos[i]]
+
+    def opcoes(self, i):
+        return list(self.OPCOES[self.grupos[i]])
+
+    def nome(self, i):
+        return str(self.nomes[i])
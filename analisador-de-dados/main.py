@@ -1,20 +1,27 @@
 import sqlite3
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.ticker as mtick
-import seaborn as sns
 import numpy as np
 import warnings
-from statsmodels.stats.proportion import proportions_ztest
-from scipy.stats import chisquare
-from scipy.stats import ttest_1samp
+from parquet_store import ler_dataframe, parquet_disponivel, sincronizar
+from cache_resultados import CacheResultados
+from figuras import backend_graficos, finalizar_figura, histograma_com_kde, nome_arquivo
 
-# Configurações visuais
-sns.set_theme(style="whitegrid")
-plt.rcParams['figure.figsize'] = (16, 7)
+# statsmodels/scipy (testes) e matplotlib/seaborn (gráficos, via backend_graficos) são importados
+# dentro das funções que os usam: só carregar as contagens não paga alguns segundos de import
 warnings.filterwarnings("ignore")
 
-def carregar_dados(db_path):
+def carregar_dados(db_path, parquet_path=None, tipos_prova=None):
+    """
+    Uma linha por resposta (concurso, cargo, tipo_prova, resposta).
+    Com parquet_path (e pyarrow instalado) lê só essas 4 colunas do dataset Parquet, já categóricas,
+    exportando antes se o banco for mais novo; tipos_prova filtra pela partição.
+    """
+    if parquet_path and parquet_disponivel():
+        try:
+            sincronizar(db_path, parquet_path)
+            return ler_dataframe(parquet_path, ['concurso', 'cargo', 'tipo_prova', 'resposta'], tipos_prova)
+        except Exception as e:
+            print(f"Erro ao ler o Parquet ({e}); lendo do SQLite.")
     try:
         conn = sqlite3.connect(db_path)
         query = """
@@ -30,39 +37,131 @@ def carregar_dados(db_path):
         """
         df = pd.read_sql_query(query, conn)
         conn.close()
+        if tipos_prova:
+            df = df[df['tipo_prova'].isin(tipos_prova)]
         return df
     except Exception as e:
         print(f"Erro ao conectar no banco: {e}")
         return pd.DataFrame()
 
+_CHAVES_PROVA = ['concurso', 'cargo', 'tipo_prova', 'qtd_alternativas']
+
+def carregar_contagens(db_path):
+    """
+    Modo agregado: a contagem de cada letra por prova já sai pronta do SQLite, no mesmo formato de
+    calcular_contagens_absolutas (memória O(provas x letras) em vez de uma linha por resposta).
+    Usa a view vw_resumo_provas (resumo mantido pelo robô a cada cargo gravado); em bancos sem ela,
+    agrupa gabaritos por (cargo_id, resposta), que o índice idx_gabaritos_cargo_resposta entrega em ordem.
+    """
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            tem_resumo = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = 'vw_resumo_provas'").fetchone()
+            if tem_resumo:
+                df = pd.read_sql_query(
+                    "SELECT concurso, cargo, tipo_prova, qtd_alternativas, A, B, C, D, E FROM vw_resumo_provas", conn)
+                letras = [l for l in 'ABCDE' if df[l].any()]
+                return _tabela_de_contagens(df[_CHAVES_PROVA + letras])
+
+            query = """
+            SELECT 
+                c.nome AS concurso,
+                cg.nome_cargo AS cargo,
+                cg.tipo_prova,
+                g.resposta,
+                COUNT(*) AS qtd
+            FROM gabaritos g
+            JOIN cargos cg ON g.cargo_id = cg.id
+            JOIN concursos c ON cg.concurso_id = c.id
+            WHERE g.resposta != 'X'
+            GROUP BY g.cargo_id, g.resposta
+            """
+            longo = pd.read_sql_query(query, conn)
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"Erro ao conectar no banco: {e}")
+        return pd.DataFrame()
+
+    if longo.empty:
+        return pd.DataFrame()
+    df = longo.pivot_table(index=['concurso', 'cargo', 'tipo_prova'], columns='resposta', values='qtd',
+                           aggfunc='sum', fill_value=0).reset_index()
+    # Mesma regra de classificar_alternativas, agora por prova
+    multipla = df['tipo_prova'] == 'MULTIPLA_ESCOLHA'
+    tem_e = df['E'] > 0 if 'E' in df.columns else False
+    df.insert(3, 'qtd_alternativas', np.where(multipla, np.where(tem_e, 5, 4), 0))
+    return _tabela_de_contagens(df)
+
+def _tabela_de_contagens(df):
+    """Ordem (concurso, cargo), letras como inteiros e colunas nomeadas 'resposta', como calcular_contagens_absolutas."""
+    df = df.sort_values(['concurso', 'cargo']).reset_index(drop=True)
+    df['qtd_alternativas'] = df['qtd_alternativas'].astype(np.int64)
+    letras = colunas_de_letras(df)
+    df[letras] = df[letras].astype(np.int64)
+    df.columns = pd.Index(list(df.columns), name='resposta')
+    return df
+
+def colunas_de_letras(df_counts):
+    return [c for c in df_counts.columns if c not in _CHAVES_PROVA]
+
+def categorizar(df):
+    """Colunas de texto como categóricas (o SQLite devolve strings; o Parquet já vem assim)."""
+    for coluna in ('concurso', 'cargo', 'tipo_prova', 'resposta'):
+        if coluna in df.columns and not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype('category')
+    return df
+
 def classificar_alternativas(df):
-    df_me = df[df['tipo_prova'] == 'MULTIPLA_ESCOLHA'].copy()
-    if df_me.empty:
-        df['qtd_alternativas'] = 0
+    """
+    Acrescenta 'prova' (chave inteira por concurso+cargo, na ordem alfabética) e 'qtd_alternativas':
+    0 = certo/errado; múltipla escolha com alguma resposta 'E' = 5; senão 4.
+    """
+    categorizar(df)
+    if df.empty:
+        df['prova'] = np.zeros(0, dtype=np.int32)
+        df['qtd_alternativas'] = np.zeros(0, dtype=np.int8)
         return df
 
-    provas_com_e = df_me[df_me['resposta'] == 'E'][['concurso', 'cargo']].drop_duplicates()
-    provas_com_e['chave'] = provas_com_e['concurso'] + "_" + provas_com_e['cargo']
-    chaves_5_itens = set(provas_com_e['chave'])
-    
-    def verificar_qtd(row):
-        if row['tipo_prova'] != 'MULTIPLA_ESCOLHA': return 0
-        chave = row['concurso'] + "_" + row['cargo']
-        return 5 if chave in chaves_5_itens else 4
-
-    df['qtd_alternativas'] = df.apply(verificar_qtd, axis=1)
+    prova = df.groupby(['concurso', 'cargo'], observed=True, sort=True).ngroup().to_numpy(np.int32)
+    multipla = (df['tipo_prova'] == 'MULTIPLA_ESCOLHA').to_numpy()
+    # "Alguma resposta E na prova" por prova e devolvido para cada linha (groupby-transform em numpy)
+    tem_e = np.bincount(prova, weights=multipla & (df['resposta'] == 'E').to_numpy()) > 0
+    df['prova'] = prova
+    df['qtd_alternativas'] = np.where(multipla, np.where(tem_e[prova], 5, 4), 0).astype(np.int8)
     return df
 
+def calcular_contagens_absolutas(df):
+    """
+    Calcula a QUANTIDADE REAL (número inteiro) de cada letra por prova.
+    Uma passada só (bincount de prova x letra); as porcentagens saem daqui (percentuais_por_prova).
+    """
+    if 'prova' not in df.columns:
+        classificar_alternativas(df)
+    letras = df['resposta'].cat.categories
+    n_provas, n_letras = (int(df['prova'].max()) + 1 if len(df) else 0), len(letras)
+
+    indice = df['prova'].to_numpy(np.int64) * n_letras + df['resposta'].cat.codes.to_numpy(np.int64)
+    matriz = np.bincount(indice, minlength=n_provas * n_letras).reshape(n_provas, n_letras)
+
+    provas = df.drop_duplicates('prova').sort_values('prova')[_CHAVES_PROVA].reset_index(drop=True)
+    provas['qtd_alternativas'] = provas['qtd_alternativas'].astype(np.int64)
+    contagens = pd.DataFrame(matriz, columns=pd.Index(letras.astype(str), name='resposta'))
+    contagem = pd.concat([provas, contagens], axis=1)
+    contagem.columns.name = 'resposta'
+    return contagem
+
+def percentuais_por_prova(df_counts):
+    """Converte a tabela de contagens em PORCENTAGEM de cada letra por prova."""
+    letras = colunas_de_letras(df_counts)
+    df_dist = df_counts.copy()
+    df_dist[letras] = df_counts[letras].div(df_counts[letras].sum(axis=1), axis=0) * 100
+    return df_dist
+
 def calcular_distribuicoes(df):
     """Calcula a PORCENTAGEM de cada letra por prova"""
-    contagem = df.groupby(['concurso', 'cargo', 'tipo_prova', 'qtd_alternativas'])['resposta'].value_counts(normalize=True).unstack(fill_value=0)
-    contagem = contagem * 100
-    return contagem.reset_index()
-
-def calcular_contagens_absolutas(df):
-    """Calcula a QUANTIDADE REAL (número inteiro) de cada letra por prova"""
-    contagem = df.groupby(['concurso', 'cargo', 'tipo_prova', 'qtd_alternativas'])['resposta'].value_counts(normalize=False).unstack(fill_value=0)
-    return contagem.reset_index()
+    return percentuais_por_prova(calcular_contagens_absolutas(df))
 
 def analisar_estatisticas(series_pct, series_qtd, nome_analise, equilibrio_teorico):
     if series_pct.empty: return 0
@@ -82,9 +181,11 @@ def analisar_estatisticas(series_pct, series_qtd, nome_analise, equilibrio_teori
     
     return media
 
-def plotar_certo_errado(df_ce_pct, df_ce_qtd):
+def plotar_certo_errado(df_ce_pct, df_ce_qtd, arquivo=None):
+    """arquivo: caminho sem extensão para salvar (modo em lote) em vez de abrir a janela."""
     colunas_disponiveis = [col for col in ['C', 'E'] if col in df_ce_pct.columns]
-    if not colunas_disponiveis: return
+    if not colunas_disponiveis: return []
+    plt, _, mtick = backend_graficos()
 
     fig, axes = plt.subplots(1, 2, figsize=(16, 6), sharey=True)
     if len(colunas_disponiveis) == 1: axes = [axes]
@@ -104,7 +205,7 @@ def plotar_certo_errado(df_ce_pct, df_ce_qtd):
         config = configs[letra]
         
         # Histograma
-        sns.histplot(dados_pct, kde=True, bins=20, color=config['cor'], stat="density", ax=ax)
+        histograma_com_kde(dados_pct, config['cor'], ax=ax, bins=20)
         
         media = analisar_estatisticas(dados_pct, dados_qtd, f"Gabarito {letra}", 50)
         
@@ -124,9 +225,9 @@ def plotar_certo_errado(df_ce_pct, df_ce_qtd):
 
     plt.suptitle('Balanceamento Cebraspe: CERTO vs ERRADO', fontsize=16)
     plt.tight_layout()
-    plt.show()
+    return finalizar_figura(arquivo)
 
-def plotar_multipla_escolha(df_me_pct, df_me_qtd, n_alternativas):
+def plotar_multipla_escolha(df_me_pct, df_me_qtd, n_alternativas, arquivo=None):
     if n_alternativas == 5:
         letras = ['A', 'B', 'C', 'D', 'E']
         equilibrio = 20.0
@@ -139,7 +240,8 @@ def plotar_multipla_escolha(df_me_pct, df_me_qtd, n_alternativas):
         limite_min, limite_max = 10, 40 
 
     letras_presentes = [l for l in letras if l in df_me_pct.columns]
-    if not letras_presentes: return
+    if not letras_presentes: return []
+    plt, sns, mtick = backend_graficos()
 
     fig, axes = plt.subplots(1, len(letras_presentes), figsize=(3 * len(letras_presentes), 6), sharey=True)
     if len(letras_presentes) == 1: axes = [axes]
@@ -151,7 +253,7 @@ def plotar_multipla_escolha(df_me_pct, df_me_qtd, n_alternativas):
         dados_pct = df_me_pct[letra]
         dados_qtd = df_me_qtd[letra] if letra in df_me_qtd.columns else pd.Series()
         
-        sns.histplot(dados_pct, kde=True, ax=ax, color=sns.color_palette("husl", 5)[i], stat="density")
+        histograma_com_kde(dados_pct, sns.color_palette("husl", 5)[i], ax=ax)
         media = analisar_estatisticas(dados_pct, dados_qtd, f"Letra {letra}", equilibrio)
         
         ax.axvline(media, color='black', linestyle='--', linewidth=1.5, label=f'Real: {media:.1f}%')
@@ -168,20 +270,37 @@ def plotar_multipla_escolha(df_me_pct, df_me_qtd, n_alternativas):
 
     plt.suptitle(f'Distribuição de Gabaritos - {titulo}', fontsize=16)
     plt.tight_layout()
-    plt.show()
-
-def executar_teste_z_balanceamento(df):
+    return finalizar_figura(arquivo)
+
+def _contagem_certo_errado(df_counts):
+    """(quantidade de 'C', total de questões) somando as provas Certo/Errado."""
+    df_ce = df_counts[df_counts['tipo_prova'] == 'CERTO_ERRADO']
+    n_sucessos = int(df_ce['C'].sum()) if 'C' in df_ce.columns else 0
+    n_total = int(df_ce[colunas_de_letras(df_ce)].to_numpy().sum())
+    return n_sucessos, n_total
+
+def _contagem_cinco_alternativas(df_counts):
+    """Total de cada letra nas provas de 5 alternativas (só as letras que aparecem, em ordem)."""
+    df_5 = df_counts[(df_counts['tipo_prova'] == 'MULTIPLA_ESCOLHA') & (df_counts['qtd_alternativas'] == 5)]
+    contagem = df_5[colunas_de_letras(df_5)].sum()
+    return contagem[contagem > 0].sort_index()
+
+def _percentual_a_por_prova(df_counts):
+    """% da letra A em cada prova de 5 alternativas (None se a letra A não aparece)."""
+    df_5 = df_counts[(df_counts['tipo_prova'] == 'MULTIPLA_ESCOLHA') & (df_counts['qtd_alternativas'] == 5)]
+    distribuicao = percentuais_por_prova(df_5)
+    if 'A' not in distribuicao.columns or not distribuicao['A'].any(): return None
+    return distribuicao['A']
+
+def executar_teste_z_balanceamento(df_counts):
     """
     Testa se a proporção de CERTO é estatisticamente igual a 50%.
     """
-    # Filtra apenas questões Certo/Errado
-    df_ce = df[df['tipo_prova'] == 'CERTO_ERRADO']
-    
-    # Contagem de sucessos (Certo) e total de observações (n)
-    n_sucessos = df_ce[df_ce['resposta'] == 'C'].shape[0]
-    n_total = df_ce.shape[0]
+    # Contagem de sucessos (Certo) e total de observações (n) nas provas Certo/Errado
+    n_sucessos, n_total = _contagem_certo_errado(df_counts)
     
     # Executa o teste bilateral (two-sided) comparando com 0.5
+    from statsmodels.stats.proportion import proportions_ztest
     stat, p_valor = proportions_ztest(count=n_sucessos, nobs=n_total, value=0.5)
     
     print(f"--- Teste 1: Z-Test para Proporção (Certo/Errado) ---")
@@ -194,21 +313,19 @@ def executar_teste_z_balanceamento(df):
     else:
         print(">> Conclusão: Aceita-se H0. O desvio é estatisticamente irrelevante.")
 
-def executar_teste_qui_quadrado(df):
+def executar_teste_qui_quadrado(df_counts):
     """
     Verifica se a distribuição das 5 alternativas foge do padrão uniforme (20% cada).
     """
-    # Filtra dados de 5 alternativas
-    df_5 = df[(df['tipo_prova'] == 'MULTIPLA_ESCOLHA') & (df['qtd_alternativas'] == 5)]
-    
-    # Contagem observada
-    contagem = df_5['resposta'].value_counts().sort_index()
+    # Contagem observada nas provas de 5 alternativas
+    contagem = _contagem_cinco_alternativas(df_counts)
     observado = contagem.values
     
     # Cálculo das esperadas (distribuição uniforme)
     total_questoes = observado.sum()
     esperado = [total_questoes / 5] * 5
     
+    from scipy.stats import chisquare
     stat, p_valor = chisquare(f_obs=observado, f_exp=esperado)
     
     print(f"\n--- Teste 2: Qui-Quadrado (Distribuição Global A-E) ---")
@@ -220,22 +337,17 @@ def executar_teste_qui_quadrado(df):
     else:
         print(">> Conclusão: A distribuição segue o padrão uniforme esperado.")
 
-def executar_teste_t_letra_a(df):
+def executar_teste_t_letra_a(df_counts):
     """
     Testa se a média da Letra A é significativamente menor que 20%.
     """
-    # 1. Prepara os dados: Calcula % de A para cada prova individualmente
-    df_5 = df[(df['tipo_prova'] == 'MULTIPLA_ESCOLHA') & (df['qtd_alternativas'] == 5)]
-    
-    # Agrupa por prova e calcula %
-    distribuicao_por_prova = df_5.groupby(['concurso', 'cargo'])['resposta'] \
-                                 .value_counts(normalize=True).unstack(fill_value=0) * 100
-    
-    # Pega apenas a coluna 'A'
-    amostra_a = distribuicao_por_prova['A']
+    # 1. Prepara os dados: % de A em cada prova individualmente
+    amostra_a = _percentual_a_por_prova(df_counts)
+    if amostra_a is None: return
     
     # 2. Executa o teste T (comparando com a média populacional 20)
     # alternative='less' verifica se é MENOR que 20
+    from scipy.stats import ttest_1samp
     stat, p_valor = ttest_1samp(amostra_a, popmean=20.0, alternative='less')
     
     print(f"\n--- Teste 3: Teste T (Viés Negativo da Letra A) ---")
@@ -252,13 +364,11 @@ def print_header(titulo):
     print(f"{titulo.center(70)}")
     print("="*70)
 
-def relatorio_z_test_detalhado(df):
+def relatorio_z_test_detalhado(df_counts):
     print_header("RELATÓRIO 1: TESTE Z (BALANCEAMENTO CERTO/ERRADO)")
     
     # 1. Preparação dos Dados
-    df_ce = df[df['tipo_prova'] == 'CERTO_ERRADO']
-    n_sucessos = df_ce[df_ce['resposta'] == 'C'].shape[0]
-    n_total = df_ce.shape[0]
+    n_sucessos, n_total = _contagem_certo_errado(df_counts)
     prop_real = n_sucessos / n_total
     prop_teorica = 0.5
     
@@ -272,6 +382,7 @@ def relatorio_z_test_detalhado(df):
     print(f"   Proporção Observada (p̂): {prop_real:.4f} ({prop_real*100:.2f}%)")
     
     # 2. Execução do Teste
+    from statsmodels.stats.proportion import proportions_ztest
     stat, p_valor = proportions_ztest(count=n_sucessos, nobs=n_total, value=prop_teorica)
     
     print("\nPASSO 3: CÁLCULO ESTATÍSTICO (TESTE Z)")
@@ -292,12 +403,11 @@ def relatorio_z_test_detalhado(df):
         print("   Conclusão: O desvio é estatisticamente irrelevante. Pode ser considerado aleatório.")
 
 
-def relatorio_chi2_detalhado(df):
+def relatorio_chi2_detalhado(df_counts):
     print_header("RELATÓRIO 2: QUI-QUADRADO (DISTRIBUIÇÃO A-E)")
     
     # 1. Preparação
-    df_5 = df[(df['tipo_prova'] == 'MULTIPLA_ESCOLHA') & (df['qtd_alternativas'] == 5)]
-    contagem = df_5['resposta'].value_counts().sort_index()
+    contagem = _contagem_cinco_alternativas(df_counts)
     observado = contagem.values
     letras = contagem.index.tolist()
     
@@ -326,6 +436,7 @@ def relatorio_chi2_detalhado(df):
         print(f"   {letras[i]:<5} | {observado[i]:<10} | {esperado[i]:<10.1f} | {diff:<+10.1f}")
 
     # 2. Execução
+    from scipy.stats import chisquare
     stat, p_valor = chisquare(f_obs=observado)
     
     print("\nPASSO 3: CÁLCULO ESTATÍSTICO (QUI-QUADRADO)")
@@ -343,15 +454,12 @@ def relatorio_chi2_detalhado(df):
         print("   Conclusão: As diferenças são pequenas o suficiente para serem sorte.")
 
 
-def relatorio_t_test_detalhado(df):
+def relatorio_t_test_detalhado(df_counts):
     print_header("RELATÓRIO 3: TESTE T (VIÉS DA LETRA A)")
     
     # 1. Preparação: Calcular % de A por prova
-    df_5 = df[(df['tipo_prova'] == 'MULTIPLA_ESCOLHA') & (df['qtd_alternativas'] == 5)]
-    distribuicao = df_5.groupby(['concurso', 'cargo'])['resposta'].value_counts(normalize=True).unstack(fill_value=0) * 100
-    
-    if 'A' not in distribuicao.columns: return
-    amostra_a = distribuicao['A']
+    amostra_a = _percentual_a_por_prova(df_counts)
+    if amostra_a is None: return
     
     media_obs = amostra_a.mean()
     media_teorica = 20.0
@@ -369,6 +477,7 @@ def relatorio_t_test_detalhado(df):
     print(f"   Diferença para o ideal: {media_obs - media_teorica:.2f}%")
     
     # 2. Execução
+    from scipy.stats import ttest_1samp
     stat, p_valor = ttest_1samp(amostra_a, popmean=media_teorica, alternative='less')
     
     print("\nPASSO 3: CÁLCULO ESTATÍSTICO (TESTE T)")
@@ -386,12 +495,14 @@ def relatorio_t_test_detalhado(df):
         print("   [OK] ACEITA-SE H0.")
         print("   Conclusão: A letra A aparece dentro da normalidade.")
 
-def plotar_boxplots_comparativos(df_dist):
+def plotar_boxplots_comparativos(df_dist, arquivo=None):
     """
     Gera Boxplots para comparar a distribuição de todas as letras lado a lado.
     Permite ver claramente qual letra tem a mediana maior ou menor.
     """
     print_header("GERANDO GRÁFICOS DE QUARTIS (BOXPLOTS)")
+    plt, sns, _ = backend_graficos()
+    gerados = []
 
     # 1. Boxplot para Certo/Errado
     df_ce = df_dist[df_dist['tipo_prova'] == 'CERTO_ERRADO']
@@ -409,7 +520,7 @@ def plotar_boxplots_comparativos(df_dist):
         plt.title('Boxplot: Distribuição de Itens Certo vs Errado', fontsize=14)
         plt.ylabel('Porcentagem na Prova')
         plt.legend()
-        plt.show()
+        gerados += finalizar_figura(nome_arquivo(arquivo, "certo_errado"))
 
     # 2. Boxplot para Múltipla Escolha (5 Alternativas)
     df_me5 = df_dist[(df_dist['tipo_prova'] == 'MULTIPLA_ESCOLHA') & (df_dist['qtd_alternativas'] == 5)]
@@ -427,7 +538,7 @@ def plotar_boxplots_comparativos(df_dist):
         plt.title('Boxplot: Comparativo de Alternativas (Provas de 5 Itens)', fontsize=14)
         plt.ylabel('Porcentagem na Prova')
         plt.legend()
-        plt.show()
+        gerados += finalizar_figura(nome_arquivo(arquivo, "multipla_5"))
 
     # 3. Boxplot para Múltipla Escolha (4 Alternativas)
     df_me4 = df_dist[(df_dist['tipo_prova'] == 'MULTIPLA_ESCOLHA') & (df_dist['qtd_alternativas'] == 4)]
@@ -444,24 +555,59 @@ def plotar_boxplots_comparativos(df_dist):
         plt.title('Boxplot: Comparativo de Alternativas (Provas de 4 Itens)', fontsize=14)
         plt.ylabel('Porcentagem na Prova')
         plt.legend()
-        plt.show()
+        gerados += finalizar_figura(nome_arquivo(arquivo, "multipla_4"))
+
+    return gerados
+
 
+def obter_contagens(db_path, parquet_path=None, modo_agregado=True, cache=None):
+    """
+    Contagens por prova + chave do cache (None sem cache).
+    modo_agregado=True conta dentro do SQLite; False carrega uma linha por resposta (SQLite ou Parquet) e conta aqui.
+    """
+    def calcular():
+        print(f"Lendo banco de dados em: {db_path}...")
+        if modo_agregado:
+            return carregar_contagens(db_path)
+        df_bruto = carregar_dados(db_path, parquet_path)
+        print("Classificando tipos de prova...")
+        return calcular_contagens_absolutas(classificar_alternativas(df_bruto)) if not df_bruto.empty else df_bruto
+
+    if cache is None:
+        return calcular(), None
+    chave = cache.chave(db_path, modo_agregado=modo_agregado)
+    return cache.obter_ou_calcular("contagens", chave, calcular), chave
+
+def imprimir_relatorios(df_counts, cache=None, chave=None):
+    """Os três testes de hipótese detalhados (texto repetido do cache quando o banco não mudou)."""
+    def relatorios():
+        relatorio_z_test_detalhado(df_counts)
+        relatorio_chi2_detalhado(df_counts)
+        relatorio_t_test_detalhado(df_counts)
+
+    if cache:
+        cache.texto_ou_gerar("relatorios", chave, relatorios)
+    else:
+        relatorios()
 
 if __name__ == "__main__":
     # AJUSTE O CAMINHO AQUI
     CAMINHO_DB = "../dada-scrapping/concursos_data.db"
+    # Dataset Parquet de parquet_store.py (exportado/atualizado sozinho). None = lê direto do SQLite
+    CAMINHO_PARQUET = "gabaritos_parquet"
+    # True = contagens por prova calculadas dentro do SQLite (só a tabela pequena vem para o pandas);
+    # False = carrega uma linha por resposta (SQLite ou Parquet) e conta aqui
+    MODO_AGREGADO = True
     
-    print(f"Lendo banco de dados em: {CAMINHO_DB}...")
-    df_bruto = carregar_dados(CAMINHO_DB)
+    # Resultados guardados por impressão digital do banco: sem gabaritos novos, nada é recalculado. None = desliga
+    CAMINHO_CACHE = "cache_analises"
+
+    cache = CacheResultados(CAMINHO_CACHE) if CAMINHO_CACHE else None
+    df_counts, chave = obter_contagens(CAMINHO_DB, CAMINHO_PARQUET, MODO_AGREGADO, cache)
     
-    if not df_bruto.empty:
-        print("Classificando tipos de prova...")
-        df_classificado = classificar_alternativas(df_bruto)
-        
-        # Calcula Percentagens
-        df_dist = calcular_distribuicoes(df_classificado)
-        # Calcula Quantidades Absolutas
-        df_counts = calcular_contagens_absolutas(df_classificado)
+    if not df_counts.empty:
+        # Percentagens a partir das Quantidades Absolutas
+        df_dist = percentuais_por_prova(df_counts)
         
         # Filtros de Percentagem
         df_ce = df_dist[df_dist['tipo_prova'] == 'CERTO_ERRADO']
@@ -475,9 +621,7 @@ if __name__ == "__main__":
         
 
         #Testes de hipótese
-        relatorio_z_test_detalhado(df_classificado)
-        relatorio_chi2_detalhado(df_classificado)
-        relatorio_t_test_detalhado(df_classificado)
+        imprimir_relatorios(df_counts, cache, chave)
 
         if not df_ce.empty: 
             plotar_certo_errado(df_ce, df_counts_ce)
@@ -0,0 +1,164 @@
+"""
+Exporta os gabaritos do SQLite para um dataset Parquet colunar, particionado por tipo_prova:
+
+    gabaritos_parquet/tipo_prova=CERTO_ERRADO/part-0.parquet
+    gabaritos_parquet/tipo_prova=MULTIPLA_ESCOLHA/part-0.parquet
+
+Texto repetido (concurso, cargo, resposta, materia) vai com dictionary encoding e volta para o
+pandas como categórico. Uso: python parquet_store.py [caminho_do_banco] [pasta_parquet]
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import numpy as np
+import pandas as pd
+
+from cache_resultados import CacheResultados
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:  # exportação/leitura em Parquet ficam indisponíveis; os analisadores usam o SQLite
+    pa = ds = None
+
+# ==========================================
+# EXPORTAÇÃO (SQLite -> Parquet)
+# ==========================================
+# Mesma ordem do GabaritoStore (prova a prova, questão a questão) e sem anuladas
+_QUERY = """
+SELECT c.nome, cg.nome_cargo, cg.id, cg.tipo_prova, g.numero_questao, g.resposta, g.materia
+FROM gabaritos g
+JOIN cargos cg ON g.cargo_id = cg.id
+JOIN concursos c ON cg.concurso_id = c.id
+WHERE g.resposta != 'X'
+ORDER BY cg.id, g.numero_questao
+"""
+_MARCADOR = "_exportado"  # criado por último (com a impressão digital do banco): sem ele a pasta está incompleta
+
+
+def _schema():
+    texto = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("concurso", texto),
+        ("cargo", texto),
+        ("cargo_id", pa.int32()),
+        ("tipo_prova", pa.string()),
+        ("numero_questao", pa.int16()),
+        ("resposta", pa.dictionary(pa.int8(), pa.string())),
+        ("materia", texto),
+    ])
+
+
+def _lotes(conn, schema, linhas_por_lote):
+    cursor = conn.execute(_QUERY)
+    while True:
+        linhas = cursor.fetchmany(linhas_por_lote)
+        if not linhas: return
+        colunas = zip(*linhas)
+        yield pa.record_batch([pa.array(valores).cast(campo.type) for valores, campo in zip(colunas, schema)],
+                              schema=schema)
+
+
+def exportar_parquet(db_path, pasta, linhas_por_lote=500_000):
+    """Reescreve o dataset inteiro numa pasta temporária e troca no fim (leitores nunca veem meia exportação)."""
+    if pa is None:
+        raise ImportError("Exportar para Parquet requer o pyarrow (pip install pyarrow)")
+
+    # Tirada ANTES de ler: o que for gravado durante a exportação deixa o dataset velho na próxima checagem
+    impressao = CacheResultados.impressao_digital(db_path)
+    schema = _schema()
+    temporaria = f"{pasta}.tmp"
+    shutil.rmtree(temporaria, ignore_errors=True)
+    # O write_dataset consome os lotes numa thread própria
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    try:
+        ds.write_dataset(
+            _lotes(conn, schema, linhas_por_lote), temporaria, schema=schema, format="parquet",
+            partitioning=ds.partitioning(pa.schema([("tipo_prova", pa.string())]), flavor="hive"),
+            existing_data_behavior="overwrite_or_ignore",
+            file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+        )
+    finally:
+        conn.close()
+
+    with open(os.path.join(temporaria, _MARCADOR), "w", encoding="utf-8") as f:
+        f.write(impressao)
+    shutil.rmtree(pasta, ignore_errors=True)
+    os.replace(temporaria, pasta)
+    return pasta
+
+
+def parquet_disponivel():
+    return pa is not None
+
+
+def parquet_em_dia(db_path, pasta):
+    """Compara impressões digitais (não mtimes: em WAL o arquivo principal só muda no checkpoint)."""
+    marcador = os.path.join(pasta, _MARCADOR)
+    if not os.path.exists(marcador):
+        return False
+    with open(marcador, encoding="utf-8") as f:
+        return f.read() == CacheResultados.impressao_digital(db_path)
+
+
+def sincronizar(db_path, pasta):
+    """Exporta só se o banco mudou desde a última exportação. Retorna True se exportou."""
+    if parquet_em_dia(db_path, pasta):
+        return False
+    exportar_parquet(db_path, pasta)
+    return True
+
+# ==========================================
+# LEITURA (projeção de colunas + filtro empurrado para o Parquet)
+# ==========================================
+def ler_tabela(pasta, colunas=None, tipos_prova=None, ordenar=False):
+    """
+    pyarrow.Table só com 'colunas'. tipos_prova filtra pela partição, então as pastas dos
+    outros tipos nem são abertas. ordenar=True devolve na ordem (cargo_id, numero_questao).
+    """
+    dataset = ds.dataset(pasta, format="parquet", partitioning=ds.HivePartitioning.discover(infer_dictionary=True),
+                         exclude_invalid_files=True)
+    filtro = ds.field("tipo_prova").isin(list(tipos_prova)) if tipos_prova else None
+    leitura = list(colunas) if colunas else None
+    if ordenar and leitura is not None:
+        leitura += [c for c in ("cargo_id", "numero_questao") if c not in leitura]
+
+    tabela = dataset.to_table(columns=leitura, filter=filtro)
+    if ordenar:
+        tabela = tabela.sort_by([("cargo_id", "ascending"), ("numero_questao", "ascending")])
+        if colunas:
+            tabela = tabela.select(list(colunas))
+    return tabela
+
+
+def ler_dataframe(pasta, colunas=None, tipos_prova=None):
+    """DataFrame com as colunas de texto como categóricas (categorias em ordem alfabética)."""
+    df = ler_tabela(pasta, colunas, tipos_prova).to_pandas()
+    for coluna in df.columns:
+        if isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].cat.remove_unused_categories()
+            df[coluna] = df[coluna].cat.reorder_categories(sorted(df[coluna].cat.categories))
+    return df
+
+
+def codigos_ascii(coluna):
+    """Coluna dicionário de letras -> códigos ASCII (uint8) sem passar por strings Python linha a linha."""
+    pedacos = coluna.chunks if isinstance(coluna, pa.ChunkedArray) else [coluna]
+    if not pedacos: return np.zeros(0, dtype=np.uint8)
+    codigos = []
+    for pedaco in pedacos:  # cada pedaço pode ter o próprio dicionário
+        tabela_codigos = np.array([ord(letra[0]) for letra in pedaco.dictionary.to_pylist()], dtype=np.uint8)
+        codigos.append(tabela_codigos[pedaco.indices.to_numpy(zero_copy_only=False)])
+    return np.concatenate(codigos)
+
+
+if __name__ == "__main__":
+    DB_PATH = sys.argv[1] if len(sys.argv) > 1 else "../dada-scrapping/concursos_data.db"
+    PASTA_PARQUET = sys.argv[2] if len(sys.argv) > 2 else "gabaritos_parquet"
+
+    if sincronizar(DB_PATH, PASTA_PARQUET):
+        linhas = ler_tabela(PASTA_PARQUET, ["cargo_id"]).num_rows
+        print(f"Exportado: {PASTA_PARQUET} ({linhas} respostas)")
+    else:
+        print(f"{PASTA_PARQUET} já está em dia com {DB_PATH}")
@@ -2,44 +2,398 @@ import sqlite3
 import pandas as pd
 import numpy as np
 import random
-from scipy import stats
 import time
 import warnings
-import matplotlib.pyplot as plt
-import seaborn as sns
-import matplotlib.ticker as mtick
 import os
 import math
+from concurrent.futures import ProcessPoolExecutor
+
+from gabarito_store import GabaritoStore
+from collections import defaultdict
 
 # Configurações
+# scipy.stats é importado dentro dos métodos que o usam (mais de meio segundo de import)
 warnings.filterwarnings("ignore")
-sns.set_theme(style="whitegrid")
 
 # ==========================================
 # 1. LÓGICA DE NEGÓCIO (REGRA DE CHUTE)
 # ==========================================
 class EstrategiaChute:
     @staticmethod
-    def menos_marcada(gabarito_parcial, opcoes_possiveis):
+    def menos_marcada(gabarito_parcial, opcoes_possiveis, rng=None):
+        # rng=None usa o estado global de random (comportamento original)
+        escolher = random.choice if rng is None else (lambda seq: seq[rng.integers(len(seq))])
         marcados = [x for x in gabarito_parcial if x is not None]
         if not marcados:
-            return [random.choice(opcoes_possiveis) for _ in gabarito_parcial], None
+            return [escolher(opcoes_possiveis) for _ in gabarito_parcial], None
             
         contagem = {op: marcados.count(op) for op in opcoes_possiveis}
         min_valor = min(contagem.values())
         candidatas = [k for k, v in contagem.items() if v == min_valor]
-        letra_escolhida = random.choice(candidatas)
+        letra_escolhida = escolher(candidatas)
         gabarito_final = [x if x is not None else letra_escolhida for x in gabarito_parcial]
         return gabarito_final, letra_escolhida
 
+class AvaliadorExato:
+    """
+    Distribuição EXATA do nº de acertos de simular_prova_unica (estratégia 'menos marcada'),
+    sem sorteio nenhum. Como as questões sabidas e as erradas saem sem reposição, a conta é:
+      1. Erros: quais letras do gabarito foram erradas (hipergeométrica multivariada) e para
+         qual letra cada erro foi trocado (uniforme entre as outras opções).
+      2. Brancos: quantos de cada letra sobraram sem resposta (hipergeométrica sobre o resto).
+      3. Chute: a letra menos marcada leva todos os brancos; o desempate aleatório entra
+         como a integral em u de prod_j (1 se M_j > m, 1-u se M_j == m), feita por Gauss-Legendre.
+    O custo cresce com o nº de erros e de brancos, não com n_simulacoes, e explode em provas
+    longas de 4-5 opções: acima de _MAX_CUSTO, prob_meta cai para EstimadorImportancia.
+    """
+    _NOS_U, _PESOS_U = np.polynomial.legendre.leggauss(3)  # exato p/ polinômios até grau 5 (5 opções)
+    _NOS_U, _PESOS_U = (_NOS_U + 1) / 2, _PESOS_U / 2
+    _MAX_ELEMENTOS_LOTE = 4_000_000
+    _MAX_CUSTO = 1_000_000  # ver _custo: ~meio segundo por prova
+
+    def __init__(self, gabarito_real, opcoes):
+        self.gabarito = gabarito_real
+        self.opcoes = opcoes
+        self.total = len(gabarito_real)
+        self.n_opcoes = len(opcoes)
+        # Contagem por letra; a última posição junta letras fora das opções (nunca são chutadas)
+        self.contagem = np.array([gabarito_real.count(op) for op in opcoes] + [sum(1 for x in gabarito_real if x not in opcoes)])
+        # binom[a, b] = C(a, b) / 2^a: mantém as hipergeométricas na escala de float
+        n = np.arange(self.total + 1)
+        log_fat = np.concatenate(([0.0], np.cumsum(np.log(np.maximum(n[1:], 1)))))
+        log_comb = log_fat[:, None] - log_fat[None, :] - log_fat[np.maximum(n[:, None] - n[None, :], 0)]
+        self._binom = np.where(n[None, :] <= n[:, None], np.exp(log_comb - n[:, None] * math.log(2)), 0.0)
+        self._cache_trocas = {}
+
+    def _contagens(self, conhecimento, erro):
+        """(tentativas, erros, certas, brancos) com o mesmo arredondamento de simular_prova_unica."""
+        n_tentativas = int(self.total * conhecimento)
+        n_erros = int(n_tentativas * erro)
+        return n_tentativas, n_erros, n_tentativas - n_erros, self.total - n_tentativas
+
+    def _custo(self, n_erros, n_brancos):
+        """
+        Tamanho estimado da conta: (composições dos erros por letra) x (marcações recebidas) x
+        brancos x opções². Com 2 opções a troca é forçada e cada composição dá uma única marcação.
+        """
+        k = self.n_opcoes
+        recebidos = math.comb(n_erros + k - 1, k - 1) if k > 2 else 1
+        return math.comb(n_erros + k, k) * recebidos * (n_brancos + 1) * k * k
+
+    def viavel(self, conhecimento, erro):
+        """Se pmf_acertos cabe em _MAX_CUSTO para este perfil."""
+        n_tentativas, n_erros, _, n_brancos = self._contagens(conhecimento, erro)
+        return n_tentativas == 0 or n_brancos == 0 or self._custo(n_erros, n_brancos) <= self._MAX_CUSTO
+
+    def pmf_acertos(self, conhecimento, erro):
+        """
+        Vetor de tamanho total+1 com P(acertos = a), mesmo arredondamento de simular_prova_unica.
+        ValueError se a conta passar de _MAX_CUSTO (ver viavel).
+        """
+        total, n_op = self.total, self.n_opcoes
+        n_tentativas, n_erros, n_certas, n_brancos = self._contagens(conhecimento, erro)
+        pmf = np.zeros(total + 1)
+
+        if n_tentativas == 0:
+            # Folha em branco: cada questão recebe uma letra aleatória independente
+            validas = total - self.contagem[-1]
+            from scipy import stats
+            pmf[:validas + 1] = stats.binom.pmf(np.arange(validas + 1), validas, 1 / n_op)
+            return pmf
+        if n_brancos == 0:
+            pmf[n_certas] = 1.0
+            return pmf
+        if not self.viavel(conhecimento, erro):
+            raise ValueError(f"Distribuição exata cara demais ({n_op} opções, {n_erros} erros, {n_brancos} brancos); "
+                             f"use EstimadorImportancia")
+
+        configs = self._configuracoes_de_erro(n_erros)
+        restantes = np.array([k[0] for k in configs])
+        recebidos = np.array([k[1] for k in configs])
+        probs = np.array(list(configs.values()))
+        pmf[n_certas:n_certas + n_brancos + 1] = self._pmf_chute(restantes, recebidos, probs, n_brancos)
+        return pmf
+
+    def prob_meta(self, conhecimento, erro, meta_acerto, rng=None):
+        """
+        P(pct_acerto >= meta). Meta inalcançável = 0 sem calcular nada: todos os brancos levam a
+        mesma letra, então o chute acerta no máximo a letra mais frequente do gabarito.
+        Acima de _MAX_CUSTO, estimativa de EstimadorImportancia (com 'rng').
+        """
+        n_tentativas, _, n_certas, n_brancos = self._contagens(conhecimento, erro)
+        if n_tentativas == 0:
+            maximo = self.total - self.contagem[-1]
+        else:
+            maximo = n_certas + min(n_brancos, int(self.contagem[:-1].max()))
+        if maximo / self.total < meta_acerto:
+            return 0.0
+        if not self.viavel(conhecimento, erro):
+            return EstimadorImportancia(self.gabarito, self.opcoes).estimar(conhecimento, erro, meta_acerto, rng=rng)[0]
+        pmf = self.pmf_acertos(conhecimento, erro)
+        return float(pmf[np.arange(self.total + 1) / self.total >= meta_acerto].sum())
+
+    def _configuracoes_de_erro(self, n_erros):
+        """{(questões restantes por letra, marcações recebidas por opção): probabilidade}"""
+        n_op, N = self.n_opcoes, self.contagem
+        denominador = math.comb(self.total, n_erros)
+        configs = defaultdict(float)
+        for e in self._composicoes(n_erros, N):
+            p_e = math.prod(math.comb(int(N[j]), e[j]) for j in range(n_op + 1)) / denominador
+            trocas = {(0,) * n_op: 1.0}
+            for j, e_j in enumerate(e):
+                if e_j: trocas = self._somar_distribuicoes(trocas, self._trocas(j, e_j))
+            restantes = [int(x) for x in N - np.array(e)]
+            for recebidos, p_r in trocas.items():
+                # Letras com o mesmo par (restantes, recebidos) são intercambiáveis: ordena para agrupar
+                pares = sorted(zip(restantes[:n_op], recebidos))
+                chave = (tuple(a for a, _ in pares) + (restantes[-1],), tuple(r for _, r in pares))
+                configs[chave] += p_e * p_r
+        return configs
+
+    @staticmethod
+    def _composicoes(n, limites):
+        if len(limites) == 1:
+            if n <= limites[0]: yield (n,)
+            return
+        for x in range(min(n, limites[0]) + 1):
+            for resto in AvaliadorExato._composicoes(n - x, limites[1:]):
+                yield (x,) + resto
+
+    def _trocas(self, letra, n):
+        """Distribuição das marcações de n erros de uma letra (uniforme entre as outras opções)."""
+        chave = (letra, n)
+        if chave not in self._cache_trocas:
+            destinos = [l for l in range(self.n_opcoes) if l != letra]
+            p = 1 / len(destinos)
+            dist = {(0,) * self.n_opcoes: 1.0}
+            for _ in range(n):
+                nova = defaultdict(float)
+                for vetor, pv in dist.items():
+                    for l in destinos:
+                        v = list(vetor); v[l] += 1
+                        nova[tuple(v)] += pv * p
+                dist = nova
+            self._cache_trocas[chave] = dict(dist)
+        return self._cache_trocas[chave]
+
+    @staticmethod
+    def _somar_distribuicoes(a, b):
+        soma = defaultdict(float)
+        for va, pa in a.items():
+            for vb, pb in b.items():
+                soma[tuple(x + y for x, y in zip(va, vb))] += pa * pb
+        return soma
+
+    def _pmf_chute(self, restantes, recebidos, probs, n_brancos):
+        """
+        P(acertos no chute = s), s = 0..n_brancos, somando todas as configurações de erro em lote.
+        Eixos: (configuração, s, nó de u, brancos acumulados das outras letras).
+        """
+        n_op, B = self.n_opcoes, n_brancos + 1
+        resultado = np.zeros(B)
+        por_lote = max(1, self._MAX_ELEMENTOS_LOTE // (B * B * len(self._NOS_U)))
+        for ini in range(0, len(probs), por_lote):
+            A, R, P = restantes[ini:ini + por_lote], recebidos[ini:ini + por_lote], probs[ini:ini + por_lote]
+            brancos = [self._binom[A[:, j]][:, :B] for j in range(n_op + 1)]  # P ~ C(A_j, b_j)
+            denominador = self._binom[A.sum(axis=1), n_brancos]
+            b = np.arange(B)
+            u = self._NOS_U[None, None, :, None]
+
+            for l in range(n_op):
+                # Letra l chutada com s brancos (s <= A_l): foi marcada m = A_l - s + R_l vezes
+                S = min(B, A[:, l].max() + 1)
+                s = b[:S]
+                m = (A[:, l, None] - s[None, :] + R[:, l, None])[:, :, None, None]
+                outras = [j for j in range(n_op) if j != l]
+                produto = np.broadcast_to(brancos[-1][:, None, None, :], (len(P), S, len(self._NOS_U), B))
+                for j in outras:
+                    marcas = (A[:, j, None] - b[None, :] + R[:, j, None])[:, None, None, :]
+                    peso = brancos[j][:, None, None, :] * np.where(marcas > m, 1.0, np.where(marcas == m, 1 - u, 0.0))
+                    if j != outras[-1]:
+                        produto = self._convolver(produto, peso, B)
+                        continue
+                    # Última letra: só interessa o coeficiente de x^(n_brancos - s), que é o que
+                    # faz os brancos das outras letras completarem o total
+                    alvo = (n_brancos - s)[None, :, None, None]
+                    k = b[None, None, None, :]
+                    indice = np.clip(alvo - k, 0, B - 1)
+                    coef = (peso * np.where(alvo - k >= 0, np.take_along_axis(produto, np.broadcast_to(indice, peso.shape[:-1] + (B,)), axis=3), 0.0)).sum(axis=3)
+                integral = coef @ self._PESOS_U
+                resultado[:S] += (P[:, None] * brancos[l][:, :S] * integral / denominador[:, None]).sum(axis=0)
+        return resultado
+
+    @staticmethod
+    def _convolver(a, b, limite):
+        """Convolução no último eixo, truncada em 'limite' termos."""
+        saida = np.zeros(np.broadcast_shapes(a.shape[:-1], b.shape[:-1]) + (limite,))
+        for k in range(limite):
+            saida[..., k:] += b[..., k:k + 1] * a[..., :limite - k]
+        return saida
+
+class EstimadorImportancia:
+    """
+    Estimador por amostragem por importância de P(pct_acerto >= meta) para QUALQUER
+    estratégia de chute (função com a assinatura de EstrategiaChute.menos_marcada).
+
+    O evento raro depende de quantos brancos caem numa mesma letra. A proposta é uma mistura:
+    com prob. 'defensivo' sorteia como o original; senão escolhe uma letra l e sorteia quantos
+    brancos são de l por uma hipergeométrica inclinada q_l(b) ∝ p_l(b)·exp(θ_l·b), com θ_l
+    ajustado para a média ficar nos acertos que faltam para a meta. Dado esse número, as
+    posições são uniformes, então o peso de cada amostra é só
+        w = 1 / (defensivo + Σ_l π_l · q_l(b_l) / p_l(b_l))
+    (limitado por 1/defensivo). Erros e chute seguem o sorteio original, feitos em lote com
+    matrizes; só uma estratégia diferente da 'menos marcada' é chamada amostra a amostra.
+    """
+    def __init__(self, gabarito_real, opcoes, estrategia=None, defensivo=0.1):
+        self.gabarito = list(gabarito_real)
+        self.opcoes = list(opcoes)
+        self.estrategia = estrategia or EstrategiaChute.menos_marcada
+        self._menos_marcada = self.estrategia is EstrategiaChute.menos_marcada  # chute vetorizado
+        self.defensivo = defensivo
+        self.total = len(self.gabarito)
+        self.codigos = np.array([self.opcoes.index(x) if x in self.opcoes else len(self.opcoes) for x in self.gabarito])
+        self.indices_letra = [np.array([i for i, x in enumerate(self.gabarito) if x == op]) for op in self.opcoes]
+        self.indices_resto = [np.array([i for i, x in enumerate(self.gabarito) if x != op]) for op in self.opcoes]
+
+    def estimar(self, conhecimento, erro, meta_acerto, erro_relativo_alvo=0.10, max_amostras=200_000, lote=2_000, confianca=0.95, rng=None):
+        """
+        Amostra em lotes até o erro relativo (desvio padrão / p) ficar abaixo do alvo ou
+        estourar max_amostras. Retorna (p, ic_inferior, ic_superior, n_amostras).
+        Meta inalcançável (nem acertando todos os brancos) devolve (0, 0, 0, 0) sem amostrar;
+        se nenhuma amostra bater a meta, ic_superior é um limite de Clopper-Pearson, não zero.
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        n_tentativas = int(self.total * conhecimento)
+        n_erros = int(n_tentativas * erro)
+        n_brancos = self.total - n_tentativas
+        if (n_tentativas - n_erros + n_brancos) / self.total < meta_acerto:
+            return 0.0, 0.0, 0.0, 0
+        acertos_faltando = meta_acerto * self.total - (n_tentativas - n_erros)
+        inclinadas, originais = self._propostas(n_brancos, acertos_faltando)
+
+        soma = soma_q = 0.0
+        n = 0
+        while n < max_amostras:
+            pct_acerto, peso = self._amostrar_lote(lote, n_tentativas, n_erros, inclinadas, originais, rng)
+            peso = peso[pct_acerto >= meta_acerto]
+            soma += peso.sum()
+            soma_q += (peso * peso).sum()
+            n += lote
+            p = soma / n
+            desvio = math.sqrt(max(soma_q / n - p * p, 0.0) / n)
+            if p > 0 and desvio / p <= erro_relativo_alvo:
+                break
+
+        if soma == 0:
+            # Nenhum acerto: P_proposta(meta) <= Clopper-Pearson com 0 sucessos em n, e como
+            # p = E_q[peso·1{meta}] com peso <= 1/defensivo, p <= esse limite / defensivo
+            superior = (1 - ((1 - confianca) / 2) ** (1 / n)) / self.defensivo
+            return 0.0, 0.0, float(min(superior, 1.0)), n
+
+        from scipy import stats
+        z = stats.norm.ppf(0.5 + confianca / 2)
+        return float(p), float(max(p - z * desvio, 0.0)), float(p + z * desvio), n
+
+    def _propostas(self, n_brancos, acertos_faltando):
+        """Marginais original (p_l) e inclinada (q_l) do nº de brancos de cada letra."""
+        inclinadas, originais = [], []
+        from scipy import stats
+        suporte = np.arange(n_brancos + 1)
+        for idx in self.indices_letra:
+            p = stats.hypergeom.pmf(suporte, self.total, len(idx), n_brancos)
+            alvo = min(max(acertos_faltando, (suporte * p).sum()), suporte[p > 0].max())
+            theta = self._ajustar_theta(p, suporte, alvo)
+            q = p * np.exp(theta * (suporte - suporte[p > 0].max()))
+            inclinadas.append(q / q.sum())
+            originais.append(np.where(p > 0, p, 1.0))
+        return inclinadas, originais
+
+    @staticmethod
+    def _ajustar_theta(p, suporte, alvo):
+        """Bisseção em θ para a média de p·exp(θb) (normalizada) bater o alvo."""
+        baixo, alto = 0.0, 50.0
+        topo = suporte[p > 0].max()
+        for _ in range(60):
+            theta = (baixo + alto) / 2
+            q = p * np.exp(theta * (suporte - topo))
+            if (suporte * q).sum() / q.sum() < alvo: baixo = theta
+            else: alto = theta
+        return baixo
+
+    def _amostrar_lote(self, lote, n_tentativas, n_erros, inclinadas, originais, rng):
+        """
+        'lote' amostras de uma vez, como matrizes (amostra x questão), no estilo do MotorVetorizado.
+        Mesmo sorteio de simular_prova_unica, com os brancos vindos da proposta. Retorna (pct_acerto, peso).
+        """
+        n_op, total = len(self.opcoes), self.total
+        n_brancos = total - n_tentativas
+        codigos = self.codigos[None, :]
+
+        # 1. Componente da mistura (n_op = sorteio original) e nº de brancos da letra inclinada
+        componente = np.where(rng.random(lote) < self.defensivo, n_op, rng.integers(n_op, size=lote))
+        b_letra = np.zeros(lote, dtype=np.int64)
+        for l in range(n_op):
+            linhas = componente == l
+            if linhas.any():
+                b_letra[linhas] = rng.choice(n_brancos + 1, size=int(linhas.sum()), p=inclinadas[l])
+
+        # 2. Brancos: ordem aleatória com as questões da letra inclinada na frente; as b primeiras
+        #    da letra + as (n_brancos - b) primeiras do resto = sorteio uniforme sem reposição em cada grupo
+        na_letra = (codigos == componente[:, None]) & (componente < n_op)[:, None]
+        posicao = np.argsort(np.argsort(rng.random((lote, total)) + ~na_letra, axis=1), axis=1)
+        n_letra = na_letra.sum(axis=1)[:, None]
+        brancos = np.where(na_letra, posicao < b_letra[:, None],
+                           posicao - n_letra < (n_brancos - b_letra)[:, None])
+
+        b = np.stack([(brancos & (codigos == l)).sum(axis=1) for l in range(n_op)], axis=1)
+        razao = sum(inclinadas[l][b[:, l]] / originais[l][b[:, l]] for l in range(n_op))
+        peso = 1.0 / (self.defensivo + (1 - self.defensivo) / n_op * razao)
+
+        # 3. Erros entre as tentativas (brancos vão para o fim da ordem), trocados por outra opção
+        posicao = np.argsort(np.argsort(rng.random((lote, total)) + brancos, axis=1), axis=1)
+        erros = posicao < n_erros
+        troca = np.where(codigos < n_op, (codigos + rng.integers(1, n_op, size=(lote, total))) % n_op,
+                         rng.integers(n_op, size=(lote, total)))
+        folha = np.where(brancos, -1, np.where(erros, troca, codigos))
+        acertos = (folha == codigos).sum(axis=1)
+
+        # 4. Chute nos brancos
+        if not self._menos_marcada:
+            acertos = acertos + self._chutar_com_estrategia(folha, rng)
+        elif n_tentativas == 0:
+            # Folha em branco: cada questão recebe uma letra aleatória independente
+            acertos = acertos + (rng.integers(n_op, size=(lote, total)) == codigos).sum(axis=1)
+        else:
+            # Letra menos marcada; o ruído < 1 só desempata (uniforme entre as empatadas)
+            marcas = np.stack([(folha == l).sum(axis=1) for l in range(n_op)], axis=1)
+            letra = np.argmin(marcas + rng.random(marcas.shape) * 0.5, axis=1)
+            acertos = acertos + (brancos & (codigos == letra[:, None])).sum(axis=1)
+        return acertos / total, peso
+
+    def _chutar_com_estrategia(self, folha, rng):
+        """Estratégia qualquer (listas de letras, uma amostra por vez): acertos vindos do chute."""
+        acertos = np.zeros(len(folha), dtype=np.int64)
+        for linha, codigos_linha in enumerate(folha):
+            parcial = [None if c < 0 else (self.opcoes[c] if c < len(self.opcoes) else self.gabarito[i])
+                       for i, c in enumerate(codigos_linha)]
+            final, _ = self.estrategia(parcial, self.opcoes, rng)
+            acertos[linha] = sum(1 for p, c, r in zip(parcial, final, self.gabarito) if p is None and c == r)
+        return acertos
+
 # ==========================================
 # 2. GERADOR DE DADOS (ETL & BASE)
 # ==========================================
 class GeradorDeDados:
-    def __init__(self, db_path):
+    def __init__(self, db_path, cache_path=None, parquet_path=None):
         self.db_path = db_path
+        self.cache_path = cache_path
+        self.parquet_path = parquet_path
         self.conn = sqlite3.connect(db_path)
 
+    def _carregar_store(self):
+        # Uma consulta só para todos os gabaritos (ou o cache .npz, se estiver em dia)
+        return GabaritoStore.carregar_ou_criar(self.db_path, self.cache_path, self.parquet_path)
+
     def _obter_todas_provas(self):
         query = "SELECT DISTINCT c.nome, cg.nome_cargo, cg.id, cg.tipo_prova FROM cargos cg JOIN concursos c ON cg.concurso_id = c.id"
         return pd.read_sql_query(query, self.conn)
@@ -55,14 +409,16 @@ class GeradorDeDados:
         else: return (['A', 'B', 'C', 'D', 'E'], "MULTIPLA_5") if 'E' in gabarito else (['A', 'B', 'C', 'D'], "MULTIPLA_4")
 
     @staticmethod
-    def simular_prova_unica(gabarito_real, opcoes, grupo, conhecimento, erro):
+    def simular_prova_unica(gabarito_real, opcoes, grupo, conhecimento, erro, rng=None):
         total = len(gabarito_real)
         if total == 0: return 0, 0, []
 
+        sorteio = np.random if rng is None else rng
+        escolher = random.choice if rng is None else (lambda seq: seq[rng.integers(len(seq))])
         n_tentativas = int(total * conhecimento)
-        indices_tentativa = np.random.choice(total, n_tentativas, replace=False)
+        indices_tentativa = sorteio.choice(total, n_tentativas, replace=False)
         n_erros = int(n_tentativas * erro)
-        indices_erros = np.random.choice(indices_tentativa, n_erros, replace=False)
+        indices_erros = sorteio.choice(indices_tentativa, n_erros, replace=False)
         set_erros = set(indices_erros)
         set_tentativas = set(indices_tentativa)
         
@@ -72,11 +428,11 @@ class GeradorDeDados:
             if i in set_tentativas:
                 if i in set_erros:
                     erradas = [op for op in opcoes if op != gabarito_real[i]]
-                    folha[i] = random.choice(erradas)
+                    folha[i] = escolher(erradas)
                 else:
                     folha[i] = gabarito_real[i]
         
-        final, _ = EstrategiaChute.menos_marcada(folha, opcoes)
+        final, _ = EstrategiaChute.menos_marcada(folha, opcoes, rng)
         
         acertos = sum(1 for c, r in zip(final, gabarito_real) if c == r)
         pct_acerto = acertos / total
@@ -109,44 +465,67 @@ class GeradorDeDados:
 # 3. LABORATÓRIO DE PROBABILIDADE (CORRIGIDO)
 # ==========================================
 class LaboratorioProbabilidade:
-    def __init__(self, db_path):
-        self.gerador = GeradorDeDados(db_path)
+    def __init__(self, db_path, n_workers=1, seed=None, metodo="monte_carlo", estrategia=None, erro_relativo_alvo=0.10, cache_path=None, parquet_path=None):
+        self.gerador = GeradorDeDados(db_path, cache_path, parquet_path)
+        self.n_workers = n_workers
+        self.seed = seed
+        self.metodo = metodo
+        self.estrategia = estrategia
+        self.erro_relativo_alvo = erro_relativo_alvo
         print("\n[LAB] Carregando banco de provas...")
-        self.cache_provas = []
-        df = self.gerador._obter_todas_provas()
-        for _, row in df.iterrows():
-            gabarito = self.gerador._carregar_gabarito(row['id'])
-            if not gabarito: continue
-            opcoes, grupo = self.gerador._determinar_opcoes(row['tipo_prova'], gabarito)
-            self.cache_provas.append({'gabarito': gabarito, 'opcoes': opcoes, 'grupo': grupo, 'nome': row['nome']})
+        store = self.gerador._carregar_store()
+        self.cache_provas = [
+            {'gabarito': store.gabarito(i), 'opcoes': store.opcoes(i), 'grupo': store.grupo(i), 'nome': store.nome(i)}
+            for i in range(len(store))
+        ]
         print(f"[LAB] Pronto. {len(self.cache_provas)} provas na memória.")
 
-    def calcular_probabilidade_geometrica(self, conhecimento, erro, meta_acerto=0.92, n_sims_por_prova=600):
+    def distribuicao_exata(self, prova, conhecimento, erro):
+        """PMF exata do nº de acertos de uma prova do cache (índice = acertos)."""
+        return AvaliadorExato(prova['gabarito'], prova['opcoes']).pmf_acertos(conhecimento, erro)
+
+    def estimar_cauda(self, prova, conhecimento, erro, meta_acerto=0.92, estrategia=None, erro_relativo_alvo=0.10, seed=None):
+        """P(pct_acerto >= meta) de uma prova por amostragem por importância: (p, ic_inf, ic_sup, n)."""
+        estimador = EstimadorImportancia(prova['gabarito'], prova['opcoes'], estrategia)
+        return estimador.estimar(conhecimento, erro, meta_acerto, erro_relativo_alvo, rng=np.random.default_rng(seed))
+
+    def calcular_probabilidade_geometrica(self, conhecimento, erro, meta_acerto=0.92, n_sims_por_prova=600, n_workers=1, seed=None, metodo="monte_carlo", estrategia=None, erro_relativo_alvo=0.10):
         """
         Calcula a probabilidade usando soma de logs para evitar underflow (virar zero).
         Se p=0, aplicamos 'suavização' (considera que 1 chance em N+1 é possível) ou ignoramos.
         Aqui vamos filtrar os ZEROS REAIS para dar a média das provas POSSÍVEIS.
+
+        n_workers > 1 (ou None = todos os núcleos) distribui as provas num ProcessPoolExecutor.
+        Cada prova usa um gerador vindo de SeedSequence(seed).spawn: com a mesma seed o
+        resultado é idêntico para qualquer número de workers.
+
+        metodo="exato" troca a simulação pela distribuição exata (AvaliadorExato): p = 0 passa
+        a significar prova realmente impossível, e não falta de amostras. Provas em que a conta
+        exata fica cara (muitas opções, erros e brancos) usam amostragem por importância.
+        metodo="importancia" usa EstimadorImportancia (serve para qualquer 'estrategia') e amostra
+        cada prova até o erro relativo ficar abaixo de erro_relativo_alvo.
         """
-        probs_validas = []
-        
         start_time = time.time()
-        print(f"   > Simulando 600 tentativas para cada uma das {len(self.cache_provas)} provas...")
-        
-        for prova in self.cache_provas:
-            sucessos = 0
-            for _ in range(n_sims_por_prova):
-                pct_acerto, _, _ = self.gerador.simular_prova_unica(
-                    prova['gabarito'], prova['opcoes'], prova['grupo'], 
-                    conhecimento, erro
-                )
-                if pct_acerto >= meta_acerto:
-                    sucessos += 1
-            
-            p = sucessos / n_sims_por_prova
-            
-            # Só adicionamos na conta da média geométrica se p > 0
-            if p > 0:
-                probs_validas.append(p)
+        if metodo == "exato":
+            print(f"   > Calculando a distribuição exata de cada uma das {len(self.cache_provas)} provas...")
+        elif metodo == "importancia":
+            print(f"   > Amostragem por importância (erro relativo alvo {erro_relativo_alvo:.0%}) em {len(self.cache_provas)} provas...")
+        else:
+            print(f"   > Simulando {n_sims_por_prova} tentativas para cada uma das {len(self.cache_provas)} provas...")
+        
+        sementes = np.random.SeedSequence(seed).spawn(len(self.cache_provas))
+        tarefas = [(prova, conhecimento, erro, meta_acerto, n_sims_por_prova, s, metodo, estrategia, erro_relativo_alvo) for prova, s in zip(self.cache_provas, sementes)]
+        
+        if n_workers == 1:
+            probs = list(map(_probabilidade_prova, tarefas))
+        else:
+            workers = n_workers or os.cpu_count()
+            chunksize = max(1, len(tarefas) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                probs = list(executor.map(_probabilidade_prova, tarefas, chunksize=chunksize))
+        
+        # Só adicionamos na conta da média geométrica se p > 0
+        probs_validas = [p for p in probs if p > 0]
         
         # Média Geométrica via Logaritmos (Matematicamente equivalente a multiplicar e tirar raiz)
         # GM = exp( (sum(log(p))) / N )
@@ -176,7 +555,7 @@ class LaboratorioProbabilidade:
         
         for p in [perfil_a, perfil_b]:
             print(f"--- Analisando {p['nome']} ---")
-            p_geo, pct_imp, dt = self.calcular_probabilidade_geometrica(p['c'], p['e'], meta)
+            p_geo, pct_imp, dt = self.calcular_probabilidade_geometrica(p['c'], p['e'], meta, n_workers=self.n_workers, seed=self.seed, metodo=self.metodo, estrategia=self.estrategia, erro_relativo_alvo=self.erro_relativo_alvo)
             
             # Chance acumulada: 1 - (1 - p_geo)^n
             chance_total = 1 - (1 - p_geo)**p['n']
@@ -194,7 +573,7 @@ class LaboratorioProbabilidade:
         c, e, meta = 0.70, 0.10, 0.92
         print(f"Perfil: {c*100}% Conhecimento | {e*100}% Erro")
         
-        p_base, pct_imp, _ = self.calcular_probabilidade_geometrica(c, e, meta)
+        p_base, pct_imp, _ = self.calcular_probabilidade_geometrica(c, e, meta, n_workers=self.n_workers, seed=self.seed, metodo=self.metodo, estrategia=self.estrategia, erro_relativo_alvo=self.erro_relativo_alvo)
         
         print(f"Probabilidade Base (Média Geométrica): {p_base:.6%}")
         
@@ -211,12 +590,41 @@ class LaboratorioProbabilidade:
                 chance = 1 - (1 - p_base)**n
                 print(f"   - {n:3d} provas: {chance:6.2%}")
 
+def _probabilidade_prova(tarefa):
+    """Unidade de trabalho do pool: probabilidade de uma prova bater a meta."""
+    prova, conhecimento, erro, meta_acerto, n_sims, semente, metodo, estrategia, erro_relativo_alvo = tarefa
+    rng = np.random.default_rng(semente)
+    if metodo == "exato":
+        return AvaliadorExato(prova['gabarito'], prova['opcoes']).prob_meta(conhecimento, erro, meta_acerto, rng)
+    if metodo == "importancia":
+        estimador = EstimadorImportancia(prova['gabarito'], prova['opcoes'], estrategia)
+        return estimador.estimar(conhecimento, erro, meta_acerto, erro_relativo_alvo, rng=rng)[0]
+    sucessos = 0
+    for _ in range(n_sims):
+        pct_acerto, _, _ = GeradorDeDados.simular_prova_unica(
+            prova['gabarito'], prova['opcoes'], prova['grupo'], 
+            conhecimento, erro, rng
+        )
+        if pct_acerto >= meta_acerto:
+            sucessos += 1
+    return sucessos / n_sims
+
 # ==========================================
 # 4. EXECUÇÃO
 # ==========================================
 if __name__ == "__main__":
     DB_PATH = "../dada-scrapping/concursos_data.db"
+    # None = usa todos os núcleos. A SEED fixa o resultado, qualquer que seja o nº de workers.
+    N_WORKERS = None
+    SEED = 2025
+    # "exato" = distribuição exata (sem zeros falsos); "monte_carlo" = simulação original;
+    # "importancia" = amostragem por importância (para estratégias sem fórmula exata)
+    METODO = "monte_carlo"
+    # Cache dos gabaritos (recriado sozinho quando o banco for mais novo)
+    CACHE_PATH = "gabaritos_cache.npz"
+    # Dataset Parquet de parquet_store.py, usado para recriar o cache (None = lê direto do SQLite)
+    PARQUET_PATH = "gabaritos_parquet"
     
-    lab = LaboratorioProbabilidade(DB_PATH)
+    lab = LaboratorioProbabilidade(DB_PATH, n_workers=N_WORKERS, seed=SEED, metodo=METODO, cache_path=CACHE_PATH, parquet_path=PARQUET_PATH)
     lab.teste_1_comparacao_rigorosa()
     lab.teste_3_quantas_provas_rigoroso()
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+Relatório completo sem janelas: todas as figuras de main.py e do AnalisadorEstatistico (chute.py)
+em PNG/SVG, os relatórios de texto e um index.html juntando tudo.
+
+Uso: python relatorio_lote.py [pasta_saida] [csv_simulacao]
+
+As figuras são independentes e são desenhadas em paralelo (um processo por figura, backend Agg).
+As curvas KDE dos histogramas ficam em cache (<pasta_cache>/kde), então só a primeira execução as calcula.
+"""
+import os
+import io
+import sys
+import html
+import time
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")  # antes de main/chute importarem o pyplot
+
+from cache_resultados import CacheResultados
+from figuras import backend_graficos, configurar_cache_kde
+from main import (obter_contagens, percentuais_por_prova, plotar_boxplots_comparativos, plotar_certo_errado,
+                  plotar_multipla_escolha, relatorio_chi2_detalhado, relatorio_t_test_detalhado,
+                  relatorio_z_test_detalhado)
+from chute import AnalisadorEstatistico
+
+# ==========================================
+# TAREFAS (cada uma roda num processo do pool)
+# ==========================================
+def _iniciar_worker(pasta_kde):
+    configurar_cache_kde(pasta_kde)
+
+
+def _executar(funcao, args):
+    """Roda uma função de desenho guardando o que ela imprime. Retorna (arquivos, texto)."""
+    saida = io.StringIO()
+    with contextlib.redirect_stdout(saida):
+        arquivos = funcao(*args)
+    return arquivos or [], saida.getvalue()
+
+
+def _grafico_chute(csv_path, metodo, arquivo, kwargs):
+    return getattr(AnalisadorEstatistico(csv_path), metodo)(arquivo=arquivo, **kwargs)
+
+
+def tarefas_distribuicao(df_counts, pasta):
+    """(título, função, args) de cada figura das distribuições de gabaritos."""
+    df_dist = percentuais_por_prova(df_counts)
+    ce = df_counts['tipo_prova'] == 'CERTO_ERRADO'
+    me_5 = (df_counts['tipo_prova'] == 'MULTIPLA_ESCOLHA') & (df_counts['qtd_alternativas'] == 5)
+    me_4 = (df_counts['tipo_prova'] == 'MULTIPLA_ESCOLHA') & (df_counts['qtd_alternativas'] == 4)
+
+    tarefas = []
+    if ce.any():
+        tarefas.append(("Certo vs Errado", plotar_certo_errado,
+                        (df_dist[ce], df_counts[ce], os.path.join(pasta, "certo_errado"))))
+    if me_5.any():
+        tarefas.append(("Múltipla escolha (5 alternativas)", plotar_multipla_escolha,
+                        (df_dist[me_5], df_counts[me_5], 5, os.path.join(pasta, "multipla_5"))))
+    if me_4.any():
+        tarefas.append(("Múltipla escolha (4 alternativas)", plotar_multipla_escolha,
+                        (df_dist[me_4], df_counts[me_4], 4, os.path.join(pasta, "multipla_4"))))
+    tarefas.append(("Boxplots comparativos", plotar_boxplots_comparativos,
+                    (df_dist, os.path.join(pasta, "boxplot"))))
+    return tarefas
+
+
+def tarefas_chute(csv_path, pasta, erro_alvo=0.10):
+    """(título, função, args) de cada gráfico do AnalisadorEstatistico."""
+    graficos = [
+        ("Eficiência média do chute", "plotar_curvas_eficiencia_media", {}),
+        ("Ganho percentual do chute", "plotar_curvas_ganho_percentual", {}),
+        ("Correlação conhecimento x eficiência", "plotar_correlacao", {}),
+        (f"Distribuição da eficiência (erro {erro_alvo:.0%})", "plotar_distribuicao_sino_eficiencia",
+         {'erro_alvo': erro_alvo}),
+    ]
+    return [(titulo, _grafico_chute, (csv_path, metodo, os.path.join(pasta, metodo.replace("plotar_", "")), kwargs))
+            for titulo, metodo, kwargs in graficos]
+
+# ==========================================
+# RELATÓRIO
+# ==========================================
+def _texto_relatorios(df_counts, csv_path):
+    saida = io.StringIO()
+    with contextlib.redirect_stdout(saida):
+        relatorio_z_test_detalhado(df_counts)
+        relatorio_chi2_detalhado(df_counts)
+        relatorio_t_test_detalhado(df_counts)
+        if csv_path:
+            AnalisadorEstatistico(csv_path).imprimir_tabela_definitiva(erro_alvo=0.10)
+    return saida.getvalue()
+
+
+def escrever_index(pasta, secoes, texto):
+    """index.html com as figuras (PNG, com link para o SVG) e o texto dos relatórios."""
+    partes = ["<!DOCTYPE html>", "<html><head><meta charset='utf-8'><title>Relatório de gabaritos</title>",
+              "<style>body{font-family:sans-serif;margin:2em} img{max-width:100%;border:1px solid #ddd;margin:.5em 0}"
+              " pre{background:#f6f6f6;padding:1em;overflow-x:auto}</style></head><body>",
+              "<h1>Relatório de gabaritos</h1>"]
+    for titulo, arquivos in secoes:
+        partes.append(f"<h2>{html.escape(titulo)}</h2>")
+        for png in (a for a in arquivos if a.endswith(".png")):
+            svg = png[:-4] + ".svg"
+            alvo = os.path.relpath(svg if svg in arquivos else png, pasta)
+            partes.append(f"<a href='{html.escape(alvo)}'><img src='{html.escape(os.path.relpath(png, pasta))}'></a>")
+    partes += ["<h2>Testes de hipótese</h2>", f"<pre>{html.escape(texto)}</pre>", "</body></html>"]
+
+    caminho = os.path.join(pasta, "index.html")
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write("\n".join(partes))
+    return caminho
+
+
+def gerar_relatorio(db_path, pasta, csv_path=None, pasta_cache="cache_analises", n_workers=None):
+    """Gera tudo em 'pasta' e retorna o caminho do index.html."""
+    os.makedirs(pasta, exist_ok=True)
+    pasta_kde = os.path.join(pasta_cache, "kde") if pasta_cache else None
+
+    df_counts, _ = obter_contagens(db_path, cache=CacheResultados(pasta_cache) if pasta_cache else None)
+    if df_counts.empty:
+        print("Nenhum dado encontrado.")
+        return None
+
+    tarefas = tarefas_distribuicao(df_counts, pasta)
+    if csv_path and os.path.exists(csv_path):
+        tarefas += tarefas_chute(csv_path, pasta)
+    else:
+        csv_path = None
+
+    backend_graficos()  # importado antes do pool: os workers (fork) já nascem com matplotlib/seaborn
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_iniciar_worker, initargs=(pasta_kde,)) as pool:
+        futuros = [pool.submit(_executar, funcao, args) for _, funcao, args in tarefas]
+        texto = _texto_relatorios(df_counts, csv_path)  # enquanto as figuras são desenhadas
+        secoes = [(titulo, futuro.result()[0]) for (titulo, _, _), futuro in zip(tarefas, futuros)]
+
+    with open(os.path.join(pasta, "relatorios.txt"), "w", encoding="utf-8") as f:
+        f.write(texto)
+    return escrever_index(pasta, secoes, texto)
+
+
+if __name__ == "__main__":
+    CAMINHO_DB = "../dada-scrapping/concursos_data.db"
+    PASTA_SAIDA = sys.argv[1] if len(sys.argv) > 1 else "relatorio"
+    # CSV do chute.py (gráficos do AnalisadorEstatistico); None ou inexistente = só as distribuições
+    CSV_SIMULACAO = sys.argv[2] if len(sys.argv) > 2 else "dados_simulacao_v7_completa.csv"
+    # Contagens e curvas KDE guardadas entre execuções. None = desliga
+    CAMINHO_CACHE = "cache_analises"
+    # None = usa todos os núcleos
+    N_WORKERS = None
+
+    inicio = time.perf_counter()
+    index = gerar_relatorio(CAMINHO_DB, PASTA_SAIDA, CSV_SIMULACAO, CAMINHO_CACHE, N_WORKERS)
+    if index:
+        print(f"Relatório em {index} ({time.perf_counter() - inicio:.1f} s)")
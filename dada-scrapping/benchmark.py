@@ -0,0 +1,354 @@
+"""
+Benchmarks do robô de gabaritos.
+
+Uso:
+    python benchmark.py links [pasta_com_html_salvos]
+    python benchmark.py extracao pasta_com_pdfs
+    python benchmark.py backends pasta_com_pdfs
+    python benchmark.py gravacao [n_cargos] [lote]
+    python benchmark.py pool [n_tarefas] [tamanho]
+
+links: sem pasta, gera uma página sintética grande (milhares de links) no estilo das páginas de concurso.
+       Com um cargos.json na pasta, confere também o mapa de cargos esperado de cada página.
+extracao: a pasta precisa de um gabaritos.json {"arquivo.pdf": {"1": "C", ...}} com as respostas esperadas.
+backends: compara pdfplumber x pypdfium2 (motor 'layout') em todos os .pdf da pasta; cada backend
+          roda num processo separado para medir o pico de memória.
+Arquivos de teste versionados em fixtures/ (pdfs/, multi_cargo/, html/); ver gerar_fixtures.py.
+gravacao: grava n_cargos sintéticos (padrão 500) no SQLite: uma conexão por cargo (legado) x ConexaoBanco
+          em WAL com commit a cada 'lote' cargos (padrão 20).
+pool: PoolDrivers e mapear_varios com drivers falsos (sem Chrome): n_tarefas empréstimos (padrão 2000)
+      num pool de 'tamanho' drivers (padrão 4), com crashes; confere que ninguém fica preso esperando
+      vaga, que nunca há mais de 'tamanho' drivers vivos e que mapear_varios não se adianta demais.
+"""
+import io
+import os
+import re
+import json
+import sys
+import sqlite3
+import tempfile
+import time
+import threading
+import unicodedata
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pdfplumber
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import WebDriverException
+
+from controller import CebraspeCrawler, PDFAmbiguo, PDFProcessor, PoolDrivers
+from model import BancoDeDados, ConexaoBanco
+
+
+def _cronometrar(funcao, repeticoes):
+    """Melhor tempo (s) entre as repetições."""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+# ==========================================
+# 1. CLASSIFICAÇÃO DE LINKS (mapear_cargos)
+# ==========================================
+def _extrair_cargos_legado(html):
+    """Versão original: html.parser + NFD por caractere + várias regex por link."""
+    def normalizar(texto):
+        return ''.join(c for c in unicodedata.normalize('NFD', texto)
+                       if unicodedata.category(c) != 'Mn').upper()
+
+    soup = BeautifulSoup(html, 'html.parser')
+    cargos = defaultdict(dict)
+    for link in soup.find_all('a'):
+        texto_norm = normalizar(link.get_text(" ", strip=True))
+        href = link.get('href', '')
+        if not href or len(href) < 5 or not href.lower().endswith('.pdf'):
+            continue
+        if href.startswith('/'): href = f"https://www.cebraspe.org.br{href}"
+        if all(termo in texto_norm for termo in ["GABARITO", "DEFINITIVO"]):
+            tipo = "especifico" if "ESPECIFICO" in texto_norm else "basico"
+            match = re.search(r'CARGOS?.{0,30}?([\d\s,eE]+)', texto_norm)
+            lista_ids = re.findall(r'\d+', match.group(1)) if match else []
+            if not lista_ids: lista_ids = re.findall(r'CARGO_?(\d+)', href.upper())
+            if not lista_ids: lista_ids = ['1']
+            for cid in lista_ids:
+                cargos[str(int(cid))][tipo] = href
+    return cargos
+
+
+def _pagina_sintetica(n_links=5000):
+    modelos = [
+        '<a href="/noticias/{i}">Notícia {i} sobre o concurso — publicação</a>',
+        '<a href="/arquivos/edital_{i}.pdf">Edital nº {i} – retificação</a>',
+        '<a href="/arquivos/gab_prel_{i}.pdf">Gabarito preliminar – Cargo {i}</a>',
+        '<a href="/arquivos/gab_def_bas_{i}.pdf">GABARITO DEFINITIVO – Conhecimentos Básicos – Cargos {i}, {j} e {k}</a>',
+        '<a href="/arquivos/gab_def_esp_CARGO_{i}.pdf"><span>Gabarito definitivo</span> <b>Conhecimentos Específicos</b></a>',
+        '<a href="#">Voltar ao topo</a>',
+    ]
+    # Texto decomposto (NFD), como vem de algumas páginas: o acento é um caractere separado
+    modelos.append(unicodedata.normalize(
+        'NFD', '<a href="/arquivos/gab_def_{i}.pdf">GABARITO DEFINITIVO - CONHECIMENTOS ESPECÍFICOS - CARGO {i}</a>'))
+    links = [modelos[i % len(modelos)].format(i=i, j=i + 1, k=i + 2) for i in range(n_links)]
+    return "<html><head><meta charset='utf-8'></head><body>" + "\n".join(links) + "</body></html>"
+
+
+def bench_links(pasta=None, repeticoes=10):
+    if pasta:
+        paginas = []
+        for nome in sorted(os.listdir(pasta)):
+            if nome.lower().endswith(('.html', '.htm')):
+                with open(os.path.join(pasta, nome), 'rb') as f:
+                    paginas.append(f.read().decode('utf-8', errors='replace'))
+    else:
+        paginas = [_pagina_sintetica()]
+
+    crawler = CebraspeCrawler(pool=object(), sessao=object())
+    for html in paginas:
+        if dict(_extrair_cargos_legado(html)) != dict(crawler._extrair_cargos(html)):
+            print("⚠️  Resultado diferente do legado numa das páginas!")
+
+    esperados_path = os.path.join(pasta, "cargos.json") if pasta else None
+    if esperados_path and os.path.exists(esperados_path):
+        with open(esperados_path, encoding="utf-8") as f:
+            esperados = json.load(f)
+        for nome, esperado in esperados.items():
+            with open(os.path.join(pasta, nome), 'rb') as f:
+                if crawler._extrair_cargos(f.read().decode('utf-8')) != esperado:
+                    print(f"⚠️  Mapa de cargos diferente do esperado em {nome}!")
+        print(f"Mapas de cargos conferidos com cargos.json: {len(esperados)} páginas")
+
+    t_legado = _cronometrar(lambda: [_extrair_cargos_legado(h) for h in paginas], repeticoes)
+    t_novo = _cronometrar(lambda: [crawler._extrair_cargos(h) for h in paginas], repeticoes)
+    print(f"Páginas: {len(paginas)} | Links: {sum(h.count('<a ') for h in paginas)}")
+    print(f"Legado : {t_legado * 1000:8.1f} ms")
+    print(f"Novo   : {t_novo * 1000:8.1f} ms  ({t_legado / t_novo:.1f}x)")
+
+
+# ==========================================
+# 2. EXTRAÇÃO DOS PDFs (motores do PDFProcessor)
+# ==========================================
+def _extrair(conteudo, motor, backend="auto"):
+    processor = PDFProcessor(db=BancoDeDados(":memory:"), sessao=object(), motor=motor, backend=backend)
+    try:
+        processor.extrair_pdf(conteudo, "bench", "bench")
+    except PDFAmbiguo:
+        return {}  # gabaritos de vários cargos: o robô marca FALHA e não grava nada
+    return dict(zip(processor.db.questoes.numeros, processor.db.questoes.respostas))
+
+
+def bench_extracao(pasta, motores=("classico", "layout"), repeticoes=3):
+    with open(os.path.join(pasta, "gabaritos.json"), encoding="utf-8") as f:
+        esperados = {nome: {int(n): r for n, r in gab.items()} for nome, gab in json.load(f).items()}
+
+    pdfs = {}
+    for nome in esperados:
+        with open(os.path.join(pasta, nome), 'rb') as f:
+            pdfs[nome] = f.read()
+    n_paginas = 0
+    for conteudo in pdfs.values():
+        with pdfplumber.open(io.BytesIO(conteudo)) as pdf:
+            n_paginas += len(pdf.pages)
+
+    print(f"PDFs: {len(pdfs)} | Páginas: {n_paginas} | Questões esperadas: {sum(map(len, esperados.values()))}\n")
+    print(f"{'Motor':<10} {'pág/s':>8} {'Corretas':>10} {'Erradas':>8} {'Faltando':>9} {'Extras':>7}")
+    for motor in motores:
+        tempo = _cronometrar(lambda: [_extrair(c, motor) for c in pdfs.values()], repeticoes)
+        corretas = erradas = faltando = extras = 0
+        for nome, conteudo in pdfs.items():
+            obtido, esperado = _extrair(conteudo, motor), esperados[nome]
+            corretas += sum(1 for n, r in esperado.items() if obtido.get(n) == r)
+            erradas += sum(1 for n, r in esperado.items() if n in obtido and obtido[n] != r)
+            faltando += sum(1 for n in esperado if n not in obtido)
+            extras += sum(1 for n in obtido if n not in esperado)
+        total = corretas + erradas + faltando
+        print(f"{motor:<10} {n_paginas / tempo:8.1f} {corretas:>5} ({corretas / total:.0%}) {erradas:>8} {faltando:>9} {extras:>7}")
+
+
+# ==========================================
+# 3. BACKENDS DE PDF (pdfplumber x pypdfium2)
+# ==========================================
+def _rodar_backend(backend, caminhos, n_paginas):
+    """Roda num processo próprio: tempo total, pico de memória (MB) e pares extraídos por PDF."""
+    pdfs = {}
+    for caminho in caminhos:
+        with open(caminho, 'rb') as f:
+            pdfs[os.path.basename(caminho)] = f.read()
+
+    inicio = time.perf_counter()
+    pares = {nome: _extrair(conteudo, "layout", backend) for nome, conteudo in pdfs.items()}
+    tempo = time.perf_counter() - inicio
+
+    try:
+        import resource  # só em Unix; ru_maxrss vem em KB no Linux
+        memoria = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        memoria = None
+    return n_paginas / tempo, memoria, pares
+
+
+def bench_backends(pasta, backends=("pdfplumber", "pdfium")):
+    caminhos = [os.path.join(pasta, nome) for nome in sorted(os.listdir(pasta)) if nome.lower().endswith('.pdf')]
+    n_paginas = 0
+    for caminho in caminhos:
+        with pdfplumber.open(caminho) as pdf:
+            n_paginas += len(pdf.pages)
+    print(f"PDFs: {len(caminhos)} | Páginas: {n_paginas}\n")
+
+    resultados = {}
+    for backend in backends:
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            resultados[backend] = executor.submit(_rodar_backend, backend, caminhos, n_paginas).result()
+
+    referencia = resultados[backends[0]][2]
+    print(f"{'Backend':<12} {'pág/s':>8} {'Memória (MB)':>13} {'Pares':>7} {f'Concordância c/ {backends[0]}':>28}")
+    for backend, (paginas_s, memoria, pares) in resultados.items():
+        iguais = total = 0
+        for nome, obtido in pares.items():
+            a, b = set(obtido.items()), set(referencia[nome].items())
+            iguais += len(a & b)
+            total += len(a | b)
+        memoria = f"{memoria:.0f}" if memoria is not None else "n/d"
+        concordancia = f"{iguais / total:.1%}" if total else "-"
+        print(f"{backend:<12} {paginas_s:8.1f} {memoria:>13} {sum(map(len, pares.values())):>7} {concordancia:>28}")
+
+
+# ==========================================
+# 4. GRAVAÇÃO NO SQLITE (BancoDeDados)
+# ==========================================
+def _gravar_legado(nome_banco, cargos):
+    """
+    Fluxo original: BancoDeDados novo (CREATE TABLE) e um connect/commit por cargo, INSERT seguido de SELECT.
+    O arquivo já fica em WAL pelo BancoDeDados atual, então a diferença medida é só a de conexão/lote.
+    """
+    for concurso, id_cargo, questoes in cargos:
+        BancoDeDados(nome_banco).fechar()
+        conn = sqlite3.connect(nome_banco)
+        cursor = conn.cursor()
+        cursor.execute("INSERT OR IGNORE INTO concursos (nome) VALUES (?)", (concurso,))
+        concurso_id = cursor.execute("SELECT id FROM concursos WHERE nome = ?", (concurso,)).fetchone()[0]
+        cursor.execute("INSERT OR IGNORE INTO cargos (concurso_id, nome_cargo, tipo_prova) VALUES (?, ?, ?)",
+                       (concurso_id, f"Cargo {id_cargo}", "CERTO_ERRADO"))
+        cargo_id = cursor.execute("SELECT id FROM cargos WHERE concurso_id = ? AND nome_cargo = ?",
+                                  (concurso_id, f"Cargo {id_cargo}")).fetchone()[0]
+        cursor.executemany("INSERT OR REPLACE INTO gabaritos (cargo_id, numero_questao, resposta, materia) VALUES (?, ?, ?, ?)",
+                           [(cargo_id, n, r, m) for n, r, m in questoes])
+        conn.commit()
+        conn.close()
+
+
+def _gravar_conexao(nome_banco, cargos, lote):
+    with ConexaoBanco(nome_banco, lote) as conexao:
+        db = BancoDeDados(conexao=conexao)
+        for concurso, id_cargo, questoes in cargos:
+            db.limpar()
+            for n, r, m in questoes:
+                db.questoes.adicionar(n, r, m)
+            db.salvar_no_banco(concurso, id_cargo)
+
+
+def bench_gravacao(n_cargos=500, lote=20):
+    n_cargos, lote = int(n_cargos), int(lote)
+    cargos = [(f"CONCURSO_{i // 10}", str(i % 10), [(n, "CE"[n % 2], "Geral") for n in range(1, 121)])
+              for i in range(n_cargos)]
+    print(f"Cargos: {n_cargos} | Questões: {n_cargos * 120} | Lote: {lote}\n")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        # Bancos novos a cada repetição: a conta é de gravação, não de INSERT OR REPLACE sobre linhas existentes
+        contador = iter(range(10 ** 6))
+        banco = lambda: os.path.join(pasta, f"bench_{next(contador)}.db")
+        t_legado = _cronometrar(lambda: _gravar_legado(banco(), cargos), 3)
+        t_novo = _cronometrar(lambda: _gravar_conexao(banco(), cargos, lote), 3)
+
+    print(f"Legado (1 conexão por cargo): {n_cargos / t_legado:8.0f} cargos/s")
+    print(f"ConexaoBanco (WAL, lote {lote}): {n_cargos / t_novo:8.0f} cargos/s  ({t_legado / t_novo:.1f}x)")
+
+
+# ==========================================
+# 5. POOL DE DRIVERS (sem Chrome)
+# ==========================================
+class _DriverFalso:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def quit(self):
+        with self.pool.lock_contagem:
+            self.pool.vivos -= 1
+
+
+class _PoolFalso(PoolDrivers):
+    """PoolDrivers cujo _criar devolve um driver falso e conta quantos estão vivos ao mesmo tempo."""
+    def __init__(self, tamanho, paginas_por_driver):
+        super().__init__(tamanho, paginas_por_driver, caminho_driver="falso")
+        self.lock_contagem = threading.Lock()
+        self.vivos = self.max_vivos = self.criados_total = 0
+
+    def _criar(self):
+        with self.lock_contagem:
+            self.vivos += 1
+            self.criados_total += 1
+            self.max_vivos = max(self.max_vivos, self.vivos)
+        return _DriverFalso(self)
+
+
+def _usar_driver(pool, i):
+    try:
+        with pool.emprestar():
+            time.sleep(0.0005)
+            if i % 7 == 0:
+                raise WebDriverException("crash simulado")
+    except WebDriverException:
+        pass
+
+
+class _CrawlerFalso(CebraspeCrawler):
+    """mapear_cargos instantâneo que registra quantas páginas já foram pedidas."""
+    def __init__(self, pool):
+        super().__init__(pool, sessao=object())
+        self.pedidas = 0
+
+    def mapear_cargos(self, url):
+        with self._lock_metricas:
+            self.pedidas += 1
+        return {url: {}}
+
+
+def bench_pool(n_tarefas=2000, tamanho=4):
+    n_tarefas, tamanho = int(n_tarefas), int(tamanho)
+    pool = _PoolFalso(tamanho, paginas_por_driver=5)
+
+    # Mais threads que drivers: quem espera precisa ser acordado quando um driver é descartado
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4 * tamanho) as executor:
+        futuros = [executor.submit(_usar_driver, pool, i) for i in range(n_tarefas)]
+        for futuro in futuros:
+            futuro.result(timeout=30)  # TimeoutError = alguém ficou preso esperando vaga
+    tempo = time.perf_counter() - inicio
+    pool.fechar()
+
+    assert pool.max_vivos <= tamanho, f"{pool.max_vivos} drivers vivos num pool de {tamanho}"
+    assert pool.vivos == 0 and pool._criados == 0, "drivers vazaram depois de fechar()"
+    print(f"Pool: {n_tarefas} empréstimos em {tempo:.2f} s | drivers criados: {pool.criados_total} | "
+          f"máx. vivos: {pool.max_vivos}/{tamanho}")
+
+    crawler = _CrawlerFalso(_PoolFalso(tamanho, 50))
+    urls = [f"url_{i}" for i in range(n_tarefas)]
+    adiantamento = 0
+    for consumidos, mapa in enumerate(crawler.mapear_varios(urls), 1):
+        assert mapa == {urls[consumidos - 1]: {}}, "mapear_varios fora de ordem"
+        adiantamento = max(adiantamento, crawler.pedidas - consumidos)
+    assert consumidos == n_tarefas
+    assert adiantamento <= 2 * tamanho, f"mapear_varios adiantou {adiantamento} páginas"
+    print(f"mapear_varios: {n_tarefas} páginas em ordem | adiantamento máx.: {adiantamento} (limite {2 * tamanho})")
+
+
+if __name__ == "__main__":
+    BENCHMARKS = {'links': bench_links, 'extracao': bench_extracao, 'backends': bench_backends,
+                  'gravacao': bench_gravacao, 'pool': bench_pool}
+
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print(__doc__)
+        sys.exit(1)
+    BENCHMARKS[sys.argv[1]](*sys.argv[2:])
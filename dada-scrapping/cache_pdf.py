@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import threading
+from collections import Counter
+
+from download import PDFBaixado, baixar_para_arquivo
+
+# ==========================================
+# CACHE LOCAL DE PDFs (ENDEREÇADO POR CONTEÚDO)
+# ==========================================
+class CachePDF:
+    """
+    Guarda cada PDF uma única vez em 'objetos/<sha256>.pdf' e mantém um índice
+    (indice.json) de URL -> {sha256, etag, last_modified, tamanho, acesso}.
+      - Revalida com GET condicional (If-None-Match / If-Modified-Since): 304 = usa o disco.
+      - offline=True nunca vai à rede: devolve o que houver no cache (ou None).
+      - Quando passa de 'limite_bytes', remove os objetos acessados há mais tempo (LRU). Objetos
+        entregues por obter() ficam presos até o PDFBaixado ser descartado (um parser na fila
+        nunca perde o arquivo).
+    O índice vai para o disco a cada SALVAR_A_CADA mudanças e em fechar().
+    Também guarda o resultado do parsing por hash ('extracoes/<sha256>.v<versao>.json'),
+    para que um PDF que não mudou não precise ser parseado de novo.
+    """
+    SALVAR_A_CADA = 50
+
+    def __init__(self, pasta="pdf_cache", limite_bytes=2 * 1024 ** 3, offline=False):
+        self.pasta = pasta
+        self.limite_bytes = limite_bytes
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._em_uso = Counter()  # sha256 -> nº de PDFBaixado entregues e ainda não descartados
+        self._mudancas = 0
+        self._pasta_objetos = os.path.join(pasta, "objetos")
+        self._pasta_extracoes = os.path.join(pasta, "extracoes")
+        self._arquivo_indice = os.path.join(pasta, "indice.json")
+        os.makedirs(self._pasta_objetos, exist_ok=True)
+        os.makedirs(self._pasta_extracoes, exist_ok=True)
+        self.indice = self._ler_indice()
+
+    # --- Download ---
+    def obter(self, sessao, url):
+        """
+        PDFBaixado apontando para o objeto no cache (válido ou recém-baixado), ou None se indisponível.
+        O download vai em streaming direto para a pasta de objetos.
+        """
+        with self._lock:
+            entrada = self.indice.get(url)
+            em_cache = self._objeto(entrada) if entrada else None
+
+        if self.offline:
+            return self._tocar(url, em_cache) if em_cache is not None else None
+
+        headers = {}
+        if em_cache is not None:
+            if entrada.get('etag'): headers['If-None-Match'] = entrada['etag']
+            if entrada.get('last_modified'): headers['If-Modified-Since'] = entrada['last_modified']
+
+        status, resposta_headers, baixado = baixar_para_arquivo(sessao, url, self._pasta_objetos, headers)
+        if status == 304 and em_cache is not None:
+            pdf = self._tocar(url, em_cache)
+            if pdf is not None:
+                return pdf
+            # Despejado enquanto revalidava: baixa de novo, sem GET condicional
+            status, resposta_headers, baixado = baixar_para_arquivo(sessao, url, self._pasta_objetos)
+        if baixado is None:
+            return None
+
+        return self._guardar(url, baixado, resposta_headers)
+
+    # --- Resultado do parsing ---
+    def ler_extracao(self, sha256, versao):
+        caminho = self._caminho_extracao(sha256, versao)
+        if not os.path.exists(caminho): return None
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+
+    def salvar_extracao(self, sha256, versao, pares):
+        caminho = self._caminho_extracao(sha256, versao)
+        self._escrever_atomico(caminho, json.dumps(pares).encode("utf-8"))
+
+    def fechar(self):
+        """Grava o índice se houver mudanças pendentes."""
+        with self._lock:
+            if self._mudancas:
+                self._salvar_indice()
+
+    # --- Internos ---
+    def _caminho_objeto(self, sha):
+        return os.path.join(self._pasta_objetos, f"{sha}.pdf")
+
+    def _caminho_extracao(self, sha, versao):
+        return os.path.join(self._pasta_extracoes, f"{sha}.v{versao}.json")
+
+    def _objeto(self, entrada):
+        caminho = self._caminho_objeto(entrada['sha256'])
+        if not os.path.exists(caminho): return None
+        return PDFBaixado(caminho, entrada['sha256'], entrada['tamanho'], temporario=False)
+
+    def _entregar(self, sha, tamanho):
+        """PDFBaixado do objeto, preso até ser descartado. Chamar com o lock."""
+        self._em_uso[sha] += 1
+        return PDFBaixado(self._caminho_objeto(sha), sha, tamanho, temporario=False,
+                          ao_descartar=lambda: self._soltar(sha))
+
+    def _soltar(self, sha):
+        with self._lock:
+            self._em_uso[sha] -= 1
+            if self._em_uso[sha] <= 0:
+                del self._em_uso[sha]
+
+    def _guardar(self, url, baixado, headers):
+        """Promove o arquivo baixado a objeto do cache (ou descarta se o conteúdo já existia)."""
+        caminho = self._caminho_objeto(baixado.sha256)
+        with self._lock:  # junto com o despejo: o objeto não some entre a promoção e a entrega
+            if os.path.exists(caminho):
+                baixado.descartar()
+            else:
+                os.replace(baixado.caminho, caminho)
+            self.indice[url] = {
+                'sha256': baixado.sha256,
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'tamanho': baixado.tamanho,
+                'acesso': time.time(),
+            }
+            pdf = self._entregar(baixado.sha256, baixado.tamanho)  # preso antes do despejo
+            self._despejar()
+            self._registrar_mudanca()
+            return pdf
+
+    def _tocar(self, url, em_cache):
+        """Atualiza o acesso e entrega o objeto preso; None se ele foi despejado nesse meio-tempo."""
+        with self._lock:
+            entrada = self.indice.get(url)
+            if entrada is None or entrada['sha256'] != em_cache.sha256 or not os.path.exists(em_cache.caminho):
+                return None
+            entrada['acesso'] = time.time()
+            self._registrar_mudanca()
+            return self._entregar(em_cache.sha256, em_cache.tamanho)
+
+    def _registrar_mudanca(self):
+        """Chamar com o lock."""
+        self._mudancas += 1
+        if self._mudancas >= self.SALVAR_A_CADA:
+            self._salvar_indice()
+
+    def _despejar(self):
+        """Remove objetos (e as URLs que apontam para eles) do menos para o mais recente até caber no limite."""
+        objetos = {}
+        for url, entrada in self.indice.items():
+            obj = objetos.setdefault(entrada['sha256'], {'tamanho': entrada['tamanho'], 'acesso': 0, 'urls': []})
+            obj['acesso'] = max(obj['acesso'], entrada['acesso'])
+            obj['urls'].append(url)
+
+        total = sum(o['tamanho'] for o in objetos.values())
+        if total <= self.limite_bytes: return
+
+        removidos = set()
+        for sha, obj in sorted(objetos.items(), key=lambda item: item[1]['acesso']):
+            if total <= self.limite_bytes: break
+            if sha in self._em_uso: continue  # ainda com algum parser; sai numa próxima rodada
+            for url in obj['urls']:
+                del self.indice[url]
+            try:
+                os.remove(self._caminho_objeto(sha))
+            except FileNotFoundError:
+                pass
+            total -= obj['tamanho']
+            removidos.add(sha)
+
+        # Extrações dos PDFs que acabaram de sair do cache
+        if not removidos: return
+        for nome in os.listdir(self._pasta_extracoes):
+            if nome.split('.')[0] in removidos:
+                try:
+                    os.remove(os.path.join(self._pasta_extracoes, nome))
+                except FileNotFoundError:
+                    pass
+
+    def _ler_indice(self):
+        if not os.path.exists(self._arquivo_indice): return {}
+        try:
+            with open(self._arquivo_indice, encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return {}
+
+    def _salvar_indice(self):
+        self._mudancas = 0
+        self._escrever_atomico(self._arquivo_indice, json.dumps(self.indice).encode("utf-8"))
+
+    @staticmethod
+    def _escrever_atomico(caminho, dados):
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, 'wb') as f:
+            f.write(dados)
+        os.replace(temporario, caminho)
@@ -1,155 +1,702 @@
 import io
 import re
-import time
-import unicodedata
 import os
 import sqlite3
+import queue
+import threading
+import unicodedata
+from urllib.parse import urlparse
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 import requests
 import pdfplumber
+from pdfminer.pdftypes import resolve1
+try:
+    import pypdfium2 as pdfium  # backend opcional (bem mais rápido para só extrair texto)
+except ImportError:
+    pdfium = None
+from requests.adapters import HTTPAdapter
+import lxml.html
+from lxml import etree
 from bs4 import BeautifulSoup
-from collections import defaultdict
+from collections import defaultdict, deque
 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 
-from model import QuestaoGabarito, BancoDeDados
+from model import BancoDeDados
+from download import baixar_para_arquivo
 from view import TerminalView
 
-class CebraspeCrawler:
-    def __init__(self):
-        self.view = TerminalView()
+# Links que interessam em cada página (cabeçalho e menu já têm <a> antes do conteúdo carregar)
+SELETOR_CONCURSOS = "a[href*='/concursos/']"
+SELETOR_PDFS = "a[href$='.pdf' i]"
+
+class _LinksEstaveis:
+    """
+    Condição de espera: página carregada e nº de links do 'seletor' acima de 'minimo' e igual em
+    duas checagens seguidas. Devolve esse nº (o until do WebDriverWait retorna o valor).
+    """
+    def __init__(self, seletor, minimo=0):
+        self.seletor = seletor
+        self.minimo = minimo
+        self.anterior = -1
 
-    def _normalizar_texto(self, texto):
-        return ''.join(c for c in unicodedata.normalize('NFD', texto) 
-                      if unicodedata.category(c) != 'Mn').upper()
+    def __call__(self, driver):
+        if driver.execute_script("return document.readyState") != "complete":
+            return False
+        n = len(driver.find_elements(By.CSS_SELECTOR, self.seletor))
+        estavel = n > self.minimo and n == self.anterior
+        self.anterior = n
+        return n if estavel else False
 
-    def _iniciar_driver(self):
+class PoolDrivers:
+    """
+    N Chromes headless de vida longa, emprestados um por vez (thread-safe).
+    O caminho do chromedriver é resolvido UMA vez; cada driver é reciclado após
+    'paginas_por_driver' páginas ou descartado se der erro de WebDriver (crash).
+    """
+    def __init__(self, tamanho=1, paginas_por_driver=50, caminho_driver=None):
+        self.tamanho = tamanho
+        self.paginas_por_driver = paginas_por_driver
+        self.caminho_driver = caminho_driver or ChromeDriverManager().install()
+        self._livres = []  # pilha: o driver devolvido por último é o próximo emprestado
+        self._criados = 0
+        # Acordada a cada driver devolvido ou descartado (vaga para criar outro)
+        self._vaga = threading.Condition()
+
+    def _criar(self):
         chrome_options = Options()
         chrome_options.add_argument("--headless")
         chrome_options.add_argument("--disable-gpu")
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--log-level=3")
-        service = Service(ChromeDriverManager().install())
+        service = Service(self.caminho_driver)
         return webdriver.Chrome(service=service, options=chrome_options)
 
+    def _pegar(self):
+        with self._vaga:
+            while not self._livres and self._criados >= self.tamanho:
+                self._vaga.wait()
+            if self._livres:
+                return self._livres.pop()
+            self._criados += 1
+        try:
+            return [self._criar(), 0]
+        except Exception:
+            self._liberar_vaga()
+            raise
+
+    def _devolver(self, item):
+        with self._vaga:
+            self._livres.append(item)
+            self._vaga.notify()
+
+    def _liberar_vaga(self):
+        with self._vaga:
+            self._criados -= 1
+            self._vaga.notify()
+
+    def _descartar(self, item):
+        try: item[0].quit()
+        except Exception: pass
+        self._liberar_vaga()
+
+    @contextmanager
+    def emprestar(self):
+        item = self._pegar()
+        try:
+            yield item[0]
+        except WebDriverException:
+            self._descartar(item)
+            raise
+        except BaseException:
+            self._devolver(item)
+            raise
+        item[1] += 1
+        if item[1] >= self.paginas_por_driver:
+            self._descartar(item)
+        else:
+            self._devolver(item)
+
+    def fechar(self):
+        with self._vaga:
+            livres, self._livres = self._livres, []
+        for item in livres:
+            self._descartar(item)
+
+class CebraspeCrawler:
+    def __init__(self, pool=None, timeout=15, sessao=None):
+        self.view = TerminalView()
+        self.pool = pool
+        self.timeout = timeout
+        self.sessao = sessao if sessao is not None else criar_sessao()
+        # Quantos concursos foram resolvidos por cada camada do mapear_cargos
+        self.metricas = {'http': 0, 'selenium': 0, 'sem_gabarito': 0, 'erro': 0}
+        self._lock_metricas = threading.Lock()
+
+    def _drivers(self):
+        # Criado só no primeiro uso (resolver o chromedriver custa uma ida à rede)
+        if self.pool is None:
+            self.pool = PoolDrivers()
+        return self.pool
+
+    def fechar(self):
+        if self.pool is not None:
+            self.pool.fechar()
+
+    def _esperar_links(self, driver, seletor, minimo=0):
+        """
+        Espera explícita no lugar do time.sleep fixo: segue assim que os links do 'seletor' passam
+        de 'minimo' e param de mudar (ou no timeout). Retorna quantos havia (0 no timeout).
+        """
+        try:
+            return WebDriverWait(driver, self.timeout, poll_frequency=0.5).until(_LinksEstaveis(seletor, minimo))
+        except TimeoutException:
+            return 0
+
     def listar_todos_concursos(self, url_encerrados):
         self.view.mostrar_status(f"Acessando listagem: {url_encerrados}...")
-        driver = self._iniciar_driver()
         try:
-            driver.get(url_encerrados)
-            time.sleep(6)
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            links = soup.find_all('a')
-            urls_concursos = set()
-
-            for link in links:
-                href = link.get('href', '')
-                if '/concursos/' in href and not href.endswith('#'):
-                    if not any(x in href for x in ['encerrado', 'vigente', 'proximos']):
-                        if href.startswith('/'):
-                            href = f"https://www.cebraspe.org.br{href}"
-                        urls_concursos.add(href)
-            
-            lista = list(urls_concursos)
+            with self._drivers().emprestar() as driver:
+                driver.get(url_encerrados)
+                n_concursos = self._esperar_links(driver, SELETOR_CONCURSOS)
+                # O scroll carrega mais linhas (lazy load): espera a lista crescer, ou o timeout
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                self._esperar_links(driver, SELETOR_CONCURSOS, minimo=n_concursos)
+                html = driver.page_source
+
+            lista = self._extrair_concursos(html)
             print(f"✅ Lista carregada: {len(lista)} concursos encontrados.")
             return lista
         except Exception as e:
             self.view.mostrar_erro(f"Erro ao listar: {e}")
             return []
-        finally:
-            driver.quit()
+
+    def _extrair_concursos(self, html):
+        soup = BeautifulSoup(html, 'html.parser')
+        links = soup.find_all('a')
+        urls_concursos = set()
+
+        for link in links:
+            href = link.get('href', '')
+            if '/concursos/' in href and not href.endswith('#'):
+                if not any(x in href for x in ['encerrado', 'vigente', 'proximos']):
+                    if href.startswith('/'):
+                        href = f"https://www.cebraspe.org.br{href}"
+                    urls_concursos.add(href)
+        
+        return list(urls_concursos)
 
     def mapear_cargos(self, url_pagina_concurso):
+        """
+        Camada 1: GET simples + lxml (a maioria das páginas já traz os links no HTML estático).
+        Camada 2: só se não aparecer nenhum 'GABARITO DEFINITIVO', renderiza no Chrome.
+        Retorna {} quando a página carregou sem gabaritos definitivos e None quando não foi
+        possível carregá-la (timeout, erro HTTP, Chrome caiu): aí o concurso vira FALHA e é
+        tentado de novo na próxima execução, em vez de ficar marcado como SEM_GABARITO.
+        """
         self.view.mostrar_status(f"Mapeando: {url_pagina_concurso}...")
-        driver = self._iniciar_driver()
+        cargos = self._mapear_via_http(url_pagina_concurso)
+        if cargos:
+            self._contar('http')
+            return cargos
+
+        # Mesmo com o HTML estático carregado, sem o Chrome não dá para afirmar que não há gabarito
+        cargos = self._mapear_via_selenium(url_pagina_concurso)
+        self._contar('erro' if cargos is None else 'selenium' if cargos else 'sem_gabarito')
+        return cargos
+
+    def _mapear_via_http(self, url_pagina_concurso):
+        """Cargos da página estática; None se ela não carregou."""
         try:
-            driver.get(url_pagina_concurso)
-            time.sleep(4)
-            html = driver.page_source
-            driver.quit()
-
-            soup = BeautifulSoup(html, 'html.parser')
-            links = soup.find_all('a')
-            cargos = defaultdict(dict)
-            
-            termos_validos = ["GABARITO", "DEFINITIVO"]
-            
-            for link in links:
-                texto_original = link.get_text(" ", strip=True)
-                texto_norm = self._normalizar_texto(texto_original)
-                href = link.get('href', '')
-                
-                if not href or len(href) < 5 or not href.lower().endswith('.pdf'):
-                    continue
-                if href.startswith('/'): href = f"https://www.cebraspe.org.br{href}"
-
-                if all(termo in texto_norm for termo in termos_validos):
-                    tipo = "basico"
-                    if "ESPECIFICO" in texto_norm: tipo = "especifico"
-                    
-                    match = re.search(r'CARGOS?.{0,30}?([\d\s,eE]+)', texto_norm)
-                    lista_ids = []
-                    if match:
-                        trecho = match.group(1)
-                        lista_ids = re.findall(r'\d+', trecho)
-                    
-                    if not lista_ids: lista_ids = re.findall(r'CARGO_?(\d+)', href.upper())
-                    if not lista_ids: lista_ids = ['1'] 
-
-                    if lista_ids:
-                        for cid in lista_ids:
-                            cargos[str(int(cid))][tipo] = href
+            response = self.sessao.get(url_pagina_concurso, verify=False, timeout=10)
+            if response.status_code != 200: return None
+            # Bytes em vez de .text: o BeautifulSoup detecta o charset melhor que o palpite do requests
+            return self._extrair_cargos(response.content)
+        except Exception:
+            return None
+
+    def _mapear_via_selenium(self, url_pagina_concurso):
+        """Cargos da página renderizada; None se o Chrome não conseguiu carregá-la."""
+        try:
+            with self._drivers().emprestar() as driver:
+                driver.get(url_pagina_concurso)
+                self._esperar_links(driver, SELETOR_PDFS)
+                html = driver.page_source
+            return self._extrair_cargos(html)
+        except Exception:
+            return None
+
+    def _contar(self, camada):
+        with self._lock_metricas:
+            self.metricas[camada] += 1
+
+    def resumo_metricas(self):
+        total = sum(self.metricas.values())
+        if not total: return "Nenhum concurso mapeado."
+        return " | ".join(f"{camada}: {n} ({n / total:.0%})" for camada, n in self.metricas.items())
+
+    def mapear_varios(self, urls, adiantados=None):
+        """
+        Gerador: mapeia os concursos em paralelo (um driver do pool por thread), na ordem de 'urls'.
+        No máximo 'adiantados' (padrão: 2x o pool) ficam submetidos à frente do consumidor, então
+        parar o consumo (ou um erro) não deixa milhares de páginas já mapeadas ou na fila.
+        """
+        n_workers = self._drivers().tamanho
+        adiantados = adiantados or 2 * n_workers
+        pendentes = deque()
+        executor = ThreadPoolExecutor(max_workers=n_workers)
+        try:
+            for url in urls:
+                pendentes.append(executor.submit(self.mapear_cargos, url))
+                if len(pendentes) >= adiantados:
+                    yield pendentes.popleft().result()
+            while pendentes:
+                yield pendentes.popleft().result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _extrair_cargos(self, html):
+        cargos = defaultdict(dict)
+        if not html: return cargos
+        try:
+            doc = lxml.html.fromstring(html)
+        except (etree.ParserError, ValueError):
             return cargos
-        except:
-            try: driver.quit()
-            except: pass
-            return {}
+
+        for link in doc.iter('a'):
+            href = link.get('href', '')
+            # Filtro barato primeiro: só links de PDF chegam à normalização/regex
+            if not href or len(href) < 5 or not href.lower().endswith('.pdf'):
+                continue
+
+            # Mesmo texto que get_text(" ", strip=True) do BeautifulSoup
+            texto = " ".join(t for t in (s.strip() for s in link.itertext()) if t)
+            classificacao = classificar_link(texto, href)
+            if classificacao is None:
+                continue
+
+            if href.startswith('/'): href = f"https://www.cebraspe.org.br{href}"
+            tipo, lista_ids = classificacao
+            for cid in lista_ids:
+                cargos[str(int(cid))][tipo] = href
+        return cargos
+
+# ==========================================
+# CLASSIFICAÇÃO DOS LINKS DE GABARITO
+# ==========================================
+# Tabela de tradução montada uma vez (substitui NFD + filtro por categoria, caractere a caractere).
+# Só cobre letras compostas (NFC): texto decomposto é recomposto antes, e o que sobrar fora do ASCII
+# (acentos fora da tabela) passa pelo caminho antigo
+_SEM_ACENTO = str.maketrans(
+    "ÁÀÂÃÄÉÈÊËÍÌÎÏÓÒÔÕÖÚÙÛÜÇáàâãäéèêëíìîïóòôõöúùûüç",
+    "AAAAAEEEEIIIIOOOOOUUUUCaaaaaeeeeiiiiooooouuuuc",
+)
+
+# Uma passada: exige GABARITO e DEFINITIVO, captura ESPECIFICO (se houver) e o trecho com os nº dos cargos
+_RE_LINK_GABARITO = re.compile(
+    r'^(?=.*?GABARITO)(?=.*?DEFINITIVO)(?:(?=.*?(ESPECIFICO)))?(?:.*?CARGOS?.{0,30}?([\d\s,E]+))?',
+    re.S,
+)
+_RE_DIGITOS = re.compile(r'\d+')
+_RE_CARGO_HREF = re.compile(r'CARGO_?(\d+)')
+
+# Pré-varredura do content stream: strings literais e o operador 'Do' (desenha XObject)
+_RE_LITERAL_PDF = re.compile(rb'\((?:\\.|[^\\()])*\)')
+_RE_OPERADOR_XOBJECT = re.compile(rb'/[^\s/]+\s+Do\b')
+
+# Tokens do motor 'layout': nº de questão ('12', '12.', '12-') e letra de gabarito
+_RE_TOKEN_NUMERO = re.compile(r'(\d{1,3})[.\-]?')
+_RE_TOKEN_LETRA = re.compile(r'[A-E]|X')
+_MARCAS_ANULADA = frozenset({'*', '**', '#'})
+
+def normalizar_texto(texto):
+    texto = unicodedata.normalize('NFC', texto).translate(_SEM_ACENTO)
+    if not texto.isascii():
+        texto = ''.join(c for c in unicodedata.normalize('NFD', texto) if unicodedata.category(c) != 'Mn')
+    return texto.upper()
+
+def classificar_link(texto, href):
+    """
+    ('basico' | 'especifico', [ids dos cargos]) para um link de gabarito definitivo, senão None.
+    Sem nº de cargo no texto, tenta 'CARGO_n' na URL; sem nada, assume o cargo 1.
+    """
+    match = _RE_LINK_GABARITO.match(normalizar_texto(texto))
+    if match is None:
+        return None
+
+    tipo = "especifico" if match.group(1) else "basico"
+    lista_ids = _RE_DIGITOS.findall(match.group(2)) if match.group(2) else []
+    if not lista_ids: lista_ids = _RE_CARGO_HREF.findall(href.upper())
+    if not lista_ids: lista_ids = ['1']
+    return tipo, lista_ids
+
+def criar_sessao(max_conexoes=10):
+    """Sessão HTTP com pool de conexões (keep-alive) para reaproveitar entre downloads."""
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=max_conexoes, pool_maxsize=max_conexoes)
+    sessao.mount("https://", adaptador)
+    sessao.mount("http://", adaptador)
+    sessao.headers.update({'User-Agent': 'Mozilla/5.0'})
+    return sessao
+
+class PaginaPdfium:
+    """
+    Página lida pelo pypdfium2 com a interface mínima que o motor 'layout' usa do pdfplumber
+    (extract_words com x0/x1/top/height/text, 'top' medido a partir do alto da página).
+    """
+    def __init__(self, pagina):
+        self._pagina = pagina
+        self._textpage = pagina.get_textpage()
+        self.height = pagina.get_height()
+        self._texto = self._textpage.get_text_range()
+
+    def relevante(self):
+        """Mesma regra da pré-varredura do pdfplumber, mas sobre o texto já extraído (custo ~zero)."""
+        visiveis = "".join(self._texto.split())
+        return PDFProcessor._muitos_digitos(sum(c.isdigit() for c in visiveis), len(visiveis))
+
+    def extract_words(self):
+        palavras, atual = [], None
+        for i, caractere in enumerate(self._texto):
+            if caractere.isspace():
+                atual = None
+                continue
+            esquerda, base, direita, topo = self._textpage.get_charbox(i, loose=True)
+            altura = topo - base
+            # Espaço visual grande ou mudança de linha também separam palavras
+            if atual is not None and (esquerda - atual['x1'] > 0.3 * altura or abs(topo - atual['_topo']) > 0.5 * altura):
+                atual = None
+            if atual is None:
+                atual = {'text': '', 'x0': esquerda, 'x1': direita, '_topo': topo,
+                         'top': self.height - topo, 'height': altura}
+                palavras.append(atual)
+            atual['text'] += caractere
+            atual['x1'] = max(atual['x1'], direita)
+        return palavras
+
+    def close(self):
+        self._textpage.close()
+        self._pagina.close()
+
+class PDFAmbiguo(Exception):
+    """A numeração recomeça no PDF: gabaritos de mais de um cargo, sem como saber qual é o pedido."""
+    pass
+
 
 class PDFProcessor:
-    def __init__(self):
-        self.db = BancoDeDados()
+    # Suba este número sempre que as estratégias de extração mudarem (invalida o cache de parsing)
+    VERSAO_EXTRATOR = 5
+
+    # Fração dos números de uma página que precisa repetir (a partir do 1) para valer como
+    # "a numeração recomeçou": um número solto repetido (cabeçalho, ruído) não basta
+    FRACAO_REINICIO = 0.5
+
+    def __init__(self, db=None, sessao=None, cache=None, motor="layout", backend="auto", estado=None):
+        """
+        motor: 'layout' (extract_words, uma passada por página) ou 'classico' (tabela + texto + regex).
+        backend: 'pdfplumber', 'pdfium' (só texto com coordenadas; requer motor 'layout') ou
+                 'auto' = pdfium quando possível, caindo para o pdfplumber se ele não achar nada.
+        estado: EstadoCrawl opcional, de onde vem o nº de questões que cada URL rendeu antes.
+        """
+        self.db = db if db is not None else BancoDeDados()
         self.view = TerminalView()
+        self.sessao = sessao if sessao is not None else criar_sessao()
+        self.cache = cache
+        self.motor = motor
+        self.backend = backend
+        self.estado = estado
+        self._questoes_por_url = {}  # nesta execução (o mesmo PDF costuma servir a vários cargos)
+
+    def esperadas(self, url_pdf):
+        """Nº de questões que este PDF rendeu antes (nesta execução ou numa anterior), ou None."""
+        if url_pdf in self._questoes_por_url:
+            return self._questoes_por_url[url_pdf]
+        return self.estado.questoes_anteriores(url_pdf) if self.estado is not None else None
+
+    def registrar_questoes(self, url_pdf, quantidade):
+        if quantidade:
+            self._questoes_por_url[url_pdf] = quantidade
 
     def limpar_memoria(self):
-        self.db = BancoDeDados()
+        self.db.limpar()
+
+    def baixar_pdf(self, url_pdf):
+        """
+        PDFBaixado (arquivo em disco + SHA-256), ou None se o servidor não responder 200.
+        Download em streaming: a memória não cresce com o tamanho do PDF nem com o nº de downloads.
+        """
+        if self.cache is not None:
+            return self.cache.obter(self.sessao, url_pdf)
+        _, _, baixado = baixar_para_arquivo(self.sessao, url_pdf)
+        return baixado
 
     def processar_pdf(self, url_pdf, nome_concurso, tipo_materia):
+        """Baixa e extrai um PDF. Retorna o registro para o estado incremental (ver registro_pdf)."""
+        pdf = None
+        inicio = len(self.db.questoes)
         try:
             self.view.mostrar_status(f"   -> Baixando {tipo_materia}...")
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(url_pdf, headers=headers, verify=False, timeout=30)
-            if response.status_code != 200: return
-
-            arquivo_pdf = io.BytesIO(response.content)
-
-            with pdfplumber.open(arquivo_pdf) as pdf:
-                for i, pagina in enumerate(pdf.pages):
-                    # ESTRATÉGIA 1: Tabelas (Se houver linhas desenhadas)
-                    tabelas = pagina.extract_tables()
-                    if tabelas:
-                        for tabela in tabelas:
-                            self._estrategia_tabela(tabela, nome_concurso, tipo_materia)
-                    
-                    # Se tabelas não funcionaram bem, tenta texto
-                    texto = pagina.extract_text()
-                    if texto:
-                        # ESTRATÉGIA 2: Horizontal (Cebraspe Clássico)
-                        # Onde uma linha tem "1 2 3" e a debaixo tem "C E C"
-                        achou_horizontal = self._estrategia_horizontal(texto, nome_concurso, tipo_materia)
-                        
-                        # ESTRATÉGIA 3: Vertical/Regex (Se Horizontal falhar)
-                        if not achou_horizontal:
-                            self._estrategia_regex_vertical(texto, nome_concurso, tipo_materia)
+            pdf = self.baixar_pdf(url_pdf)
+            if pdf is None: return registro_pdf(url_pdf)
+
+            questoes = self.extracao_em_cache(pdf, nome_concurso, tipo_materia)
+            if questoes is not None:
+                for registro in questoes:
+                    self.db.questoes.adicionar(*registro)
+                self.registrar_questoes(url_pdf, len(questoes))
+                return registro_pdf(url_pdf, pdf, "cache", len(questoes))
+
+            estrategia = self.extrair_pdf(pdf.caminho, nome_concurso, tipo_materia, self.esperadas(url_pdf))
+            novas = list(self.db.questoes)[inicio:]
+            self.guardar_extracao(pdf, novas)
+            self.registrar_questoes(url_pdf, len(novas))
+            return registro_pdf(url_pdf, pdf, estrategia, len(novas))
 
         except Exception as e:
             print(f"      [Erro Leitura] {str(e)[:50]}")
+            return registro_pdf(url_pdf, pdf)
+        finally:
+            if pdf is not None: pdf.descartar()
+
+    def extracao_em_cache(self, pdf, nome_concurso, tipo_materia):
+        """Questões (numero, resposta, materia, estrategia) já extraídas deste mesmo PDF numa execução anterior, ou None."""
+        if self.cache is None: return None
+        pares = self.cache.ler_extracao(pdf.sha256, self._versao_cache())
+        if pares is None: return None
+        return [(n, r, tipo_materia, "cache") for n, r in pares]
+
+    def guardar_extracao(self, pdf, questoes):
+        if self.cache is None: return
+        pares = [(numero, resposta) for numero, resposta, _, _ in questoes]
+        self.cache.salvar_extracao(pdf.sha256, self._versao_cache(), pares)
+
+    def _versao_cache(self):
+        return f"{self.VERSAO_EXTRATOR}-{self.motor}-{self.backend}"
+
+    def extrair_pdf(self, fonte, nome_concurso, tipo_materia, esperadas=None):
+        """
+        'fonte' é o caminho do PDF em disco (ou seus bytes). Roda o motor nas páginas relevantes. Retorna as estratégias que renderam questões (ex.: 'tabela+horizontal').
+        Para cedo quando já tem as 'esperadas' questões (de 1 até o fim). Se a numeração recomeça
+        depois de um gabarito completo (gabaritos de vários cargos no mesmo PDF), levanta PDFAmbiguo
+        sem deixar nada no acumulador: gravar o primeiro bloco daria a todos os cargos que apontam
+        para este PDF o gabarito do primeiro cargo. O PDF fica como FALHA.
+        """
+        # Tabelas (motor clássico) só existem no pdfplumber
+        if self.backend != "pdfplumber" and self.motor == "layout" and pdfium is not None:
+            marca = self.db.questoes.marca()
+            try:
+                documento = pdfium.PdfDocument(fonte)
+                try:
+                    estrategia = self._extrair_paginas(self._paginas_pdfium(documento), nome_concurso, tipo_materia, esperadas)
+                finally:
+                    documento.close()
+            except PDFAmbiguo:
+                raise
+            except Exception:
+                # 'auto': PDF que o pdfium não abre (ou quebra no meio) ainda tem a chance do pdfplumber
+                if self.backend == "pdfium":
+                    raise
+                estrategia = None
+            if estrategia or self.backend == "pdfium":
+                return estrategia
+            # O pdfplumber recomeça do zero: nada do que a passada do pdfium deixou pela metade fica
+            self.db.questoes.desfazer(marca)
+
+        with pdfplumber.open(fonte if isinstance(fonte, str) else io.BytesIO(fonte)) as pdf:
+            return self._extrair_paginas(pdf.pages, nome_concurso, tipo_materia, esperadas)
+
+    @staticmethod
+    def _paginas_pdfium(documento):
+        for indice in range(len(documento)):
+            pagina = PaginaPdfium(documento[indice])
+            try:
+                yield pagina
+            finally:
+                pagina.close()
+
+    def _extrair_paginas(self, paginas, nome_concurso, tipo_materia, esperadas):
+        questoes = self.db.questoes
+        inicio = len(questoes)
+        marca_pdf = questoes.marca()
+        encontradas = set()
+
+        for pagina in paginas:
+            relevante = pagina.relevante() if isinstance(pagina, PaginaPdfium) else self._pagina_relevante(pagina)
+            if not relevante:
+                continue
+
+            marca = questoes.marca()
+            if self.motor == "classico":
+                self._pagina_classica(pagina, nome_concurso, tipo_materia)
+            else:
+                self._estrategia_layout(pagina, nome_concurso, tipo_materia)
+
+            vistas = set(questoes.tentativas[marca[2]:])
+            if self._numeracao_recomecou(vistas, encontradas):
+                questoes.desfazer(marca_pdf)
+                raise PDFAmbiguo("gabaritos de mais de um cargo no mesmo PDF")
 
+            encontradas |= vistas
+            if esperadas and len(encontradas) >= esperadas and self._sequencia_completa(encontradas):
+                break
+
+        return "+".join(questoes.estrategias_usadas(inicio)) or None
+
+    def _numeracao_recomecou(self, vistas, encontradas):
+        """A página repete, a partir do 1, boa parte dos números de um gabarito que já estava completo."""
+        repetidas = vistas & encontradas
+        return (1 in repetidas and len(repetidas) >= self.FRACAO_REINICIO * len(vistas)
+                and self._sequencia_completa(encontradas))
+
+    @staticmethod
+    def _sequencia_completa(numeros):
+        """1..max (quase) todo presente; tolera ~10% de buracos (anuladas em branco)."""
+        return bool(numeros) and len(numeros) >= 0.9 * max(numeros)
+
+    @staticmethod
+    def _pagina_relevante(pagina):
+        """
+        Pré-varredura barata, sem montar o layout (que é o custo dominante do pdfplumber):
+        lê os textos literais '(...)' do content stream e exige muitos dígitos
+        (>= 10 e >= 10% dos caracteres, ou >= 100). Se o texto não for legível assim
+        (fontes CID/hex, texto dentro de XObjects), não dá para julgar e a página é processada.
+        """
+        try:
+            dados = b"".join(resolve1(stream).get_data() for stream in pagina.page_obj.contents)
+        except Exception:
+            return True
+
+        literais = b"".join(_RE_LITERAL_PDF.findall(dados))
+        if not literais or _RE_OPERADOR_XOBJECT.search(dados):
+            return True
+
+        visiveis = literais.translate(None, b" ()\\")
+        digitos = len(visiveis) - len(visiveis.translate(None, b"0123456789"))
+        return PDFProcessor._muitos_digitos(digitos, len(visiveis))
+
+    @staticmethod
+    def _muitos_digitos(digitos, total):
+        return digitos >= 100 or (digitos >= 10 and digitos >= 0.1 * total)
+
+    def _pagina_classica(self, pagina, nome_concurso, tipo_materia):
+        """Motor original: três estratégias por página (tabelas, linhas de texto, regex)."""
+        # ESTRATÉGIA 1: Tabelas (Se houver linhas desenhadas)
+        tabelas = pagina.extract_tables()
+        if tabelas:
+            for tabela in tabelas:
+                self._estrategia_tabela(tabela, nome_concurso, tipo_materia)
+        
+        # Se tabelas não funcionaram bem, tenta texto
+        texto = pagina.extract_text()
+        if texto:
+            # ESTRATÉGIA 2: Horizontal (Cebraspe Clássico)
+            # Onde uma linha tem "1 2 3" e a debaixo tem "C E C"
+            achou_horizontal = self._estrategia_horizontal(texto, nome_concurso, tipo_materia)
+            
+            # ESTRATÉGIA 3: Vertical/Regex (Se Horizontal falhar)
+            if not achou_horizontal:
+                self._estrategia_regex_vertical(texto, nome_concurso, tipo_materia)
+
+    # --- Motor 'layout' ---
+    def _estrategia_layout(self, pagina, concurso, materia):
+        """
+        Uma passada de layout (extract_words) por página. As palavras são agrupadas em linhas pelo 'top':
+          - Linha de números seguida de linha de letras: cada número recebe a letra alinhada no eixo x
+            (questão sem letra embaixo é pulada, sem desalinhar as demais como fazia o min(len)).
+          - Se a página não tiver esse formato, lê pares 'número letra' lado a lado (tabelas verticais),
+            só em linhas feitas (quase) só de números e letras: 'conforme 10 E 11' num parágrafo não é gabarito.
+        """
+        linhas = self._agrupar_linhas(pagina.extract_words())
+        tipos = [self._tipo_linha(linha) for linha in linhas]
+
+        achou = False
+        for i in range(len(linhas) - 1):
+            if tipos[i] == 'numeros' and tipos[i + 1] == 'letras':
+                for num, letra in self._parear_por_x(linhas[i], linhas[i + 1]):
+                    self._add(num, letra, materia, "layout-horizontal")
+                    achou = True
+        if achou: return "layout-horizontal"
+
+        for linha in linhas:
+            if not self._linha_de_pares(linha): continue
+            for num, letra in self._pares_na_linha(linha):
+                self._add(num, letra, materia, "layout-pares")
+                achou = True
+        return "layout-pares" if achou else None
+
+    @staticmethod
+    def _agrupar_linhas(palavras):
+        """Palavras com 'top' próximo (até meia altura de fonte) formam uma linha, ordenada por x."""
+        linhas = []
+        for palavra in sorted(palavras, key=lambda p: (p['top'], p['x0'])):
+            if linhas and abs(palavra['top'] - linhas[-1][0]['top']) <= max(2.0, 0.5 * palavra['height']):
+                linhas[-1].append(palavra)
+            else:
+                linhas.append([palavra])
+        return [sorted(linha, key=lambda p: p['x0']) for linha in linhas]
+
+    @staticmethod
+    def _numero(texto):
+        match = _RE_TOKEN_NUMERO.fullmatch(texto)
+        return match.group(1) if match else None
+
+    @staticmethod
+    def _letra(texto):
+        if texto in _MARCAS_ANULADA: return 'X'
+        return texto if _RE_TOKEN_LETRA.fullmatch(texto) else None
+
+    def _tipo_linha(self, linha):
+        """'numeros' / 'letras' se a linha for (quase) só isso e tiver pelo menos 5 itens."""
+        numeros = sum(1 for p in linha if self._numero(p['text']))
+        letras = sum(1 for p in linha if self._letra(p['text']))
+        if numeros >= 5 and numeros >= 0.6 * len(linha): return 'numeros'
+        if letras >= 5 and letras >= 0.6 * len(linha): return 'letras'
+        return None
+
+    def _linha_de_pares(self, linha):
+        """Pelo menos 80% das palavras da linha são números ou letras de resposta."""
+        uteis = sum(1 for p in linha if self._numero(p['text']) or self._letra(p['text']))
+        return uteis >= 0.8 * len(linha)
+
+    def _parear_por_x(self, linha_numeros, linha_letras):
+        numeros = [((p['x0'] + p['x1']) / 2, self._numero(p['text'])) for p in linha_numeros]
+        numeros = [(x, n) for x, n in numeros if n]
+        letras = [((p['x0'] + p['x1']) / 2, self._letra(p['text'])) for p in linha_letras]
+        letras = [(x, l) for x, l in letras if l]
+
+        # Tolerância: metade do espaçamento típico entre colunas de números
+        espacos = sorted(b[0] - a[0] for a, b in zip(numeros, numeros[1:]))
+        tolerancia = 0.5 * espacos[len(espacos) // 2] if espacos else 10.0
+
+        pares, j = [], 0
+        for x, num in numeros:
+            while j < len(letras) and letras[j][0] < x - tolerancia:
+                j += 1
+            if j < len(letras) and abs(letras[j][0] - x) <= tolerancia:
+                pares.append((num, letras[j][1]))
+                j += 1
+        return pares
+
+    def _pares_na_linha(self, linha):
+        pares, i = [], 0
+        while i < len(linha) - 1:
+            num, letra = self._numero(linha[i]['text']), self._letra(linha[i + 1]['text'])
+            if num and letra:
+                pares.append((num, letra))
+                i += 2
+            else:
+                i += 1
+        return pares
+
+    # --- Motor 'classico' ---
     def _estrategia_tabela(self, tabela, concurso, materia):
         for linha in tabela:
             # Filtra None e vazios
@@ -158,7 +705,7 @@ class PDFProcessor:
             
             # Formato: [Numero, Letra]
             if linha[0].isdigit() and len(linha[1]) == 1:
-                self._add(concurso, linha[0], linha[1], materia)
+                self._add(linha[0], linha[1], materia, "tabela")
 
     def _estrategia_horizontal(self, texto, concurso, materia):
         """
@@ -192,7 +739,7 @@ class PDFProcessor:
                     continue
 
                 for k in range(qtd):
-                    self._add(concurso, numeros[k], letras[k], materia)
+                    self._add(numeros[k], letras[k], materia, "horizontal")
                     questoes_adicionadas += 1
         
         return questoes_adicionadas > 0
@@ -206,22 +753,166 @@ class PDFProcessor:
         resultados = re.findall(padrao, texto)
         
         for numero, letra in resultados:
-            self._add(concurso, numero, letra, materia)
+            self._add(numero, letra, materia, "vertical")
 
-    def _add(self, concurso, num, letra, materia):
+    def _add(self, num, letra, materia, estrategia):
         try:
             n = int(num)
             # Filtro: Questões válidas (1 a 250) e ignora anos (2020, 2023)
             if 0 < n < 250:
-                q = QuestaoGabarito(concurso, n, letra.upper(), materia)
-                self.db.adicionar_questao(q)
+                self.db.questoes.adicionar(n, letra.upper(), materia, estrategia)
         except:
             pass
 
     def salvar_final(self, nome_concurso, id_cargo):
-        if self.db.dados_temporarios:
+        """Grava o cargo; retorna True se algo foi salvo."""
+        if self.db.questoes:
             sucesso, qtd, tipo = self.db.salvar_no_banco(nome_concurso, id_cargo)
             if sucesso:
                 print(f"      💾 Salvo: Cargo {id_cargo} | {qtd} questões ({tipo})")
-        else:
-            print(f"      ⚠️  Nada extraído para Cargo {id_cargo}")
\ No newline at end of file
+            if self.db.questoes.conflitos:
+                print(f"      ⚠️  {len(self.db.questoes.conflitos)} questões com respostas divergentes entre estratégias (mantida a primeira)")
+            return bool(sucesso)
+        print(f"      ⚠️  Nada extraído para Cargo {id_cargo}")
+        return False
+
+def registro_pdf(url, pdf=None, estrategia=None, questoes=0):
+    """O que o modo incremental guarda de cada PDF processado (ver EstadoCrawl.marcar_pdfs)."""
+    return {
+        'url': url,
+        'sha256': pdf.sha256 if pdf is not None else None,
+        'estrategia': estrategia,
+        'questoes': questoes,
+    }
+
+def extrair_questoes_pdf(caminho, nome_concurso, tipo_materia, motor="layout", backend="auto", esperadas=None):
+    """
+    Roda num processo do pool: parseia o PDF em 'caminho' e devolve
+    ([(numero, resposta, materia, estrategia)], estratégias usadas), sem tocar no banco.
+    """
+    processor = PDFProcessor(db=BancoDeDados(":memory:"), motor=motor, backend=backend)
+    estrategia = processor.extrair_pdf(caminho, nome_concurso, tipo_materia, esperadas)
+    return list(processor.db.questoes), estrategia
+
+class PipelineGabaritos:
+    """
+    Modo pipeline do robô:
+      - downloads numa ThreadPool (sessão compartilhada, no máximo 'max_por_host' por servidor);
+      - parsing num ProcessPool (pdfplumber é CPU-bound);
+      - UMA thread escritora que grava cada cargo no SQLite assim que seus PDFs ficam prontos.
+    """
+    MATERIAS = (('basico', "Conhec. Básicos"), ('especifico', "Conhec. Específicos"))
+
+    def __init__(self, processor, max_downloads=8, max_por_host=4, max_parsers=None, estado=None):
+        self.processor = processor
+        self.max_downloads = max_downloads
+        self.max_por_host = max_por_host
+        self.max_parsers = max_parsers
+        self.estado = estado
+        self._semaforos = {}
+        self._lock = threading.Lock()
+        self._fila = queue.Queue()
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, tipo_exc, *exc):
+        self.finalizar(cancelar=tipo_exc is KeyboardInterrupt)
+        return False
+
+    def iniciar(self):
+        self._downloads = ThreadPoolExecutor(max_workers=self.max_downloads)
+        self._parsers = ProcessPoolExecutor(max_workers=self.max_parsers)
+        self._escritor = threading.Thread(target=self._escrever, daemon=True)
+        self._escritor.start()
+
+    def finalizar(self, cancelar=False):
+        """
+        Espera downloads, parsing e gravação terminarem (nessa ordem).
+        cancelar=True descarta o que ainda está na fila: esses cargos ficam PENDENTE no estado incremental.
+        """
+        self._downloads.shutdown(wait=True, cancel_futures=cancelar)
+        self._parsers.shutdown(wait=True, cancel_futures=cancelar)
+        self._fila.put(None)
+        self._escritor.join()
+
+    def enviar_concurso(self, nome_concurso, mapa_cargos, url_concurso=None):
+        for id_cargo, links in mapa_cargos.items():
+            chave = (nome_concurso, id_cargo)
+            pdfs = [(links[tipo], materia) for tipo, materia in self.MATERIAS if tipo in links]
+            # O registro entra na fila antes dos resultados, então o escritor sempre o vê primeiro
+            self._fila.put(('cargo', chave, ([materia for _, materia in pdfs], url_concurso)))
+            for url, materia in pdfs:
+                self._downloads.submit(self._baixar, chave, url, materia)
+
+    def _semaforo(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._semaforos:
+                self._semaforos[host] = threading.Semaphore(self.max_por_host)
+            return self._semaforos[host]
+
+    def _baixar(self, chave, url, materia):
+        try:
+            with self._semaforo(url):
+                pdf = self.processor.baixar_pdf(url)
+        except Exception as e:
+            print(f"      [Erro Download] {str(e)[:50]}")
+            pdf = None
+
+        if pdf is None:
+            self._fila.put(('pdf', chave, (materia, [], registro_pdf(url))))
+            return
+
+        # PDF idêntico ao de uma execução anterior: reaproveita o parsing
+        questoes = self.processor.extracao_em_cache(pdf, chave[0], materia)
+        if questoes is not None:
+            pdf.descartar()
+            self.processor.registrar_questoes(url, len(questoes))
+            self._fila.put(('pdf', chave, (materia, questoes, registro_pdf(url, pdf, "cache", len(questoes)))))
+            return
+
+        # Só o caminho vai para o processo de parsing (nada de bytes do PDF na fila)
+        futuro = self._parsers.submit(extrair_questoes_pdf, pdf.caminho, chave[0], materia,
+                                       self.processor.motor, self.processor.backend, self.processor.esperadas(url))
+        futuro.add_done_callback(lambda f: self._entregar(f, chave, url, materia, pdf))
+
+    def _entregar(self, futuro, chave, url, materia, pdf):
+        pdf.descartar()
+        if futuro.cancelled(): return  # interrompido: o cargo fica pendente
+        try:
+            questoes, estrategia = futuro.result()
+        except Exception as e:
+            print(f"      [Erro Leitura] {str(e)[:50]}")
+            self._fila.put(('pdf', chave, (materia, [], registro_pdf(url, pdf))))
+            return
+        self.processor.guardar_extracao(pdf, questoes)
+        self.processor.registrar_questoes(url, len(questoes))
+        self._fila.put(('pdf', chave, (materia, questoes, registro_pdf(url, pdf, estrategia, len(questoes)))))
+
+    def _escrever(self):
+        pendentes = {}
+        while True:
+            item = self._fila.get()
+            if item is None: break
+            tipo, chave, valor = item
+            if tipo == 'cargo':
+                ordem, url_concurso = valor
+                pendentes[chave] = {'ordem': ordem, 'url_concurso': url_concurso, 'questoes': {}, 'registros': []}
+            else:
+                materia, questoes, registro = valor
+                pendentes[chave]['questoes'][materia] = questoes
+                pendentes[chave]['registros'].append(registro)
+
+            cargo = pendentes[chave]
+            if len(cargo['questoes']) == len(cargo['ordem']):
+                # Mesma ordem do modo sequencial (básico, depois específico)
+                self.processor.limpar_memoria()
+                for materia in cargo['ordem']:
+                    for registro in cargo['questoes'][materia]:
+                        self.processor.db.questoes.adicionar(*registro)
+                salvo = self.processor.salvar_final(*chave)
+                if self.estado is not None and cargo['url_concurso']:
+                    self.estado.marcar_pdfs(cargo['url_concurso'], chave[1], cargo['registros'], salvo)
+                del pendentes[chave]
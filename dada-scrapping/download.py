@@ -0,0 +1,70 @@
+import os
+import hashlib
+import tempfile
+
+# ==========================================
+# DOWNLOAD EM STREAMING (PDF DIRETO PARA O DISCO)
+# ==========================================
+LIMITE_PDF_BYTES = 50 * 1024 ** 2
+TAMANHO_BLOCO = 64 * 1024
+TIMEOUT = (10, 30)  # (conexão, leitura de cada bloco)
+
+
+class PDFGrandeDemais(Exception):
+    pass
+
+
+class PDFBaixado:
+    """
+    PDF já gravado em disco, com SHA-256 e tamanho calculados durante o download.
+    ao_descartar: chamado uma única vez em descartar() (o CachePDF solta o objeto, que volta a poder ser removido).
+    """
+    def __init__(self, caminho, sha256, tamanho, temporario=True, ao_descartar=None):
+        self.caminho = caminho
+        self.sha256 = sha256
+        self.tamanho = tamanho
+        self.temporario = temporario
+        self._ao_descartar = ao_descartar
+
+    def descartar(self):
+        """Apaga o arquivo se ele for temporário (os do cache ficam)."""
+        if self._ao_descartar is not None:
+            ao_descartar, self._ao_descartar = self._ao_descartar, None
+            ao_descartar()
+        if self.temporario:
+            try:
+                os.remove(self.caminho)
+            except FileNotFoundError:
+                pass
+
+
+def baixar_para_arquivo(sessao, url, pasta=None, headers=None, limite_bytes=LIMITE_PDF_BYTES):
+    """
+    GET com stream=True gravando bloco a bloco num arquivo temporário de 'pasta'
+    (a memória usada não depende do tamanho do PDF). Aborta acima de 'limite_bytes'.
+    Retorna (status, headers da resposta, PDFBaixado ou None se o status não for 200).
+    """
+    with sessao.get(url, headers=headers, verify=False, timeout=TIMEOUT, stream=True) as response:
+        if response.status_code != 200:
+            return response.status_code, response.headers, None
+
+        declarado = response.headers.get('Content-Length')
+        if declarado and declarado.isdigit() and int(declarado) > limite_bytes:
+            raise PDFGrandeDemais(f"{url} tem {int(declarado)} bytes (limite {limite_bytes})")
+
+        sha = hashlib.sha256()
+        tamanho = 0
+        descritor, caminho = tempfile.mkstemp(suffix=".pdf.part", dir=pasta)
+        try:
+            with os.fdopen(descritor, 'wb') as arquivo:
+                for bloco in response.iter_content(TAMANHO_BLOCO):
+                    tamanho += len(bloco)
+                    if tamanho > limite_bytes:
+                        raise PDFGrandeDemais(f"{url} passou de {limite_bytes} bytes")
+                    sha.update(bloco)
+                    arquivo.write(bloco)
+        except BaseException:
+            os.remove(caminho)
+            raise
+
+        return response.status_code, response.headers, PDFBaixado(caminho, sha.hexdigest(), tamanho)
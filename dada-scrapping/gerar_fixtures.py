@@ -0,0 +1,270 @@
+"""
+Gera os arquivos de teste usados pelo benchmark.py (já versionados em fixtures/; rode de novo só
+se mudar algo aqui). Requer o reportlab, que o robô em si não usa.
+
+Uso: python gerar_fixtures.py [pasta_saida]
+
+fixtures/pdfs/         9 gabaritos de um cargo só (21 páginas, 840 questões) + gabaritos.json
+                       -> python benchmark.py extracao fixtures/pdfs
+                       -> python benchmark.py backends fixtures/pdfs
+fixtures/multi_cargo/  PDF de 28 páginas com os gabaritos de 11 cargos; o PDFProcessor o rejeita
+                       (PDFAmbiguo) em vez de gravar o gabarito do primeiro cargo para todos
+fixtures/html/         páginas de concurso salvas + cargos.json com o mapa esperado
+                       -> python benchmark.py links fixtures/html
+"""
+import os
+import sys
+import json
+import random
+import unicodedata
+
+try:
+    from reportlab.pdfgen import canvas
+except ImportError:
+    canvas = None
+
+CAPA = ["CEBRASPE - CENTRO BRASILEIRO DE PESQUISA", "EDITAL N. 1, DE 12 DE MARCO DE 2023",
+        "Gabarito oficial definitivo das provas objetivas",
+        "Texto legal texto legal texto legal de abertura e justificativas."]
+CABECALHO = ["CEBRASPE - EDITAL N. 12, DE 3 DE MAIO DE 2022", "CARGOS 1, 2 E 3 - GABARITO DEFINITIVO",
+             "Item 5 A ser julgado conforme 10 E 11"]
+LOREM = ("O candidato devera observar as disposicoes do edital e os prazos legais de recurso "
+         "conforme item do edital").split()
+
+
+def _canvas(caminho):
+    # invariant=1: sem data/ID aleatório no arquivo, então a mesma semente gera os mesmos bytes
+    return canvas.Canvas(caminho, invariant=1)
+
+
+# ==========================================
+# 1. GABARITOS DE UM CARGO
+# ==========================================
+def gabarito_horizontal(caminho, n, letras, rng, capa=True, paginas_extras=0):
+    """Linha de números com a linha de letras embaixo, 20 por linha (formato mais comum)."""
+    c = _canvas(caminho)
+    if capa:
+        c.setFont("Helvetica", 11)
+        for i, linha in enumerate(CAPA):
+            c.drawString(50, 780 - 20 * i, linha)
+        c.showPage()
+
+    gabarito, y = {}, 760
+    c.setFont("Helvetica", 9)
+    c.drawString(50, 800, "CARGO 1: ANALISTA - GABARITO DEFINITIVO")
+    for bloco in range(0, n, 20):
+        for k, q in enumerate(range(bloco + 1, min(bloco + 21, n + 1))):
+            gabarito[q] = rng.choice(letras)
+            c.drawString(50 + 25 * k, y, str(q))
+            c.drawString(52 + 25 * k, y - 14, gabarito[q])
+        y -= 40
+        if y < 80:
+            c.showPage()
+            c.setFont("Helvetica", 9)
+            y = 760
+    c.showPage()
+    for _ in range(paginas_extras):
+        c.setFont("Helvetica", 11)
+        c.drawString(50, 780, "CARGO 2: OUTRO CARGO - texto de outro cargo sem gabarito aqui.")
+        c.showPage()
+    c.save()
+    return gabarito
+
+
+def _cabecalho(c):
+    c.setFont("Helvetica", 11)
+    for i, linha in enumerate(CABECALHO):
+        c.drawString(50, 800 - 16 * i, linha)
+
+
+def gabarito_anuladas(caminho, rng, n=120):
+    """Horizontal com anuladas: célula em branco ou '*' (as duas viram X)."""
+    c = _canvas(caminho)
+    _cabecalho(c)
+    gabarito, y = {}, 740
+    c.setFont("Helvetica", 9)
+    for bloco in range(0, n, 20):
+        for k, q in enumerate(range(bloco + 1, bloco + 21)):
+            c.drawString(50 + 25 * k, y, str(q))
+            resposta = rng.choice("CE")
+            if rng.random() < 0.06:
+                resposta = None
+            elif rng.random() < 0.04:
+                resposta = "*"
+            if resposta:
+                c.drawString(52 + 25 * k, y - 14, resposta)
+            gabarito[q] = "X" if resposta in (None, "*") else resposta
+        y -= 40
+    c.showPage()
+    c.save()
+    return gabarito
+
+
+def gabarito_colunas(caminho, rng, n=80):
+    """Tabela vertical: colunas de pares 'número letra'."""
+    c = _canvas(caminho)
+    _cabecalho(c)
+    gabarito = {}
+    c.setFont("Helvetica", 9)
+    for q in range(1, n + 1):
+        coluna, linha = (q - 1) // 20, (q - 1) % 20
+        gabarito[q] = rng.choice("ABCDE")
+        c.drawString(60 + 120 * coluna, 720 - 16 * linha, str(q))
+        c.drawString(90 + 120 * coluna, 720 - 16 * linha, gabarito[q])
+    c.showPage()
+    c.save()
+    return gabarito
+
+
+def gabarito_grade(caminho, rng, n=100):
+    """Grade com linhas desenhadas e texto levemente desalinhado na vertical."""
+    c = _canvas(caminho)
+    _cabecalho(c)
+    gabarito, y = {}, 720
+    c.setFont("Helvetica", 8)
+    for bloco in range(0, n, 25):
+        for k, q in enumerate(range(bloco + 1, bloco + 26)):
+            x = 40 + 20 * k
+            c.rect(x, y - 4, 20, 14)
+            c.rect(x, y - 18, 20, 14)
+            c.drawString(x + 3, y + rng.uniform(-1.2, 1.2), str(q))
+            gabarito[q] = rng.choice("ABCD")
+            c.drawString(x + 6, y - 14 + rng.uniform(-1.2, 1.2), gabarito[q])
+        y -= 50
+    c.showPage()
+    c.save()
+    return gabarito
+
+
+def gerar_pdfs(pasta):
+    os.makedirs(pasta, exist_ok=True)
+    gabaritos = {}
+    rng = random.Random(1)
+    for i in range(6):
+        # Pares: certo/errado com 120 itens; ímpares: múltipla escolha com 60; até 2 páginas sem gabarito no fim
+        letras, n = (['C', 'E'], 120) if i % 2 == 0 else (list('ABCDE'), 60)
+        gabaritos[f"cargo{i}.pdf"] = gabarito_horizontal(os.path.join(pasta, f"cargo{i}.pdf"), n, letras, rng,
+                                                         paginas_extras=i % 3)
+    rng = random.Random(7)
+    for nome, gerar in (("anuladas", gabarito_anuladas), ("colunas", gabarito_colunas), ("grade", gabarito_grade)):
+        gabaritos[f"{nome}.pdf"] = gerar(os.path.join(pasta, f"{nome}.pdf"), rng)
+    _salvar_json(os.path.join(pasta, "gabaritos.json"), gabaritos)
+
+
+# ==========================================
+# 2. PDF COM VÁRIOS CARGOS
+# ==========================================
+def gerar_multi_cargo(pasta, n_cargos=11):
+    """Edital de 7 páginas e depois, para cada cargo, texto + gabarito de 120 itens (numeração recomeça)."""
+    os.makedirs(pasta, exist_ok=True)
+    rng = random.Random(3)
+    c = _canvas(os.path.join(pasta, "multi.pdf"))
+
+    def texto(n_linhas):
+        c.setFont("Helvetica", 9)
+        for i in range(n_linhas):
+            c.drawString(40, 800 - 14 * i, " ".join(rng.choice(LOREM) for _ in range(16)))
+        c.showPage()
+
+    def gabarito(titulo, n=120):
+        respostas, y = {}, 760
+        c.setFont("Helvetica", 9)
+        c.drawString(50, 800, titulo)
+        for bloco in range(0, n, 20):
+            for k, q in enumerate(range(bloco + 1, bloco + 21)):
+                respostas[q] = rng.choice("CE")
+                c.drawString(50 + 25 * k, y, str(q))
+                c.drawString(52 + 25 * k, y - 14, respostas[q])
+            y -= 40
+        c.showPage()
+        return respostas
+
+    texto(10)
+    for _ in range(6):
+        texto(55)
+    primeiro = gabarito("CARGO 1: ANALISTA - GABARITO DEFINITIVO")
+    for cargo in range(2, n_cargos + 1):
+        texto(30)
+        gabarito(f"CARGO {cargo}: OUTRO - GABARITO DEFINITIVO")
+    c.save()
+    # Gabarito do cargo 1, para conferir que ele NÃO é gravado para os outros cargos
+    _salvar_json(os.path.join(pasta, "gabaritos.json"), {"multi.pdf": primeiro})
+
+
+# ==========================================
+# 3. PÁGINAS DE CONCURSO (mapear_cargos)
+# ==========================================
+# Menu e rodapé de todas as páginas: links que não são gabarito (e um PDF que não é gabarito)
+_MENU = ['<a href="/">Início</a>', '<a href="/concursos/encerrados">Encerrados</a>',
+         '<a href="/concursos/vigentes">Vigentes</a>', '<a href="#">Voltar ao topo</a>',
+         '<a href="/arquivos/politica_privacidade.pdf">Política de privacidade</a>']
+
+PAGINAS = {
+    # Básicos para vários cargos + específicos por cargo
+    "basico_e_especificos.html": [
+        '<a href="/concursos/PF_21/arquivos/GAB_DEF_BASICOS.PDF">GABARITO DEFINITIVO – Conhecimentos Básicos – Cargos 1, 2 e 3</a>',
+        '<a href="/concursos/PF_21/arquivos/gab_def_esp_1.pdf">Gabarito definitivo — Conhecimentos Específicos — Cargo 1</a>',
+        '<a href="/concursos/PF_21/arquivos/gab_def_esp_2.pdf">Gabarito definitivo — Conhecimentos Específicos — Cargo 2</a>',
+        '<a href="/concursos/PF_21/arquivos/gab_def_esp_3.pdf">Gabarito definitivo — Conhecimentos Específicos — Cargo 3</a>',
+        '<a href="/concursos/PF_21/arquivos/gab_prel_1.pdf">Gabarito preliminar — Cargo 1</a>',
+        '<a href="/concursos/PF_21/arquivos/edital_1.pdf">Edital nº 1 – abertura</a>',
+    ],
+    # Nº do cargo só na URL; texto em tags aninhadas e com entidades
+    "cargo_na_url.html": [
+        '<a href="https://cdn.cebraspe.org.br/concursos/TRF_22/arquivos/GAB_DEF_CARGO_4.pdf">'
+        '<span>Gabarito&nbsp;definitivo</span> <b>Conhecimentos Espec&iacute;ficos</b></a>',
+        '<a href="https://cdn.cebraspe.org.br/concursos/TRF_22/arquivos/GAB_DEF_CARGO_07.pdf">'
+        '<span>Gabarito definitivo</span></a>',
+        '<a href="/concursos/TRF_22/arquivos/gab_def.pdf">Gabarito definitivo</a>',
+    ],
+    # Texto decomposto (NFD) e em minúsculas
+    "texto_nfd.html": [
+        unicodedata.normalize('NFD', '<a href="/concursos/INSS_23/arquivos/gd_esp_5.pdf">'
+                                     'gabarito definitivo - conhecimentos específicos - cargos 5 e 6</a>'),
+        unicodedata.normalize('NFD', '<a href="/concursos/INSS_23/arquivos/gd_bas.pdf">'
+                                     'GABARITO DEFINITIVO – CONHECIMENTOS BÁSICOS – CARGOS 5, 6, 7 E 8</a>'),
+    ],
+    # Só gabaritos preliminares e outros documentos: nenhum cargo
+    "sem_definitivo.html": [
+        '<a href="/concursos/TCU_24/arquivos/gab_prel.pdf">Gabarito preliminar</a>',
+        '<a href="/concursos/TCU_24/arquivos/resultado.pdf">Resultado final definitivo</a>',
+        '<a href="/concursos/TCU_24/noticia">Gabarito definitivo (em breve)</a>',
+    ],
+}
+
+
+def gerar_html(pasta, crawler=None):
+    """Salva as páginas e, se houver crawler, o mapa de cargos que ele extrai de cada uma (cargos.json)."""
+    os.makedirs(pasta, exist_ok=True)
+    esperados = {}
+    for nome, links in PAGINAS.items():
+        html = ("<!DOCTYPE html><html><head><meta charset='utf-8'><title>Cebraspe</title></head><body>\n<nav>"
+                + " ".join(_MENU[:3]) + "</nav>\n<ul>\n" + "\n".join(f"<li>{link}</li>" for link in links)
+                + "\n</ul>\n<footer>" + " ".join(_MENU[3:]) + "</footer>\n</body></html>\n")
+        with open(os.path.join(pasta, nome), "w", encoding="utf-8") as f:
+            f.write(html)
+        if crawler is not None:
+            esperados[nome] = {cargo: dict(sorted(links.items()))
+                               for cargo, links in sorted(crawler._extrair_cargos(html).items())}
+    if crawler is not None:
+        _salvar_json(os.path.join(pasta, "cargos.json"), esperados)
+
+
+def _salvar_json(caminho, dados):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    PASTA = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+    if canvas is None:
+        print("Instale o reportlab para gerar os PDFs (pip install reportlab).")
+        sys.exit(1)
+    from controller import CebraspeCrawler
+
+    gerar_pdfs(os.path.join(PASTA, "pdfs"))
+    gerar_multi_cargo(os.path.join(PASTA, "multi_cargo"))
+    gerar_html(os.path.join(PASTA, "html"), CebraspeCrawler(pool=object(), sessao=object()))
+    print(f"Fixtures em {PASTA}")
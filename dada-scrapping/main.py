@@ -1,7 +1,9 @@
 import os
 import urllib3
 import time
-from controller import CebraspeCrawler, PDFProcessor
+from controller import CebraspeCrawler, PDFProcessor, PipelineGabaritos, PoolDrivers
+from cache_pdf import CachePDF
+from model import BancoDeDados, ConexaoBanco, EstadoCrawl
 
 # Suprime avisos de certificado SSL (limpa o terminal)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -11,6 +13,9 @@ def resetar_banco_dados(nome_banco="concursos_data.db"):
     if os.path.exists(nome_banco):
         try:
             os.remove(nome_banco)
+            for sufixo in ("-wal", "-shm"):  # arquivos do modo WAL
+                if os.path.exists(nome_banco + sufixo):
+                    os.remove(nome_banco + sufixo)
             print(f"🧹 Banco de dados antigo '{nome_banco}' apagado com sucesso.")
         except PermissionError:
             print(f"❌ Erro: O arquivo '{nome_banco}' está aberto. Feche o DB Browser e tente de novo.")
@@ -32,13 +37,51 @@ if __name__ == "__main__":
     # Coloque um número (ex: 5) apenas se quiser testar rápido.
     LIMITE_TESTE = None 
 
+    # --- MODO PIPELINE ---
+    # True = downloads em paralelo, parsing em processos e um único escritor no SQLite.
+    # False = fluxo sequencial original (um PDF por vez).
+    MODO_PIPELINE = True
+    MAX_DOWNLOADS = 8
+    MAX_POR_HOST = 4
+    MAX_PARSERS = None  # None = um processo por núcleo
+
+    # --- MODO INCREMENTAL ---
+    # True = guarda o progresso (tabelas crawl_*) e pula concursos/cargos já concluídos;
+    # só refaz falhas e o que ficou pendente numa execução interrompida.
+    MODO_INCREMENTAL = True
+
+    # --- GRAVAÇÃO NO SQLITE ---
+    # Uma conexão só (WAL) durante toda a coleta; o commit acontece a cada LOTE_CARGOS cargos.
+    # Numa queda perde-se no máximo o lote em aberto, que o modo incremental refaz na próxima rodada.
+    LOTE_CARGOS = 20
+
+    # --- LEITURA DOS PDFs ---
+    # 'auto' = pypdfium2 (muito mais rápido) com fallback para o pdfplumber; 'pdfplumber' força o antigo.
+    BACKEND_PDF = "auto"
+
+    # --- CACHE DE PDFs ---
+    # Re-execuções só baixam PDFs novos/alterados (GET condicional) e só reparseiam os que mudaram.
+    # MODO_OFFLINE = True usa apenas o que já está no cache (a lista de concursos ainda vem do site).
+    PASTA_CACHE_PDF = "pdf_cache"  # None = desliga o cache
+    LIMITE_CACHE_MB = 2048
+    MODO_OFFLINE = False
+
+    # --- NAVEGADORES ---
+    # Chromes headless reaproveitados entre concursos; com N_DRIVERS > 1 os próximos
+    # concursos são mapeados enquanto o atual é processado.
+    N_DRIVERS = 2
+    PAGINAS_POR_DRIVER = 50  # recicla cada Chrome depois de K páginas
+
     print("==================================================")
     print("   ROBÔ DE GABARITOS CEBRASPE - VERSÃO FINAL      ")
     print("==================================================\n")
 
     
-    crawler = CebraspeCrawler()
-    processor = PDFProcessor()
+    crawler = CebraspeCrawler(PoolDrivers(N_DRIVERS, PAGINAS_POR_DRIVER))
+    cache_pdf = CachePDF(PASTA_CACHE_PDF, LIMITE_CACHE_MB * 1024 ** 2, MODO_OFFLINE) if PASTA_CACHE_PDF else None
+    conexao = ConexaoBanco(ARQUIVO_BANCO, LOTE_CARGOS)
+    estado = EstadoCrawl(conexao=conexao) if MODO_INCREMENTAL else None
+    processor = PDFProcessor(db=BancoDeDados(conexao=conexao), cache=cache_pdf, backend=BACKEND_PDF, estado=estado)
 
     # 2. Obter a Lista Mestra
     print(f"📡 Acessando a lista de concursos encerrados...")
@@ -61,7 +104,19 @@ if __name__ == "__main__":
 
     print(f"\nIniciando a maratona em 3, 2, 1...\n")
 
-    for i, url_concurso in enumerate(lista_concursos, 1):
+    pipeline = PipelineGabaritos(processor, MAX_DOWNLOADS, MAX_POR_HOST, MAX_PARSERS, estado) if MODO_PIPELINE else None
+    if pipeline:
+        pipeline.iniciar()
+
+    interrompido = False
+
+    # Concursos já concluídos (modo incremental) nem chegam a ser mapeados
+    fila = [(i, url) for i, url in enumerate(lista_concursos, 1)
+            if not (estado and estado.concurso_concluido(url))]
+    ja_concluidos = total - len(fila)
+    mapas = crawler.mapear_varios([url for _, url in fila])
+
+    for i, url_concurso in fila:
         nome_concurso = extrair_nome_concurso(url_concurso)
         
         # Cabeçalho visual para acompanhar o progresso
@@ -70,8 +125,16 @@ if __name__ == "__main__":
         print(f"URL: {url_concurso}")
         
         try:
-            # A. Mapear Cargos
-            mapa_cargos = crawler.mapear_cargos(url_concurso)
+            # A. Mapear Cargos (o pool de drivers já pode ter adiantado este)
+            mapa_cargos = next(mapas)
+            if mapa_cargos is None:
+                # A página não carregou: FALHA (tentada de novo na próxima execução), não SEM_GABARITO
+                print(f"   ❌ Não foi possível carregar a página do concurso.")
+                if estado:
+                    estado.marcar_concurso_falha(url_concurso, nome_concurso)
+                continue
+            if estado:
+                estado.registrar_concurso(url_concurso, nome_concurso, mapa_cargos)
 
             if not mapa_cargos:
                 print(f"   ⚠️  Nenhum gabarito definitivo encontrado. Pulando.")
@@ -79,34 +142,66 @@ if __name__ == "__main__":
 
             # B. Processar Cargos
             print(f"   🔎 Encontrados {len(mapa_cargos)} grupos de cargos.")
+
+            if estado:
+                mapa_cargos = estado.cargos_pendentes(url_concurso, mapa_cargos)
+                print(f"   ♻️  {len(mapa_cargos)} cargos pendentes (os demais já estão no banco).")
             
+            if pipeline:
+                # Download/parsing/gravação seguem em segundo plano enquanto o próximo concurso é mapeado
+                pipeline.enviar_concurso(nome_concurso, mapa_cargos, url_concurso)
+                continue
+
             for id_cargo, links in mapa_cargos.items():
                 processor.limpar_memoria()
+                registros = []
                 
                 # Download e Leitura
                 if 'basico' in links:
-                    processor.processar_pdf(links['basico'], nome_concurso, "Conhec. Básicos")
+                    registros.append(processor.processar_pdf(links['basico'], nome_concurso, "Conhec. Básicos"))
                 
                 if 'especifico' in links:
-                    processor.processar_pdf(links['especifico'], nome_concurso, "Conhec. Específicos")
+                    registros.append(processor.processar_pdf(links['especifico'], nome_concurso, "Conhec. Específicos"))
 
                 # Salvar no SQLite
-                processor.salvar_final(nome_concurso, id_cargo)
+                salvo = processor.salvar_final(nome_concurso, id_cargo)
+                if estado:
+                    estado.marcar_pdfs(url_concurso, id_cargo, registros, salvo)
 
         except KeyboardInterrupt:
             print("\n🛑 Processo interrompido pelo usuário.")
+            if estado:
+                print("   O progresso está salvo: rode de novo para continuar de onde parou.")
+            interrompido = True
             break
         except Exception as e:
             print(f"❌ Erro crítico no concurso {nome_concurso}: {e}")
+            if estado:
+                estado.marcar_concurso_falha(url_concurso, nome_concurso)
             continue
 
         # Pequena pausa para o servidor respirar
         time.sleep(1)
 
+    mapas.close()
+    crawler.fechar()
+
+    if pipeline:
+        print("\n⏳ Aguardando downloads e gravações pendentes...")
+        pipeline.finalizar(cancelar=interrompido)
+
+    conexao.fechar()  # confirma o último lote
+    if cache_pdf:
+        cache_pdf.fechar()
+
+    if ja_concluidos:
+        print(f"\n⏭️  {ja_concluidos} concursos já estavam concluídos e foram pulados.")
+
     # 4. Relatório Final
     tempo_total = (time.time() - start_time) / 60
     print("\n==================================================")
     print("✅✅✅  COLETA FINALIZADA COM SUCESSO!  ✅✅✅")
     print(f"Tempo total: {tempo_total:.2f} minutos")
+    print(f"Mapeamento por camada: {crawler.resumo_metricas()}")
     print(f"Banco de dados gerado: {ARQUIVO_BANCO}")
     print("==================================================")
\ No newline at end of file
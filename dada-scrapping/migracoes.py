@@ -0,0 +1,129 @@
+# ==========================================
+# MIGRAÇÕES DO ESQUEMA (PRAGMA user_version)
+# ==========================================
+# Cada migração roda uma única vez, em ordem, dentro da mesma transação que grava a nova versão.
+# Bancos antigos (versão 0, tabelas já criadas) passam pela 1 sem efeito, porque ela usa IF NOT EXISTS.
+# Para mudar o esquema: acrescente uma migração no fim da lista; nunca edite uma que já foi publicada.
+
+# Resumo de um cargo: contagem por letra (sem anuladas 'X') e nº de alternativas, com a mesma
+# regra do analisador (múltipla escolha com alguma resposta 'E' = 5 alternativas, senão 4).
+_SELECT_RESUMO = '''
+    SELECT cg.id, cg.tipo_prova,
+           CASE WHEN cg.tipo_prova != 'MULTIPLA_ESCOLHA' THEN 0
+                WHEN SUM(g.resposta = 'E') > 0 THEN 5 ELSE 4 END,
+           SUM(g.resposta != 'X'), SUM(g.resposta = 'X'),
+           SUM(g.resposta = 'A'), SUM(g.resposta = 'B'), SUM(g.resposta = 'C'),
+           SUM(g.resposta = 'D'), SUM(g.resposta = 'E')
+    FROM cargos cg
+    JOIN gabaritos g ON g.cargo_id = cg.id
+'''
+_INSERIR_RESUMO = '''
+    INSERT OR REPLACE INTO resumo_cargos
+        (cargo_id, tipo_prova, qtd_alternativas, n_questoes, n_anuladas, qtd_a, qtd_b, qtd_c, qtd_d, qtd_e)
+'''
+
+# Usado por BancoDeDados a cada cargo gravado
+SQL_ATUALIZAR_RESUMO = _INSERIR_RESUMO + _SELECT_RESUMO + "WHERE cg.id = ? GROUP BY cg.id"
+
+MIGRACOES = [
+    (1, "tabelas base", [
+        # Tabela 1: Concursos
+        '''
+        CREATE TABLE IF NOT EXISTS concursos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT UNIQUE
+        )
+        ''',
+        # Tabela 2: Cargos (Ligada ao Concurso)
+        '''
+        CREATE TABLE IF NOT EXISTS cargos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            concurso_id INTEGER,
+            nome_cargo TEXT,
+            tipo_prova TEXT, -- 'CERTO_ERRADO' ou 'MULTIPLA_ESCOLHA'
+            FOREIGN KEY(concurso_id) REFERENCES concursos(id),
+            UNIQUE(concurso_id, nome_cargo)
+        )
+        ''',
+        # Tabela 3: Gabarito (Ligada ao Cargo)
+        '''
+        CREATE TABLE IF NOT EXISTS gabaritos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cargo_id INTEGER,
+            numero_questao INTEGER,
+            resposta TEXT,
+            materia TEXT,
+            FOREIGN KEY(cargo_id) REFERENCES cargos(id),
+            UNIQUE(cargo_id, numero_questao)
+        )
+        ''',
+    ]),
+
+    (2, "índices de cobertura", [
+        # Gabarito de um cargo em ordem (_carregar_gabarito, GabaritoStore) sem tocar na tabela
+        "CREATE INDEX IF NOT EXISTS idx_gabaritos_cargo_questao ON gabaritos(cargo_id, numero_questao, resposta)",
+        # Contagem por (cargo, letra) já agrupada pelo índice
+        "CREATE INDEX IF NOT EXISTS idx_gabaritos_cargo_resposta ON gabaritos(cargo_id, resposta)",
+        "ANALYZE",
+    ]),
+
+    (3, "resumo por cargo", [
+        '''
+        CREATE TABLE IF NOT EXISTS resumo_cargos (
+            cargo_id INTEGER PRIMARY KEY REFERENCES cargos(id),
+            tipo_prova TEXT,
+            qtd_alternativas INTEGER, -- 0 = certo/errado
+            n_questoes INTEGER,       -- sem as anuladas
+            n_anuladas INTEGER,
+            qtd_a INTEGER, qtd_b INTEGER, qtd_c INTEGER, qtd_d INTEGER, qtd_e INTEGER
+        )
+        ''',
+        _INSERIR_RESUMO + _SELECT_RESUMO + "GROUP BY cg.id",
+    ]),
+
+    (4, "views para os analisadores", [
+        # Uma linha por resposta válida, já com concurso e cargo (o JOIN de carregar_dados)
+        '''
+        CREATE VIEW IF NOT EXISTS vw_respostas AS
+        SELECT c.nome AS concurso, cg.nome_cargo AS cargo, cg.id AS cargo_id, cg.tipo_prova,
+               g.numero_questao, g.resposta, g.materia
+        FROM gabaritos g
+        JOIN cargos cg ON g.cargo_id = cg.id
+        JOIN concursos c ON cg.concurso_id = c.id
+        WHERE g.resposta != 'X'
+        ''',
+        # Uma linha por prova com as contagens por letra (lida de resumo_cargos, sem varrer gabaritos)
+        '''
+        CREATE VIEW IF NOT EXISTS vw_resumo_provas AS
+        SELECT c.nome AS concurso, cg.nome_cargo AS cargo, r.cargo_id, r.tipo_prova, r.qtd_alternativas,
+               r.n_questoes, r.qtd_a AS A, r.qtd_b AS B, r.qtd_c AS C, r.qtd_d AS D, r.qtd_e AS E
+        FROM resumo_cargos r
+        JOIN cargos cg ON r.cargo_id = cg.id
+        JOIN concursos c ON cg.concurso_id = c.id
+        WHERE r.n_questoes > 0
+        ''',
+    ]),
+]
+
+VERSAO_ATUAL = MIGRACOES[-1][0]
+
+
+def versao_do_banco(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def aplicar_migracoes(conn):
+    """
+    Aplica as migrações pendentes na conexão (que já deve estar numa transação).
+    Retorna a lista de descrições aplicadas.
+    """
+    versao = versao_do_banco(conn)
+    aplicadas = []
+    for numero, descricao, comandos in MIGRACOES:
+        if numero <= versao:
+            continue
+        for comando in comandos:
+            conn.execute(comando)
+        conn.execute(f"PRAGMA user_version = {numero}")
+        aplicadas.append(descricao)
+    return aplicadas
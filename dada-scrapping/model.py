@@ -1,7 +1,11 @@
 import sqlite3
+import threading
+from contextlib import contextmanager
 from dataclasses import dataclass, asdict
 from typing import List
 
+from migracoes import SQL_ATUALIZAR_RESUMO, aplicar_migracoes
+
 @dataclass
 class QuestaoGabarito:
     concurso: str
@@ -9,60 +13,173 @@ class QuestaoGabarito:
     alternativa_correta: str
     materia: str = "Geral" # 'Geral' ou 'Específico'
 
-class BancoDeDados:
-    def __init__(self, nome_banco="concursos_data.db"):
+class AcumuladorQuestoes:
+    """
+    Questões de um cargo em memória, UMA por (materia, numero), em listas paralelas.
+      - A primeira estratégia que encontra a questão define a resposta (tabela > horizontal > vertical,
+        na ordem em que rodam), então o resultado não depende de quem escreveu por último.
+      - Outra estratégia com letra diferente não sobrescreve: vira um conflito registrado.
+    Iterar devolve tuplas (numero, resposta, materia, estrategia).
+    """
+    __slots__ = ('numeros', 'respostas', 'materias', 'estrategias', 'conflitos', 'tentativas', '_indice')
+
+    def __init__(self):
+        self.numeros: List[int] = []
+        self.respostas: List[str] = []
+        self.materias: List[str] = []
+        self.estrategias: List[str] = []
+        self.conflitos: List[tuple] = []   # (materia, numero, resposta mantida, resposta descartada, estratégia)
+        self.tentativas: List[int] = []    # todo número visto, inclusive repetido (detecta numeração recomeçando)
+        self._indice = {}
+
+    def adicionar(self, numero, resposta, materia, estrategia=None):
+        """True se a questão é nova."""
+        self.tentativas.append(numero)
+        chave = (materia, numero)
+        posicao = self._indice.get(chave)
+        if posicao is not None:
+            if self.respostas[posicao] != resposta:
+                self.conflitos.append((materia, numero, self.respostas[posicao], resposta, estrategia))
+            return False
+
+        self._indice[chave] = len(self.numeros)
+        self.numeros.append(numero)
+        self.respostas.append(resposta)
+        self.materias.append(materia)
+        self.estrategias.append(estrategia)
+        return True
+
+    def marca(self):
+        return len(self.numeros), len(self.conflitos), len(self.tentativas)
+
+    def desfazer(self, marca):
+        """Descarta tudo o que entrou depois de marca()."""
+        n_questoes, n_conflitos, n_tentativas = marca
+        for materia, numero in zip(self.materias[n_questoes:], self.numeros[n_questoes:]):
+            del self._indice[(materia, numero)]
+        for lista in (self.numeros, self.respostas, self.materias, self.estrategias):
+            del lista[n_questoes:]
+        del self.conflitos[n_conflitos:]
+        del self.tentativas[n_tentativas:]
+
+    def estrategias_usadas(self, desde=0):
+        """Estratégias que renderam questões a partir da posição 'desde', na ordem em que apareceram."""
+        return list(dict.fromkeys(e for e in self.estrategias[desde:] if e))
+
+    def linhas(self):
+        """(numero, resposta, materia) prontas para o executemany."""
+        return zip(self.numeros, self.respostas, self.materias)
+
+    def __len__(self):
+        return len(self.numeros)
+
+    def __iter__(self):
+        return zip(self.numeros, self.respostas, self.materias, self.estrategias)
+
+class ConexaoBanco:
+    """
+    Uma conexão SQLite aberta durante toda a coleta (em vez de um connect por gravação),
+    compartilhada por BancoDeDados e EstadoCrawl e protegida por lock (o escritor do pipeline
+    roda noutra thread).
+      - WAL + synchronous=NORMAL: gravações não bloqueiam leitores e não fazem fsync a cada commit.
+      - Cada cargo é uma unidade (SAVEPOINT) dentro de uma transação que só é confirmada a cada
+        'lote' cargos; erro num cargo desfaz só ele.
+      - As consultas usam sempre o mesmo texto SQL, então o cache de statements do sqlite3 as reaproveita.
+    """
+    def __init__(self, nome_banco="concursos_data.db", lote=20):
         self.nome_banco = nome_banco
-        self.dados_temporarios: List[QuestaoGabarito] = []
+        self.lote = max(1, lote)
+        self.conn = sqlite3.connect(nome_banco, check_same_thread=False, isolation_level=None, cached_statements=256)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA cache_size=-65536")  # 64 MB
+        self._lock = threading.RLock()
+        self._pendentes = 0
+        self._fechada = False
+
+    @contextmanager
+    def unidade(self, contar=True):
+        """
+        Bloco de gravação atômico. contar=True conta para o lote (um cargo);
+        registros de estado usam contar=False e vão junto no próximo commit.
+        """
+        with self._lock:
+            if not self.conn.in_transaction:
+                self.conn.execute("BEGIN")
+            self.conn.execute("SAVEPOINT unidade")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK TO unidade")
+                self.conn.execute("RELEASE unidade")
+                raise
+            self.conn.execute("RELEASE unidade")
+            if contar:
+                self._pendentes += 1
+            # lote=1: cada unidade é confirmada na hora (comportamento antigo)
+            if self.lote == 1 or self._pendentes >= self.lote:
+                self.commit()
+
+    def consultar(self, sql, parametros=()):
+        with self._lock:
+            return self.conn.execute(sql, parametros).fetchall()
+
+    def commit(self):
+        with self._lock:
+            if self.conn.in_transaction:
+                self.conn.execute("COMMIT")
+            self._pendentes = 0
+
+    def fechar(self):
+        """Confirma o lote em aberto e fecha a conexão (pode ser chamado mais de uma vez)."""
+        with self._lock:
+            if self._fechada: return
+            self.commit()
+            self.conn.execute("PRAGMA optimize")  # atualiza as estatísticas dos índices, se preciso
+            self.conn.close()
+            self._fechada = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+# Textos SQL fixos (reaproveitados pelo cache de statements da conexão)
+_SQL_NOVO_CONCURSO = "INSERT OR IGNORE INTO concursos (nome) VALUES (?)"
+_SQL_ID_CONCURSO = "SELECT id FROM concursos WHERE nome = ?"
+_SQL_NOVO_CARGO = "INSERT OR IGNORE INTO cargos (concurso_id, nome_cargo, tipo_prova) VALUES (?, ?, ?)"
+_SQL_ID_CARGO = "SELECT id FROM cargos WHERE concurso_id = ? AND nome_cargo = ?"
+# 'INSERT OR REPLACE' atualiza se a questão já existir (útil se rodar 2 vezes)
+_SQL_GABARITO = "INSERT OR REPLACE INTO gabaritos (cargo_id, numero_questao, resposta, materia) VALUES (?, ?, ?, ?)"
+
+class BancoDeDados:
+    def __init__(self, nome_banco="concursos_data.db", conexao=None):
+        """conexao: ConexaoBanco compartilhada; sem ela, abre uma própria (commit a cada cargo)."""
+        self.conexao = conexao if conexao is not None else ConexaoBanco(nome_banco, lote=1)
+        self.nome_banco = self.conexao.nome_banco
+        self.questoes = AcumuladorQuestoes()
+        self._ids_concurso = {}
         self._inicializar_tabelas()
 
-    def adicionar_questao(self, questao: QuestaoGabarito):
+    def adicionar_questao(self, questao: QuestaoGabarito, estrategia=None):
         # Guarda na memória RAM temporariamente até mandarmos salvar
-        self.dados_temporarios.append(questao)
+        self.questoes.adicionar(questao.numero_questao, questao.alternativa_correta, questao.materia, estrategia)
+
+    def limpar(self):
+        """Esvazia as questões em memória (próximo cargo); a conexão e o esquema continuam."""
+        self.questoes = AcumuladorQuestoes()
 
     def _inicializar_tabelas(self):
-        """Cria a estrutura do banco se não existir"""
-        conn = sqlite3.connect(self.nome_banco)
-        cursor = conn.cursor()
-        
-        # Tabela 1: Concursos
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS concursos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nome TEXT UNIQUE
-            )
-        ''')
-
-        # Tabela 2: Cargos (Ligada ao Concurso)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS cargos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                concurso_id INTEGER,
-                nome_cargo TEXT,
-                tipo_prova TEXT, -- 'CERTO_ERRADO' ou 'MULTIPLA_ESCOLHA'
-                FOREIGN KEY(concurso_id) REFERENCES concursos(id),
-                UNIQUE(concurso_id, nome_cargo)
-            )
-        ''')
-
-        # Tabela 3: Gabarito (Ligada ao Cargo)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS gabaritos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                cargo_id INTEGER,
-                numero_questao INTEGER,
-                resposta TEXT,
-                materia TEXT,
-                FOREIGN KEY(cargo_id) REFERENCES cargos(id),
-                UNIQUE(cargo_id, numero_questao) 
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        """Cria/atualiza a estrutura do banco (migrações versionadas, ver migracoes.py)"""
+        with self.conexao.unidade(contar=False) as conn:
+            aplicar_migracoes(conn)
+        self.conexao.commit()
 
     def _detectar_tipo_prova(self):
         """Analisa as respostas para descobrir se é Certo/Errado ou Múltipla Escolha"""
-        respostas = set(q.alternativa_correta for q in self.dados_temporarios)
+        respostas = set(self.questoes.respostas)
         
         # Se tiver letras como B, D ou A (e não for só C/E), é Múltipla Escolha
         # Nota: Cebraspe usa C (Certo) e E (Errado). Às vezes usa A/B para V/F, mas raro.
@@ -76,62 +193,167 @@ class BancoDeDados:
         # Se só tiver C, E, X (Anulada) ou A (às vezes a primeira letra), assume C/E
         return "CERTO_ERRADO"
 
+    @staticmethod
+    def _inserir_ou_buscar(cursor, sql_inserir, sql_buscar, parametros, chave):
+        """ID da linha nova via lastrowid; só consulta quando ela já existia (INSERT ignorado)."""
+        cursor.execute(sql_inserir, parametros)
+        if cursor.rowcount == 1:
+            return cursor.lastrowid
+        cursor.execute(sql_buscar, chave)
+        return cursor.fetchone()[0]
+
     def salvar_no_banco(self, nome_concurso_raw, id_cargo_raw):
         """
         Pega os dados da memória RAM e persiste no SQLite.
         nome_concurso_raw: "AEB_24"
         id_cargo_raw: "1" (Será salvo como "Cargo 1")
+        O commit acontece a cada 'lote' cargos (ver ConexaoBanco).
         """
-        if not self.dados_temporarios:
+        if not self.questoes:
             return False
 
-        conn = sqlite3.connect(self.nome_banco)
-        cursor = conn.cursor()
-
         try:
-            # 1. Inserir ou Pegar ID do Concurso
-            cursor.execute("INSERT OR IGNORE INTO concursos (nome) VALUES (?)", (nome_concurso_raw,))
-            cursor.execute("SELECT id FROM concursos WHERE nome = ?", (nome_concurso_raw,))
-            concurso_id = cursor.fetchone()[0]
+            with self.conexao.unidade() as conn:
+                cursor = conn.cursor()
 
-            # 2. Detectar Tipo de Prova
-            tipo_prova = self._detectar_tipo_prova()
-            nome_cargo = f"Cargo {id_cargo_raw}"
+                # 1. Inserir ou Pegar ID do Concurso (em memória depois da primeira vez)
+                concurso_id = self._ids_concurso.get(nome_concurso_raw)
+                if concurso_id is None:
+                    concurso_id = self._inserir_ou_buscar(cursor, _SQL_NOVO_CONCURSO, _SQL_ID_CONCURSO,
+                                                          (nome_concurso_raw,), (nome_concurso_raw,))
 
-            # 3. Inserir ou Pegar ID do Cargo
-            cursor.execute('''
-                INSERT OR IGNORE INTO cargos (concurso_id, nome_cargo, tipo_prova) 
-                VALUES (?, ?, ?)
-            ''', (concurso_id, nome_cargo, tipo_prova))
-            
-            cursor.execute('''
-                SELECT id FROM cargos 
-                WHERE concurso_id = ? AND nome_cargo = ?
-            ''', (concurso_id, nome_cargo))
-            cargo_id = cursor.fetchone()[0]
-
-            # 4. Inserir Questões (Bulk Insert para performance)
-            lista_para_inserir = []
-            for q in self.dados_temporarios:
-                lista_para_inserir.append((
-                    cargo_id, 
-                    q.numero_questao, 
-                    q.alternativa_correta, 
-                    q.materia
-                ))
-
-            # 'INSERT OR REPLACE' atualiza se a questão já existir (útil se rodar 2 vezes)
-            cursor.executemany('''
-                INSERT OR REPLACE INTO gabaritos (cargo_id, numero_questao, resposta, materia)
-                VALUES (?, ?, ?, ?)
-            ''', lista_para_inserir)
-
-            conn.commit()
+                # 2. Detectar Tipo de Prova
+                tipo_prova = self._detectar_tipo_prova()
+                nome_cargo = f"Cargo {id_cargo_raw}"
+
+                # 3. Inserir ou Pegar ID do Cargo
+                cargo_id = self._inserir_ou_buscar(cursor, _SQL_NOVO_CARGO, _SQL_ID_CARGO,
+                                                   (concurso_id, nome_cargo, tipo_prova), (concurso_id, nome_cargo))
+
+                # 4. Inserir Questões (Bulk Insert para performance)
+                lista_para_inserir = [(cargo_id, numero, resposta, materia)
+                                      for numero, resposta, materia in self.questoes.linhas()]
+                cursor.executemany(_SQL_GABARITO, lista_para_inserir)
+
+                # 5. Resumo do cargo (contagem por letra) usado pelas views dos analisadores
+                cursor.execute(SQL_ATUALIZAR_RESUMO, (cargo_id,))
+
+            # Só guarda o ID depois que a unidade deu certo (um rollback apagaria o concurso recém-criado)
+            self._ids_concurso[nome_concurso_raw] = concurso_id
             return True, len(lista_para_inserir), tipo_prova
 
         except Exception as e:
             print(f"Erro ao salvar no banco: {e}")
-            conn.rollback()
             return False, 0, "ERRO"
-        finally:
-            conn.close()
\ No newline at end of file
+
+    def fechar(self):
+        self.conexao.fechar()
+
+class EstadoCrawl:
+    """
+    Estado do modo incremental, guardado no mesmo banco:
+      - crawl_concursos: um registro por URL de concurso (MAPEADO, SEM_GABARITO ou FALHA)
+      - crawl_pdfs: um registro por PDF de cada cargo (PENDENTE, CONCLUIDO ou FALHA),
+        com hash do conteúdo, estratégia de parsing e nº de questões.
+    Um concurso está concluído quando foi mapeado e todos os seus PDFs estão CONCLUIDO.
+    PDFs PENDENTE (execução interrompida) ou FALHA são refeitos na próxima rodada.
+    Com a mesma ConexaoBanco do BancoDeDados, o estado é confirmado no mesmo commit que as questões.
+    """
+    def __init__(self, nome_banco="concursos_data.db", conexao=None):
+        self.conexao = conexao if conexao is not None else ConexaoBanco(nome_banco, lote=1)
+        self.nome_banco = self.conexao.nome_banco
+        self._inicializar_tabelas()
+
+    def _inicializar_tabelas(self):
+        with self.conexao.unidade(contar=False) as conn:
+            cursor = conn.cursor()
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS crawl_concursos (
+                    url TEXT PRIMARY KEY,
+                    nome TEXT,
+                    status TEXT,
+                    atualizado_em TEXT
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS crawl_pdfs (
+                    concurso_url TEXT,
+                    id_cargo TEXT,
+                    url TEXT,
+                    materia TEXT,
+                    sha256 TEXT,
+                    estrategia TEXT,
+                    questoes INTEGER DEFAULT 0,
+                    status TEXT,
+                    atualizado_em TEXT,
+                    PRIMARY KEY(concurso_url, id_cargo, url),
+                    FOREIGN KEY(concurso_url) REFERENCES crawl_concursos(url)
+                )
+            ''')
+        self.conexao.commit()
+
+    def concurso_concluido(self, url_concurso):
+        linhas = self.conexao.consultar('''
+            SELECT c.status,
+                   (SELECT COUNT(*) FROM crawl_pdfs p
+                    WHERE p.concurso_url = c.url AND p.status != 'CONCLUIDO')
+            FROM crawl_concursos c WHERE c.url = ?
+        ''', (url_concurso,))
+        return bool(linhas) and linhas[0][0] in ('MAPEADO', 'SEM_GABARITO') and linhas[0][1] == 0
+
+    def registrar_concurso(self, url_concurso, nome_concurso, mapa_cargos):
+        """Grava o mapeamento do concurso; PDFs novos entram como PENDENTE."""
+        status = 'MAPEADO' if mapa_cargos else 'SEM_GABARITO'
+        pdfs = [(url_concurso, str(id_cargo), url, materia)
+                for id_cargo, links in mapa_cargos.items() for materia, url in links.items()]
+
+        with self.conexao.unidade(contar=False) as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO crawl_concursos (url, nome, status, atualizado_em)
+                VALUES (?, ?, ?, datetime('now'))
+            ''', (url_concurso, nome_concurso, status))
+            conn.executemany('''
+                INSERT OR IGNORE INTO crawl_pdfs (concurso_url, id_cargo, url, materia, status, atualizado_em)
+                VALUES (?, ?, ?, ?, 'PENDENTE', datetime('now'))
+            ''', pdfs)
+
+    def marcar_concurso_falha(self, url_concurso, nome_concurso):
+        with self.conexao.unidade(contar=False) as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO crawl_concursos (url, nome, status, atualizado_em)
+                VALUES (?, ?, 'FALHA', datetime('now'))
+            ''', (url_concurso, nome_concurso))
+
+    def cargos_pendentes(self, url_concurso, mapa_cargos):
+        """Só os cargos com algum PDF ainda não concluído."""
+        concluidos = set(self.conexao.consultar('''
+            SELECT id_cargo, url FROM crawl_pdfs
+            WHERE concurso_url = ? AND status = 'CONCLUIDO'
+        ''', (url_concurso,)))
+        return {id_cargo: links for id_cargo, links in mapa_cargos.items()
+                if any((str(id_cargo), url) not in concluidos for url in links.values())}
+
+    def questoes_anteriores(self, url_pdf):
+        """Maior nº de questões que este PDF já rendeu (em qualquer cargo), ou None."""
+        linhas = self.conexao.consultar(
+            "SELECT MAX(questoes) FROM crawl_pdfs WHERE url = ? AND questoes > 0", (url_pdf,))
+        return linhas[0][0] if linhas else None
+
+    def marcar_pdfs(self, url_concurso, id_cargo, registros, salvo):
+        """
+        registros: dicts com url, sha256, estrategia e questoes (vindos de PDFProcessor).
+        Um PDF só fica CONCLUIDO se rendeu questões E o cargo foi gravado.
+        """
+        linhas = [(r.get('sha256'), r.get('estrategia'), r.get('questoes', 0),
+                   'CONCLUIDO' if salvo and r.get('questoes', 0) > 0 else 'FALHA',
+                   url_concurso, str(id_cargo), r['url'])
+                  for r in registros]
+
+        with self.conexao.unidade(contar=False) as conn:
+            conn.executemany('''
+                UPDATE crawl_pdfs
+                SET sha256 = ?, estrategia = ?, questoes = ?, status = ?, atualizado_em = datetime('now')
+                WHERE concurso_url = ? AND id_cargo = ? AND url = ?
+            ''', linhas)